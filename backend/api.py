@@ -1,8 +1,10 @@
 from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import StreamingResponse
 import asyncio
+import concurrent.futures
+import time
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Callable, Tuple
 import sys
 import os
 import json
@@ -12,8 +14,24 @@ import sqlite3
 # Add parent directory to path to import existing modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src import sql_editor, card_models
+from src import sql_editor, card_models, style_engine
 from src.sql_editor import find_mtga_db_path
+from src.image_cache import ImageCache, DEFAULT_MAX_BYTES
+from src.card_index import SORT_COLUMNS, get_card_index, reset_card_index
+from src.tag_index import FIELDS as TAG_INDEX_FIELDS, get_tag_index, reset_tag_index
+from src.style_rules import StyleRule, apply_rule, resolve_targets
+from src.change_journal import get_change_journal, load_changes
+from src.preset_restore import restore_changes
+from src.backup_store import MOD, ORIGINAL, get_backup_store
+from src.db_snapshots import get_snapshot_store, snapshot_before, snapshot_hook
+from src.update_watcher import POLL_INTERVAL_SECONDS, ClientUpdate, UpdateWatcher, reapply_update
+from src.image_utils import IMAGE_OUTPUT_FORMATS
+from backend import executors
+from backend.executors import run_bundle_job, run_bundle_job_for, run_io
+from backend.database import DatabaseManager
+from backend.single_flight import SingleFlight
+from backend.query_cache import QueryCache
+from src.unity_bundle import environment_cache
 
 router = APIRouter()
 
@@ -102,41 +120,116 @@ USER_CONFIG_DIR = Path.home() / ".mtga_swapper"
 USER_CONFIG_FILE = USER_CONFIG_DIR / "config.json"
 USER_CONFIG_DIR.mkdir(exist_ok=True)
 
+# Encoded card art cache (budget configurable via "ImageCacheSizeMB" in config.json)
+image_cache = ImageCache(USER_CONFIG_DIR / "image_cache", DEFAULT_MAX_BYTES)
+image_flights = SingleFlight()
+
+# Recent /api/cards responses; cleared by every write to the game data
+card_queries = QueryCache()
+
 # Database State
-db_connection = None
-db_cursor = None
+database: Optional[DatabaseManager] = None
 current_db_path = None
+# Re-apply modifications after MTGA updates ("WatchForUpdates", "UpdatePollSeconds" in config.json)
+watch_for_updates = True
+update_poll_seconds = POLL_INTERVAL_SECONDS
+update_watcher: Optional[UpdateWatcher] = None
+# Longest a client update re-apply may run before the watcher thread stops waiting for it
+CLIENT_UPDATE_TIMEOUT_SECONDS = 600
+# Snapshot the database before bulk writes ("SnapshotBeforeBulk", "SnapshotRetention", "SnapshotMaxMB")
+snapshot_before_bulk = True
+server_loop: Optional[asyncio.AbstractEventLoop] = None
+# Serve pooled reads from an in-memory copy of the card tables ("InMemorySnapshot" in config.json)
+use_memory_snapshot = False
 
-def get_db_connection():
-    global db_connection, db_cursor, current_db_path
-    if db_connection is None and current_db_path:
-        print(f"Attempting to connect to DB at: '{current_db_path}'") # DEBUG LOG
+def get_database() -> Optional[DatabaseManager]:
+    """Return the connection manager for the configured database, opening it on first use."""
+    global database, current_db_path
+    if database is None and current_db_path:
         if not os.path.exists(current_db_path):
              print(f"Error: Database file does not exist at: '{current_db_path}'")
              return None
              
+        manager = DatabaseManager(current_db_path, memory_snapshot=use_memory_snapshot)
         try:
-            # Create connection
-            db_cursor, db_connection, _ = sql_editor.create_database_connection(current_db_path)
-            
             # Validate connection by querying Cards table
-            try:
-                db_cursor.execute("SELECT 1 FROM Cards LIMIT 1")
-                print("Database connection successful and validated")
-            except sqlite3.Error as e:
-                print(f"Database validation failed: {e}")
-                db_connection.close()
-                db_connection = None
-                db_cursor = None
-                return None
-                
-        except Exception as e:
-            print(f"Error connecting to DB: {e}")
+            manager.validate()
+            print("Database connection successful and validated")
+        except sqlite3.Error as e:
+            print(f"Database validation failed: {e}")
+            manager.close()
             return None
-    return db_cursor
+        manager.add_write_listener(card_queries.invalidate)
+        # Style writes patch the tag index themselves (see on_tag_change); any other write marks it stale
+        tag_index = get_tag_index(current_db_path)
+        manager.add_write_listener(tag_index.note_write)
+        manager.add_rollback_listener(tag_index.mark_stale)
+        database = manager
+    return database
+
+def on_tag_change(tag: str, grp_ids: List[int], added: bool) -> None:
+    """Style engine listener: patch the tag index with the cards a write just changed."""
+    if current_db_path:
+        get_tag_index(current_db_path).apply_tag_change(tag, grp_ids, added)
+
+style_engine.add_tag_listener(on_tag_change)
+
+async def select_grp_ids(criteria: Dict[str, List[str]]) -> List[int]:
+    """Intersect tag index selections for the configured database (runs off the event loop)."""
+    return list(await run_io(get_tag_index(current_db_path).select, criteria))
+
+def bulk_write_job(function: Callable, label: str) -> Callable:
+    """Writer job for a bulk operation: snapshots the database first unless "SnapshotBeforeBulk" is off."""
+    if not snapshot_before_bulk:
+        return function
+    return snapshot_before(function, label, current_db_path)
+
+def bulk_snapshot_hook(label: str) -> Optional[Callable]:
+    """before_write hook for re-apply jobs: snapshot only once the diff found rows to write."""
+    if not snapshot_before_bulk:
+        return None
+    return snapshot_hook(label, current_db_path)
+
+async def stream_write_job(
+    database: DatabaseManager,
+    describe_result: Callable[[Any], Tuple[int, str]],
+    function: Callable,
+    *args,
+):
+    """
+    Run a writer job and yield SSE events for it.
+
+    `function` receives an on_progress(current, total, message) callback as its
+    last argument. It is called on the writer thread (from SQLite's progress
+    handler), so reports are handed to this generator through an asyncio queue.
+
+    Args:
+        database: Connection manager to queue the job on
+        describe_result: Maps the job's result to (total, completion message)
+        function: Writer job, called as function(cursor, connection, *args, on_progress)
+    """
+    loop = asyncio.get_running_loop()
+    reports: asyncio.Queue = asyncio.Queue()
+
+    def report_progress(current: int, total: int, message: str) -> None:
+        loop.call_soon_threadsafe(reports.put_nowait, (current, total, message))
+
+    job = asyncio.ensure_future(database.write(function, *args, report_progress))
+    while not (job.done() and reports.empty()):
+        waiter = asyncio.ensure_future(reports.get())
+        await asyncio.wait({job, waiter}, return_when=asyncio.FIRST_COMPLETED)
+        if not waiter.done():
+            waiter.cancel()
+            continue
+        current, total, message = waiter.result()
+        progress_pct = int((current / total) * 100) if total else 100
+        yield f"data: {json.dumps({'type': 'progress', 'current': current, 'total': total, 'percentage': progress_pct, 'message': f'{message}... {current}/{total}'})}\n\n"
+
+    total, message = describe_result(job.result())
+    yield f"data: {json.dumps({'type': 'complete', 'total': total, 'message': message})}\n\n"
 
 def init_config():
-    global current_db_path
+    global current_db_path, watch_for_updates, update_poll_seconds, snapshot_before_bulk, use_memory_snapshot
     if not USER_CONFIG_FILE.exists():
         # Create default config
         default_config = {"SavePath": "", "DatabasePath": ""}
@@ -152,13 +245,33 @@ def init_config():
     try:
         with open(USER_CONFIG_FILE, "r") as f:
             config = json.load(f)
+            cache_size_mb = config.get("ImageCacheSizeMB")
+            if cache_size_mb:
+                image_cache.max_bytes = int(cache_size_mb) * 1024 * 1024
+            # Worker pool limits ("BundleWorkers", "IoWorkers", "BundleWorkerMode", "BundleCacheSizeMB")
+            executors.configure(
+                bundle_workers=config.get("BundleWorkers"),
+                io_workers=config.get("IoWorkers"),
+                bundle_worker_mode=config.get("BundleWorkerMode"),
+                bundle_cache_bytes=(config.get("BundleCacheSizeMB") or 0) * 1024 * 1024,
+                db_readers=config.get("DbReaders"),
+            )
+            watch_for_updates = bool(config.get("WatchForUpdates", True))
+            update_poll_seconds = float(config.get("UpdatePollSeconds") or POLL_INTERVAL_SECONDS)
+            snapshot_before_bulk = bool(config.get("SnapshotBeforeBulk", True))
+            use_memory_snapshot = bool(config.get("InMemorySnapshot", False))
+            snapshots = get_snapshot_store()
+            if config.get("SnapshotRetention"):
+                snapshots.max_snapshots = int(config["SnapshotRetention"])
+            if config.get("SnapshotMaxMB"):
+                snapshots.max_total_bytes = int(config["SnapshotMaxMB"]) * 1024 * 1024
             db_path = config.get("DatabasePath")
             if db_path:
                 # Sanitize path: remove "True" prefix if present (from previous bug) and whitespace
                 db_path = db_path.replace("True", "").strip()
                 current_db_path = db_path
                 # Attempt connection on init
-                get_db_connection()
+                get_database()
     except Exception as e:
         print(f"Error loading config: {e}")
 
@@ -170,13 +283,269 @@ async def get_config():
     global current_db_path
     
     # Check connection status
-    is_connected = get_db_connection() is not None
+    is_connected = get_database() is not None
     
     return {
         "database_path": current_db_path,
         "is_db_connected": is_connected
     }
 
+def export_change_journal() -> int:
+    """Write changes.json from the change journal (also run on shutdown). Returns the card count."""
+    return get_change_journal(USER_CONFIG_DIR / "changes.json").export_json()
+
+@router.get("/changes")
+async def get_changes():
+    """Return every recorded change in the changes.json layout."""
+    return await run_io(get_change_journal(USER_CONFIG_DIR / "changes.json").changes)
+
+@router.post("/changes/export")
+async def export_changes():
+    """Write ~/.mtga_swapper/changes.json from the change journal."""
+    try:
+        count = await run_io(export_change_journal)
+    except OSError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"status": "success", "count": count, "path": str(USER_CONFIG_DIR / "changes.json")}
+
+def reapply_changes(cursor, connection, changes_path: str, asset_bundle_path: str, on_progress=None) -> dict:
+    """Writer job: re-apply every recorded change (e.g. after a game update)."""
+    return restore_changes(
+        cursor,
+        connection,
+        load_changes(changes_path),
+        asset_bundle_path,
+        on_progress,
+        before_write=bulk_snapshot_hook("reapply-changes"),
+    )
+
+def diff_changes(connection, changes_path: str, asset_bundle_path: str) -> dict:
+    """Reader job: report what re-applying the recorded changes would write."""
+    return restore_changes(
+        connection.cursor(), connection, load_changes(changes_path), asset_bundle_path, dry_run=True
+    )
+
+@router.get("/changes/diff")
+async def get_changes_diff():
+    """Compare the recorded changes with the live database and bundles without writing."""
+    database = get_database()
+    if not database:
+        raise HTTPException(status_code=500, detail="Database not connected")
+    changes_path, asset_bundle_path = prepare_change_log()
+    return await database.read(diff_changes, changes_path, asset_bundle_path)
+
+@router.get("/changes/apply-stream")
+async def apply_changes_stream():
+    """Re-apply the recorded changes with SSE progress (bundles first, then one transaction)."""
+    async def generate_progress():
+        try:
+            database = get_database()
+            if not database:
+                yield f"data: {json.dumps({'type': 'error', 'message': 'Database not connected'})}\n\n"
+                return
+
+            changes_path, asset_bundle_path = prepare_change_log()
+
+            def describe_result(report):
+                return report["cards_changed"], (
+                    f"Re-applied {report['cards_changed']} cards, {report['cards_unchanged']} already up to date "
+                    f"({report['bundles_restored']} bundles restored, {report['bundles_unchanged']} unchanged)"
+                )
+
+            async for event in stream_write_job(
+                database,
+                describe_result,
+                reapply_changes,
+                changes_path,
+                asset_bundle_path,
+            ):
+                yield event
+
+        except Exception as e:
+            print(f"SSE apply changes error: {e}")
+            yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+
+    return StreamingResponse(generate_progress(), media_type="text/event-stream")
+
+@router.get("/snapshots")
+async def list_snapshots():
+    """List the database snapshots, newest first."""
+    return await run_io(get_snapshot_store().list)
+
+@router.post("/snapshots")
+async def create_snapshot(label: str = "manual"):
+    """Snapshot the database now (queued behind running writes)."""
+    database = get_database()
+    if not database:
+        raise HTTPException(status_code=500, detail="Database not connected")
+
+    def take_snapshot(cursor, connection):
+        return get_snapshot_store().take(connection, label, current_db_path)
+
+    return await database.write(take_snapshot)
+
+@router.post("/snapshots/{snapshot_id}/restore")
+async def restore_snapshot(snapshot_id: str, force: bool = False):
+    """Replace the database contents with a snapshot (page-level copy, no journal replay)."""
+    database = get_database()
+    if not database:
+        raise HTTPException(status_code=500, detail="Database not connected")
+    store = get_snapshot_store()
+    try:
+        snapshot = await run_io(store.get, snapshot_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    if snapshot["database"] and snapshot["database"] != current_db_path and not force:
+        raise HTTPException(
+            status_code=409,
+            detail="Snapshot was taken from another database file (a different MTGA version); pass force=true to restore it anyway",
+        )
+
+    def restore(cursor, connection):
+        return store.restore(snapshot_id, connection)
+
+    await database.write(restore)
+    return {"status": "success", "snapshot": snapshot}
+
+@router.delete("/snapshots/{snapshot_id}")
+async def delete_snapshot(snapshot_id: str):
+    try:
+        await run_io(get_snapshot_store().delete, snapshot_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    return {"status": "success"}
+
+async def switch_database(database_path: str) -> None:
+    """
+    Point the API at another card database file (runs on the event loop).
+
+    The old connection manager is unpublished first, so new requests open the
+    new file, and closed only after the jobs already queued on it have run.
+    The tag index and card index of the new path are rebuilt from scratch.
+    """
+    global current_db_path, database
+    previous = database
+    current_db_path = database_path
+    database = None
+    card_queries.invalidate()
+    reset_tag_index(database_path)
+    reset_card_index(database_path)
+    if previous is not None:
+        await previous.close_when_idle()
+
+def save_database_path(database_path: str) -> None:
+    """Write "DatabasePath" to config.json, keeping the other settings."""
+    try:
+        with open(USER_CONFIG_FILE, "r") as f:
+            config = json.load(f)
+        config["DatabasePath"] = database_path
+        with open(USER_CONFIG_FILE, "w") as f:
+            json.dump(config, f, indent=4)
+    except (OSError, ValueError) as e:
+        print(f"Error saving new database path: {e}")
+
+async def handle_client_update(update: ClientUpdate) -> dict:
+    """Re-apply what an MTGA update replaced, switching to its new card database first."""
+    if update.database_file_path:
+        print(f"MTGA installed a new card database: {update.database_file_path}")
+        await switch_database(update.database_file_path)
+        await run_io(save_database_path, update.database_file_path)
+    database = get_database()
+    if not database:
+        return {}
+    changes_path, asset_bundle_path = prepare_change_log()
+    report = await database.write(
+        reapply_update, update, changes_path, asset_bundle_path, None, bulk_snapshot_hook("client-update")
+    )
+    for bundle_name in update.bundle_names or ():
+        image_cache.invalidate_bundle(bundle_name)
+    print(f"Re-applied modifications after MTGA update: {report}")
+    return report
+
+def on_client_update(update: ClientUpdate, watcher: Optional[UpdateWatcher] = None) -> None:
+    """
+    Update watcher callback (watcher thread): hand the update to the server's event loop and wait.
+
+    The wait gives up, cancelling the job, when the watcher is being stopped or after
+    CLIENT_UPDATE_TIMEOUT_SECONDS, so a loop that is shutting down cannot hang the thread.
+
+    Raises:
+        TimeoutError: If the re-apply did not finish in time
+    """
+    loop = server_loop
+    if loop is None or loop.is_closed():
+        return
+    try:
+        future = asyncio.run_coroutine_threadsafe(handle_client_update(update), loop)
+    except RuntimeError as e:
+        print(f"Skipping MTGA update, the server loop is gone: {e}")
+        return
+    deadline = time.monotonic() + CLIENT_UPDATE_TIMEOUT_SECONDS
+    while True:
+        try:
+            future.result(timeout=1.0)
+            return
+        except concurrent.futures.TimeoutError:
+            if (watcher is not None and watcher.stop_requested()) or loop.is_closed():
+                future.cancel()
+                print("Stopped waiting for the MTGA update re-apply, the server is shutting down")
+                return
+            if time.monotonic() > deadline:
+                future.cancel()
+                raise TimeoutError(f"Re-applying modifications took over {CLIENT_UPDATE_TIMEOUT_SECONDS} s")
+        except concurrent.futures.CancelledError:
+            print("MTGA update re-apply was cancelled")
+            return
+
+def start_update_watcher(loop: asyncio.AbstractEventLoop) -> None:
+    """Start watching the configured MTGA install (restarts the watcher if already running)."""
+    global update_watcher, server_loop
+    server_loop = loop
+    stop_update_watcher()
+    if watch_for_updates and current_db_path and os.path.exists(current_db_path):
+        watcher = UpdateWatcher(
+            current_db_path,
+            lambda update: on_client_update(update, watcher),
+            poll_interval=update_poll_seconds,
+        )
+        update_watcher = watcher
+        watcher.start()
+
+def stop_update_watcher() -> None:
+    global update_watcher
+    if update_watcher is not None:
+        update_watcher.stop()
+        update_watcher = None
+
+def storage_stats(database_path: Optional[str]) -> dict:
+    """Statistics that read SQLite files or the disk (run off the event loop)."""
+    return {
+        "tag_index": get_tag_index(database_path).stats() if database_path else None,
+        "backups": get_backup_store().stats(),
+        "snapshots": get_snapshot_store().stats(),
+    }
+
+@router.get("/system/stats")
+async def get_system_stats():
+    """Cache and worker statistics (image cache hits, decodes saved by coalescing)."""
+    storage = await run_io(storage_stats, current_db_path)
+    return {
+        "image_cache": await run_io(image_cache.stats),
+        "image_decodes": image_flights.stats(),
+        "card_queries": card_queries.stats(),
+        "workers": executors.get_settings(),
+        "database": database.stats() if database else None,
+        "card_index": get_card_index(current_db_path).stats() if current_db_path else None,
+        "tag_index": storage["tag_index"],
+        "backups": storage["backups"],
+        "update_watcher": update_watcher.stats() if update_watcher else None,
+        "snapshots": storage["snapshots"],
+        # Environments live in the bundle workers; only visible here in thread mode
+        "bundle_environments": (
+            environment_cache.stats() if executors.get_settings()["bundle_worker_mode"] == "thread" else None
+        ),
+    }
+
 class ConfigModel(BaseModel):
     database_path: Optional[str]
     save_path: Optional[str]
@@ -204,16 +573,10 @@ async def update_config(config: ConfigModel):
         clean_path = clean_path.replace(">", os.sep)
         
         current_data["DatabasePath"] = clean_path
-        current_db_path = clean_path
-        # Reset connection to force reconnect
-        global db_connection, db_cursor
-        if db_connection:
-            try:
-                db_connection.close()
-            except:
-                pass
-        db_connection = None
-        db_cursor = None
+        # Reset connections to force reconnect
+        await switch_database(clean_path)
+        if server_loop is not None:
+            start_update_watcher(server_loop)
         
     if config.save_path is not None:
         current_data["SavePath"] = config.save_path
@@ -226,137 +589,177 @@ async def update_config(config: ConfigModel):
         
     return {"status": "success", "config": current_data}
 
+@router.get("/cards/art-search")
+async def search_art_ids(name: str = Query(..., min_length=1)):
+    """Find the ArtIds of cards whose name contains `name` (pooled read, see InMemorySnapshot)."""
+    database = get_database()
+    if not database:
+        raise HTTPException(status_code=500, detail="Database not connected")
+    results = await database.read(
+        lambda connection: sql_editor.find_art_id_by_card_name(name, connection.cursor())
+    )
+    return [{"art_id": art_id, "name": card_name} for art_id, card_name in results]
+
+@router.get("/tokens/by-artist")
+async def search_tokens_by_artist(artist: str = Query(..., min_length=1)):
+    """List token ArtIds credited to an artist (pooled read, see InMemorySnapshot)."""
+    database = get_database()
+    if not database:
+        raise HTTPException(status_code=500, detail="Database not connected")
+    try:
+        results = await database.read(
+            lambda connection: sql_editor.get_tokens_by_artist(artist, connection.cursor())
+        )
+    except sqlite3.Error as e:
+        print(f"Token search error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return [{"artist": artist_credit, "art_id": art_id} for artist_credit, art_id in results]
+
 @router.get("/cards")
 async def get_cards(
     search: Optional[str] = None,
     limit: int = 100,
     offset: int = 0,
-    sort_by: str = "Name"
+    sort_by: str = "Name",
+    cursor: Optional[str] = None
 ):
-    cursor = get_db_connection()
-    if not cursor:
+    """
+    List cards one page at a time.
+
+    Pass the returned next_cursor as `cursor` to fetch the following page; deep pages
+    then cost the same as the first. `offset` is still honoured when no cursor is given.
+    """
+    database = get_database()
+    if not database:
         raise HTTPException(status_code=500, detail="Database not connected")
         
-    # DEBUG: Print table info
     try:
-        print("Cards Table Columns:", [row[1] for row in cursor.execute("PRAGMA table_info(Cards)").fetchall()])
-    except:
-        pass
+        card_index = get_card_index(current_db_path)
+        # The sidecar path changes whenever the card data does, including edits made outside the API
+        index_path = await run_io(card_index.ensure_built)
+        cache_key = (
+            str(index_path),
+            search or "",
+            SORT_COLUMNS.get(sort_by, "grp_id"),
+            limit,
+            0 if cursor else offset,
+            cursor,
+        )
+        cached = card_queries.get(cache_key)
+        if cached is not None:
+            return cached
+        generation = card_queries.generation
         
-    query = """
-        SELECT 
-            CASE 
-                WHEN NULLIF(c1.Order_Title, '') IS NOT NULL THEN c1.Order_Title
-                WHEN NULLIF(c1.Order_Title, '') IS NULL 
-                    AND NULLIF(c2.Order_Title, '') IS NOT NULL THEN c2.Order_Title || '-flip-side'
-            END AS Order_Title,
-            c1.ExpansionCode,
-            c1.ArtSize,
-            c1.GrpId,
-            c1.ArtId,
-            MAX(lko.Loc) AS KoreanName,
-            c1.IsDigitalOnly,
-            c1.IsRebalanced
-        FROM Cards c1
-        LEFT JOIN Cards c2
-            ON c1.LinkedFaceGrpIds = c2.GrpId
-        AND NULLIF(c2.Order_Title, '') IS NOT NULL
-        LEFT JOIN Localizations_koKR lko ON c1.TitleId = lko.LocId
-        WHERE (NULLIF(c1.Order_Title, '') IS NOT NULL
-        OR NULLIF(c2.Order_Title, '') IS NOT NULL)
-    """
-    
-    params = []
-    if search:
-        query += """
-            AND (
-                c1.Order_Title LIKE ? OR 
-                c2.Order_Title LIKE ? OR
-                c1.ExpansionCode LIKE ? OR 
-                c1.GrpId LIKE ? OR 
-                c1.ArtId LIKE ? OR
-                lko.Loc LIKE ?
+        try:
+            rows, next_cursor = await run_io(
+                card_index.list_cards, search, sort_by, limit, offset, cursor
             )
-        """
-        search_term = f"%{search}%"
-        # We now have 6 placeholders (added Korean localization)
-        params.extend([search_term, search_term, search_term, search_term, search_term, search_term])
-        
-    # Add grouping to ensure unique cards
-    query += " GROUP BY c1.GrpId, c1.ArtId"
-        
-    # Add sorting
-    # "Name", "Set", "ArtType", "GrpID", "ArtID"
-    if sort_by == "Name":
-        # Use the alias for sorting, which is allowed in ORDER BY
-        query += " ORDER BY Order_Title"
-    elif sort_by == "Set":
-        query += " ORDER BY c1.ExpansionCode"
-    elif sort_by == "GrpID":
-        query += " ORDER BY c1.GrpId"
-    elif sort_by == "ArtID":
-        query += " ORDER BY c1.ArtId"
-        
-    # Add pagination
-    query += f" LIMIT {limit} OFFSET {offset}"
-    
-    print(f"Executing query with params: {params}") # DEBUG LOG
-    
-    try:
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        print(f"Found {len(rows)} rows") # DEBUG LOG
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        total = await run_io(card_index.count_cards, search)
         
         cards = []
         for row in rows:
-            name = row[0]
-            set_code = row[1]
-            # Identify Alchemy cards using IsDigitalOnly or IsRebalanced columns
-            # row[6] is IsDigitalOnly, row[7] is IsRebalanced (1 or 0)
-            is_alchemy = bool(row[6]) or bool(row[7])
+            name, set_code, art_type, grp_id, art_id, korean_name, is_alchemy = row
             
             cards.append({
                 "name": name,
                 "set_code": set_code,
-                "art_type": str(row[2]),
-                "grp_id": str(row[3]),
-                "art_id": str(row[4]),
-                "korean_name": row[5] if len(row) > 5 and row[5] else None,
-                "is_alchemy": is_alchemy
+                "art_type": art_type,
+                "grp_id": str(grp_id),
+                "art_id": str(art_id),
+                "korean_name": korean_name or None,
+                "is_alchemy": bool(is_alchemy)
             })
             
-        return {"cards": cards, "count": len(cards)}
+        result = {"cards": cards, "count": len(cards), "total": total, "next_cursor": next_cursor}
+        card_queries.put(cache_key, result, generation)
+        return result
         
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Database error in get_cards: {e}") # DEBUG LOG
+        print(f"Database error in get_cards: {e}")
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
+async def render_card_image(
+    art_id: str,
+    width: Optional[int] = None,
+    height: Optional[int] = None,
+    fmt: str = "png",
+):
+    """
+    Render a card's main art, optionally resized and re-encoded, through the image cache.
+    Cache I/O runs on the I/O pool and decoding/encoding on the bundle pool.
+    Returns (bytes, media_type) or None if the card has no bundle/texture.
+    """
+    from src.unity_bundle import render_main_image
+    from src.bundle_index import asset_bundle_path_for_database, get_bundle_index
+    from src.image_utils import render_image_variant
+
+    bundle_index = get_bundle_index(asset_bundle_path_for_database(current_db_path))
+    bundle_path = await run_io(bundle_index.find_path, art_id)
+    if not bundle_path:
+        return None
+
+    is_variant = bool(width or height) or fmt != "png"
+    full_key = image_cache.make_key(bundle_path)
+    variant_key = image_cache.make_key(bundle_path, f"w{width or 0}h{height or 0}.{fmt}") if is_variant else full_key
+
+    # Serve previously encoded art without touching UnityPy
+    if variant_key:
+        cached_bytes = await run_io(image_cache.get, variant_key)
+        if cached_bytes is not None:
+            return cached_bytes, IMAGE_OUTPUT_FORMATS[fmt][1]
+
+    async def render_and_cache():
+        # Derive variants from the cached full-size PNG when we have it
+        rendered = None
+        if is_variant and full_key:
+            full_bytes = await run_io(image_cache.get, full_key)
+            if full_bytes is not None:
+                rendered = await run_bundle_job(render_image_variant, full_bytes, width, height, fmt)
+
+        if rendered is None:
+            # Never upscale: a missing bound is treated as unbounded
+            rendered = await run_bundle_job_for(str(bundle_path), render_main_image, str(bundle_path), width, height, fmt)
+            if rendered is None:
+                return None
+
+        if variant_key:
+            await run_io(image_cache.put, variant_key, rendered[0])
+        return rendered
+
+    # Concurrent requests for the same bundle variant share one decode
+    flight_key = variant_key or (str(bundle_path), width, height, fmt)
+    return await image_flights.run(flight_key, render_and_cache)
+
 @router.get("/cards/{art_id}/image")
-async def get_card_image(art_id: str):
-    # Create a dummy card object for the utility function
-    class DummyCard:
-        def __init__(self, art_id):
-            self.art_id = art_id
-            
-    card = DummyCard(art_id)
-    
-    # Use existing logic to get texture
-    # We need the DB path from config
+async def get_card_image(
+    art_id: str,
+    w: Optional[int] = Query(None, ge=16, le=4096),
+    h: Optional[int] = Query(None, ge=16, le=4096),
+    fmt: str = "png",
+):
+    """
+    Card art as an image. `w`/`h` bound the size (aspect ratio kept, never upscaled),
+    `fmt` selects png, jpeg or webp. Every variant is cached server-side.
+    """
     global current_db_path
     if not current_db_path:
         raise HTTPException(status_code=400, detail="Database not configured")
+    
+    fmt = fmt.lower()
+    if fmt not in IMAGE_OUTPUT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported image format: {fmt}")
         
     try:
-        from src.unity_bundle import get_card_texture_data, convert_texture_to_bytes
         from fastapi.responses import Response
         
-        result = get_card_texture_data(card, current_db_path)
-        if result:
-            processed_images, _ = result
-            if processed_images:
-                # Convert to bytes
-                img_bytes = convert_texture_to_bytes(processed_images[0])
-                return Response(content=img_bytes, media_type="image/png")
+        rendered = await render_card_image(art_id, w, h, fmt)
+        if rendered:
+            img_bytes, media_type = rendered
+            return Response(content=img_bytes, media_type=media_type)
                 
         return Response(status_code=404)
     except Exception as e:
@@ -382,46 +785,31 @@ async def swap_card_art(
             shutil.copyfileobj(file.file, buffer)
             
         # Use existing logic
-        from src.unity_bundle import get_card_texture_data, load_unity_bundle, extract_textures_from_bundle, replace_texture_in_bundle
-        
-        class DummyCard:
-            def __init__(self, art_id):
-                self.art_id = art_id
-        
-        card = DummyCard(art_id)
+        from src.unity_bundle import replace_main_texture
+        from src.bundle_index import asset_bundle_path_for_database, find_bundle_file
         
         # Get matching bundle file
-        # get_card_texture_data returns (images, textures, filename) if ret_matching=True
-        result = get_card_texture_data(card, current_db_path, ret_matching=True)
+        asset_bundle_dir = asset_bundle_path_for_database(current_db_path)
+        matching_file = await run_io(find_bundle_file, asset_bundle_dir, art_id)
         
-        if not result:
+        if not matching_file:
              raise HTTPException(status_code=404, detail="Card assets not found")
              
-        _, _, matching_file = result
-        
-        # Construct paths
-        db_parent = Path(current_db_path).parent
-        game_root = db_parent.parent
-        asset_bundle_dir = game_root / "AssetBundle"
         bundle_path = asset_bundle_dir / matching_file
         
-        # Load bundle
-        unity_env = load_unity_bundle(str(bundle_path))
+        # Back up the bundle before replacing its art (skipped if this content is already stored)
+        await run_io(get_backup_store().put, ORIGINAL, bundle_path)
         
-        # Get texture to replace (first one)
-        textures = extract_textures_from_bundle(unity_env)
-        if not textures:
+        # Replace the main art (picked from texture headers) and save the bundle
+        # Same worker as the view path, so a bundle that was just viewed is not reloaded
+        replaced = await run_bundle_job_for(str(bundle_path), replace_main_texture, str(bundle_path), os.path.abspath(temp_path))
+        if not replaced:
             raise HTTPException(status_code=404, detail="No textures found in bundle")
-            
-        target_texture = textures[0]
-        
-        # Create backup
-        backup_dir = Path.home() / "MTGA_Swapper_Backups"
-        backup_dir.mkdir(exist_ok=True)
-        shutil.copy(bundle_path, backup_dir / f"BACKUP_{matching_file}")
-        
-        # Replace
-        replace_texture_in_bundle(target_texture, temp_path, str(bundle_path), unity_env)
+        image_cache.invalidate_bundle(matching_file)
+        card_queries.invalidate()
+        # Record the modified bundle so preset restores and the update watcher re-apply it
+        await run_io(get_backup_store().put, MOD, bundle_path)
+        await run_io(get_backup_store().prune)
         
         return {"status": "success", "message": "Art swapped successfully"}
         
@@ -434,13 +822,13 @@ async def swap_card_art(
 
 @router.post("/cards/{grp_id}/style/unlock")
 async def unlock_card_style(grp_id: str):
-    global current_db_path, db_connection, db_cursor
+    global current_db_path
     
     if not current_db_path:
         raise HTTPException(status_code=400, detail="Database not configured")
         
-    cursor = get_db_connection()
-    if not cursor:
+    database = get_database()
+    if not database:
         raise HTTPException(status_code=500, detail="Database not connected")
         
     try:
@@ -456,19 +844,14 @@ async def unlock_card_style(grp_id: str):
         # We also need asset_bundle_path for logging
         asset_bundle_path = str(Path(current_db_path).parent.parent / "AssetBundle")
         
-        # Ensure backup directory exists (required by save_grp_id_info called within unlock_parallax_style)
-        backup_dir = Path.home() / "MTGA_Swapper_Backups"
-        backup_dir.mkdir(exist_ok=True)
-        
-        success = sql_editor.unlock_parallax_style(
-            [grp_id], 
-            cursor, 
-            db_connection, 
+        targets, _ = await database.write(
+            style_engine.unlock_parallax,
             str(user_save_changes_path),
-            asset_bundle_path
+            asset_bundle_path,
+            [grp_id]
         )
         
-        if success:
+        if targets:
             return {"status": "success", "message": "Parallax style unlocked successfully"}
         else:
             raise HTTPException(status_code=500, detail="Failed to unlock style")
@@ -477,488 +860,232 @@ async def unlock_card_style(grp_id: str):
         print(f"Unlock error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/cards/style/unlock-batch")
-async def unlock_batch_card_style(search: Optional[str] = None):
-    global current_db_path, db_connection, db_cursor
-    
+def prepare_change_log() -> Tuple[str, str]:
+    """
+    Make sure changes.json exists (save_grp_id_info records into its journal).
+
+    Returns:
+        Tuple of (changes.json path, AssetBundle directory)
+    """
+    user_save_changes_path = USER_CONFIG_DIR / "changes.json"
+    if not user_save_changes_path.exists():
+        with open(user_save_changes_path, "w") as f:
+            json.dump({}, f)
+    asset_bundle_path = str(Path(current_db_path).parent.parent / "AssetBundle")
+    return str(user_save_changes_path), asset_bundle_path
+
+async def resolve_style_rule(rule: StyleRule) -> List[int]:
+    """Resolve a rule to the GrpIds it would change (index lookups run off the event loop)."""
+    card_index = get_card_index(current_db_path)
+    if rule.uses_card_index():
+        await run_io(card_index.ensure_built)
+    return await run_io(resolve_targets, rule, get_tag_index(current_db_path), card_index)
+
+def style_rule_response(changed: int, done_message: str, empty_message: str) -> dict:
+    """Response body of the non-streaming bulk style endpoints."""
+    if changed == 0:
+        return {"status": "success", "message": empty_message, "count": 0}
+    return {"status": "success", "message": done_message.format(count=changed), "count": changed}
+
+async def run_style_rule(rule: StyleRule, done_message: str, empty_message: str) -> dict:
+    """Resolve and apply a rule as one writer job; shared by the bulk style endpoints."""
     if not current_db_path:
         raise HTTPException(status_code=400, detail="Database not configured")
-        
-    cursor = get_db_connection()
-    if not cursor:
+    database = get_database()
+    if not database:
         raise HTTPException(status_code=500, detail="Database not connected")
-        
-    # 1. Find cards matching search criteria (reuse get_cards logic)
-    query = """
-        SELECT c1.GrpId, c1.Order_Title
-        FROM Cards c1
-        LEFT JOIN Cards c2
-            ON c1.LinkedFaceGrpIds = c2.GrpId
-        AND NULLIF(c2.Order_Title, '') IS NOT NULL
-        WHERE (NULLIF(c1.Order_Title, '') IS NOT NULL
-        OR NULLIF(c2.Order_Title, '') IS NOT NULL)
-    """
-    
-    params = []
-    if search:
-        query += """
-            AND (
-                c1.Order_Title LIKE ? OR 
-                c2.Order_Title LIKE ? OR
-                c1.ExpansionCode LIKE ? OR 
-                c1.GrpId LIKE ? OR 
-                c1.ArtId LIKE ?
-            )
-        """
-        search_term = f"%{search}%"
-        params.extend([search_term, search_term, search_term, search_term, search_term])
-    
     try:
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        
-        # Filter out basic lands
-        basic_lands = ["island", "forest", "mountain", "plains", "wastes", "swamp"]
-        target_grp_ids = []
-        
-        for row in rows:
-            grp_id = str(row[0])
-            name = str(row[1]).lower()
-            
-            # Check if name starts with any basic land name
-            is_basic_land = any(name.startswith(land) for land in basic_lands)
-            
-            if not is_basic_land:
-                target_grp_ids.append(grp_id)
-                
+        target_grp_ids = await resolve_style_rule(rule)
         if not target_grp_ids:
-             return {"status": "success", "message": "No eligible cards found to unlock", "count": 0}
-
-        # 2. Unlock styles for filtered cards
-        user_save_changes_path = USER_CONFIG_DIR / "changes.json"
-        if not user_save_changes_path.exists():
-            with open(user_save_changes_path, "w") as f:
-                json.dump({}, f)
-                
-        asset_bundle_path = str(Path(current_db_path).parent.parent / "AssetBundle")
-        
-        backup_dir = Path.home() / "MTGA_Swapper_Backups"
-        backup_dir.mkdir(exist_ok=True)
-        
-        # Process in chunks to avoid SQLite variable limit (usually 999)
-        # and to prevent massive print outputs from unlock_parallax_style
-        chunk_size = 900
-        total_processed = 0
-        failed_chunks = 0
-        
-        for i in range(0, len(target_grp_ids), chunk_size):
-            chunk = target_grp_ids[i:i + chunk_size]
-            try:
-                success = sql_editor.unlock_parallax_style(
-                    chunk, 
-                    cursor, 
-                    db_connection, 
-                    str(user_save_changes_path),
-                    asset_bundle_path
-                )
-                if success:
-                    total_processed += len(chunk)
-                else:
-                    print(f"Failed to unlock chunk {i//chunk_size}")
-                    failed_chunks += 1
-            except Exception as e:
-                print(f"Error unlocking chunk {i//chunk_size}: {e}")
-                failed_chunks += 1
-        
-        if total_processed > 0:
-            msg = f"Unlocked styles for {total_processed} cards."
-            if failed_chunks > 0:
-                msg += f" (Failed to process {failed_chunks} batches)"
-            return {
-                "status": "success", 
-                "message": msg, 
-                "count": total_processed
-            }
-        else:
-            raise HTTPException(status_code=500, detail="Failed to unlock styles (all batches failed)")
-            
+            return style_rule_response(0, done_message, empty_message)
+        changes_path, asset_bundle_path = prepare_change_log()
+        _, changed = await database.write(
+            bulk_write_job(apply_rule, f"{rule.action}-tag-{rule.tag}"),
+            rule,
+            target_grp_ids,
+            changes_path,
+            asset_bundle_path,
+        )
+        print(f"Style rule {rule.describe()}: {changed} of {len(target_grp_ids)} cards changed")
+        return style_rule_response(changed, done_message, empty_message)
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Batch unlock error: {e}")
+        print(f"Style rule error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/cards/style/unlock-batch-stream")
-async def unlock_batch_card_style_stream(search: Optional[str] = None):
-    """
-    SSE endpoint for batch unlock with real-time progress updates
-    """
-    from fastapi.responses import StreamingResponse
-    import asyncio
-    
+def stream_style_rule(rule: StyleRule, done_message: str, empty_message: str) -> StreamingResponse:
+    """SSE variant of run_style_rule (progress, then complete or error)."""
     async def generate_progress():
-        global current_db_path, db_connection, db_cursor
-        
         try:
             if not current_db_path:
                 yield f"data: {json.dumps({'type': 'error', 'message': 'Database not configured'})}\n\n"
                 return
-                
-            cursor = get_db_connection()
-            if not cursor:
+
+            database = get_database()
+            if not database:
                 yield f"data: {json.dumps({'type': 'error', 'message': 'Database not connected'})}\n\n"
                 return
-            
-            # Find cards matching search criteria
-            query = """
-                SELECT c1.GrpId, c1.Order_Title
-                FROM Cards c1
-                LEFT JOIN Cards c2
-                    ON c1.LinkedFaceGrpIds = c2.GrpId
-                AND NULLIF(c2.Order_Title, '') IS NOT NULL
-                WHERE (NULLIF(c1.Order_Title, '') IS NOT NULL
-                OR NULLIF(c2.Order_Title, '') IS NOT NULL)
-            """
-            
-            params = []
-            if search:
-                query += """
-                    AND (
-                        c1.Order_Title LIKE ? OR 
-                        c2.Order_Title LIKE ? OR
-                        c1.ExpansionCode LIKE ? OR 
-                        c1.GrpId LIKE ? OR 
-                        c1.ArtId LIKE ?
-                    )
-                """
-                search_term = f"%{search}%"
-                params.extend([search_term, search_term, search_term, search_term, search_term])
-            
-            cursor.execute(query, params)
-            rows = cursor.fetchall()
-            
-            # Filter out basic lands
-            basic_lands = ["island", "forest", "mountain", "plains", "wastes", "swamp"]
-            target_grp_ids = []
-            
-            for row in rows:
-                grp_id = str(row[0])
-                name = str(row[1]).lower()
-                is_basic_land = any(name.startswith(land) for land in basic_lands)
-                if not is_basic_land:
-                    target_grp_ids.append(grp_id)
-            
-            total_cards = len(target_grp_ids)
-            
-            if total_cards == 0:
-                yield f"data: {json.dumps({'type': 'complete', 'total': 0, 'message': 'No eligible cards found to unlock'})}\n\n"
+
+            target_grp_ids = await resolve_style_rule(rule)
+            if not target_grp_ids:
+                yield f"data: {json.dumps({'type': 'complete', 'total': 0, 'message': empty_message})}\n\n"
                 return
-            
-            # Send initial progress
-            yield f"data: {json.dumps({'type': 'progress', 'current': 0, 'total': total_cards, 'message': 'Starting...'})}\n\n"
-            await asyncio.sleep(0)  # Allow event to be sent
-            
-            # Setup paths
-            user_save_changes_path = USER_CONFIG_DIR / "changes.json"
-            if not user_save_changes_path.exists():
-                with open(user_save_changes_path, "w") as f:
-                    json.dump({}, f)
-            
-            asset_bundle_path = str(Path(current_db_path).parent.parent / "AssetBundle")
-            backup_dir = Path.home() / "MTGA_Swapper_Backups"
-            backup_dir.mkdir(exist_ok=True)
-            
-            # Process in chunks
-            chunk_size = 100
-            total_processed = 0
-            failed_chunks = 0
-            
-            for i in range(0, len(target_grp_ids), chunk_size):
-                chunk = target_grp_ids[i:i + chunk_size]
-                try:
-                    success = sql_editor.unlock_parallax_style(
-                        chunk, 
-                        cursor, 
-                        db_connection, 
-                        str(user_save_changes_path),
-                        asset_bundle_path
-                    )
-                    if success:
-                        total_processed += len(chunk)
-                    else:
-                        failed_chunks += 1
-                    
-                    # Send progress update
-                    progress_pct = int((total_processed / total_cards) * 100)
-                    yield f"data: {json.dumps({'type': 'progress', 'current': total_processed, 'total': total_cards, 'percentage': progress_pct, 'message': f'Processing... {total_processed}/{total_cards}'})}\n\n"
-                    await asyncio.sleep(0)  # Allow event to be sent
-                    
-                except Exception as e:
-                    print(f"Error unlocking chunk {i//chunk_size}: {e}")
-                    failed_chunks += 1
-            
-            # Send completion
-            if total_processed > 0:
-                msg = f"Unlocked styles for {total_processed} cards."
-                if failed_chunks > 0:
-                    msg += f" (Failed to process {failed_chunks} batches)"
-                yield f"data: {json.dumps({'type': 'complete', 'total': total_processed, 'message': msg})}\n\n"
-            else:
-                yield f"data: {json.dumps({'type': 'error', 'message': 'Failed to unlock styles (all batches failed)'})}\n\n"
-                
-        except Exception as e:
-            print(f"SSE Batch unlock error: {e}")
-            yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
-    
-    return StreamingResponse(generate_progress(), media_type="text/event-stream")
 
+            yield f"data: {json.dumps({'type': 'progress', 'current': 0, 'total': len(target_grp_ids), 'message': 'Starting...'})}\n\n"
+            changes_path, asset_bundle_path = prepare_change_log()
+
+            def describe_result(result):
+                _, changed = result
+                print(f"Style rule {rule.describe()}: {changed} of {len(target_grp_ids)} cards changed")
+                if changed == 0:
+                    return 0, empty_message
+                return changed, done_message.format(count=changed)
+
+            async for event in stream_write_job(
+                database,
+                describe_result,
+                bulk_write_job(apply_rule, f"{rule.action}-tag-{rule.tag}"),
+                rule,
+                target_grp_ids,
+                changes_path,
+                asset_bundle_path,
+            ):
+                yield event
 
-@router.get("/cards/style/reset-tokens-stream")
-async def reset_token_styles_stream():
-    """SSE endpoint for resetting token card styles with progress"""
-    global current_db_path, db_connection, db_cursor
-    
-    async def generate_progress():
-        try:
-            if not current_db_path:
-                yield f"data: {json.dumps({'type': 'error', 'message': 'Database not configured'})}\n\n"
-                return
-                
-            cursor = get_db_connection()
-            if not cursor:
-                yield f"data: {json.dumps({'type': 'error', 'message': 'Failed to connect to database'})}\n\n"
-                return
-            
-            # Get all token cards
-            cursor.execute("SELECT GrpId FROM Cards WHERE IsToken = 1")
-            target_grp_ids = [row[0] for row in cursor.fetchall()]
-            total_cards = len(target_grp_ids)
-            
-            if total_cards == 0:
-                yield f"data: {json.dumps({'type': 'complete', 'total': 0, 'message': 'No token cards found'})}\n\n"
-                return
-            
-            # Process in chunks
-            chunk_size = 100
-            total_processed = 0
-            failed_chunks = 0
-            
-            for i in range(0, len(target_grp_ids), chunk_size):
-                chunk = target_grp_ids[i:i + chunk_size]
-                try:
-                    placeholders = ','.join('?' * len(chunk))
-                    update_query = f"""
-                        UPDATE Cards
-                        SET tags = CASE
-                            WHEN tags = ',1696804317,' THEN ',,'
-                            WHEN tags LIKE ',1696804317,%' THEN REPLACE(tags, ',1696804317,', ',')
-                            WHEN tags LIKE '%,1696804317,' THEN REPLACE(tags, ',1696804317,', ',')
-                            ELSE tags
-                        END
-                        WHERE GrpId IN ({placeholders})
-                        AND tags LIKE '%1696804317%'
-                    """
-                    cursor.execute(update_query, chunk)
-                    db_connection.commit()
-                    rows_affected = cursor.rowcount
-                    total_processed += rows_affected
-                    
-                    # Send progress update
-                    progress_pct = round((total_processed / total_cards) * 100, 1)
-                    yield f"data: {json.dumps({'type': 'progress', 'current': total_processed, 'total': total_cards, 'percentage': progress_pct, 'message': f'Processing... {total_processed}/{total_cards}'})}\n\n"
-                    await asyncio.sleep(0)
-                    
-                except Exception as e:
-                    print(f"Chunk processing error: {e}")
-                    failed_chunks += 1
-            
-            # Send completion
-            if total_processed > 0:
-                msg = f"Reset styles for {total_processed} token cards."
-                if failed_chunks > 0:
-                    msg += f" (Failed to process {failed_chunks} batches)"
-                yield f"data: {json.dumps({'type': 'complete', 'total': total_processed, 'message': msg})}\n\n"
-            else:
-                yield f"data: {json.dumps({'type': 'complete', 'total': 0, 'message': 'No token cards needed resetting (already clean).'})}\n\n"
-                
         except Exception as e:
-            print(f"SSE Reset tokens error: {e}")
+            print(f"SSE style rule error: {e}")
             yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
-    
+
     return StreamingResponse(generate_progress(), media_type="text/event-stream")
 
+class StyleRuleModel(BaseModel):
+    action: str
+    tag: str = style_engine.PARALLAX_TAG
+    is_token: Optional[bool] = None
+    subtypes: List[str] = []
+    mono_colored: Optional[bool] = None
+    name_prefix: Optional[str] = None
+    set_code: Optional[str] = None
+    search: Optional[str] = None
+    exclude_basic_lands: bool = False
 
+    def to_rule(self) -> StyleRule:
+        try:
+            return StyleRule(
+                self.action,
+                tag=self.tag,
+                is_token=self.is_token,
+                subtypes=self.subtypes,
+                mono_colored=self.mono_colored,
+                name_prefix=self.name_prefix,
+                set_code=self.set_code,
+                search=self.search,
+                exclude_basic_lands=self.exclude_basic_lands,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
-@router.post("/cards/style/unlock-tokens")
-async def unlock_token_styles():
-    global current_db_path, db_connection, db_cursor
-    
+@router.post("/styles/rules/preview")
+async def preview_style_rule(rule: StyleRuleModel):
+    """Dry run: count (and sample) the cards a rule would change, without writing."""
     if not current_db_path:
         raise HTTPException(status_code=400, detail="Database not configured")
-        
-    cursor = get_db_connection()
-    if not cursor:
-        raise HTTPException(status_code=500, detail="Database not connected")
-        
-    # Find all token cards (IsToken = 1)
-    query = """
-        SELECT GrpId
-        FROM Cards
-        WHERE IsToken = 1
+    style_rule = rule.to_rule()
+    target_grp_ids = await resolve_style_rule(style_rule)
+    return {
+        "rule": style_rule.describe(),
+        "count": len(target_grp_ids),
+        "sample": target_grp_ids[:50],
+    }
+
+@router.post("/styles/rules/apply")
+async def apply_style_rule(rule: StyleRuleModel):
+    """Apply a style rule as one UPDATE."""
+    return await run_style_rule(
+        rule.to_rule(), "Updated styles for {count} cards.", "No cards needed changing."
+    )
+
+@router.get("/styles/rules/apply-stream")
+async def apply_style_rule_stream(
+    action: str,
+    tag: str = style_engine.PARALLAX_TAG,
+    is_token: Optional[bool] = None,
+    subtypes: List[str] = Query(default=[]),
+    mono_colored: Optional[bool] = None,
+    name_prefix: Optional[str] = None,
+    set_code: Optional[str] = None,
+    search: Optional[str] = None,
+    exclude_basic_lands: bool = False,
+):
+    """SSE variant of /styles/rules/apply (EventSource can only send GET query parameters)."""
+    rule = StyleRuleModel(
+        action=action,
+        tag=tag,
+        is_token=is_token,
+        subtypes=subtypes,
+        mono_colored=mono_colored,
+        name_prefix=name_prefix,
+        set_code=set_code,
+        search=search,
+        exclude_basic_lands=exclude_basic_lands,
+    ).to_rule()
+    return stream_style_rule(rule, "Updated styles for {count} cards.", "No cards needed changing.")
+
+# The fixed bulk style operations are predefined rules
+def unlock_search_rule(search: Optional[str]) -> StyleRule:
+    """Parallax for every listed card matching a search (basic lands excluded)."""
+    return StyleRule("add", search=search, exclude_basic_lands=True)
+
+TOKEN_UNLOCK_RULE = StyleRule("add", is_token=True)
+TOKEN_RESET_RULE = StyleRule("remove", is_token=True)
+ALL_PARALLAX_RESET_RULE = StyleRule("remove")
+# Mono-coloured vehicles (SubType 331) with parallax render their rules text in black
+COLORED_VEHICLE_RESET_RULE = StyleRule("remove", subtypes=["331"], mono_colored=True)
+
+@router.post("/cards/style/unlock-batch")
+async def unlock_batch_card_style(search: Optional[str] = None):
+    return await run_style_rule(
+        unlock_search_rule(search),
+        "Unlocked styles for {count} cards.",
+        "No eligible cards found to unlock",
+    )
+
+@router.get("/cards/style/unlock-batch-stream")
+async def unlock_batch_card_style_stream(search: Optional[str] = None):
     """
-    
-    try:
-        cursor.execute(query)
-        rows = cursor.fetchall()
-        
-        target_grp_ids = [str(row[0]) for row in rows]
-                
-        if not target_grp_ids:
-             return {"status": "success", "message": "No token cards found", "count": 0}
+    SSE endpoint for batch unlock with real-time progress updates
+    """
+    return stream_style_rule(
+        unlock_search_rule(search),
+        "Unlocked styles for {count} cards.",
+        "No eligible cards found to unlock",
+    )
 
-        # Unlock styles for token cards
-        user_save_changes_path = USER_CONFIG_DIR / "changes.json"
-        if not user_save_changes_path.exists():
-            with open(user_save_changes_path, "w") as f:
-                json.dump({}, f)
-                
-        asset_bundle_path = str(Path(current_db_path).parent.parent / "AssetBundle")
-        
-        backup_dir = Path.home() / "MTGA_Swapper_Backups"
-        backup_dir.mkdir(exist_ok=True)
-        
-        # Process in chunks to avoid SQLite variable limit (usually 999)
-        # and to prevent massive print outputs from unlock_parallax_style
-        chunk_size = 900
-        total_processed = 0
-        failed_chunks = 0
-        
-        for i in range(0, len(target_grp_ids), chunk_size):
-            chunk = target_grp_ids[i:i + chunk_size]
-            try:
-                success = sql_editor.unlock_parallax_style(
-                    chunk, 
-                    cursor, 
-                    db_connection, 
-                    str(user_save_changes_path),
-                    asset_bundle_path
-                )
-                if success:
-                    total_processed += len(chunk)
-                else:
-                    print(f"Failed to unlock token chunk {i//chunk_size}")
-                    failed_chunks += 1
-            except Exception as e:
-                print(f"Error unlocking token chunk {i//chunk_size}: {e}")
-                failed_chunks += 1
-        
-        if total_processed > 0:
-            msg = f"Unlocked Parallax for {total_processed} token cards."
-            if failed_chunks > 0:
-                msg += f" (Failed to process {failed_chunks} batches)"
-            return {
-                "status": "success", 
-                "message": msg, 
-                "count": total_processed
-            }
-        else:
-            raise HTTPException(status_code=500, detail="Failed to unlock token styles (all batches failed)")
-            
-    except Exception as e:
-        print(f"Token unlock error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+@router.get("/cards/style/reset-tokens-stream")
+async def reset_token_styles_stream():
+    """SSE endpoint for resetting token card styles with progress"""
+    return stream_style_rule(
+        TOKEN_RESET_RULE,
+        "Reset styles for {count} token cards.",
+        "No token cards needed resetting (already clean).",
+    )
+
+@router.post("/cards/style/unlock-tokens")
+async def unlock_token_styles():
+    return await run_style_rule(
+        TOKEN_UNLOCK_RULE,
+        "Unlocked Parallax for {count} token cards.",
+        "No token cards needed unlocking.",
+    )
 
 @router.post("/cards/style/reset-tokens")
 async def reset_token_styles():
-    global current_db_path, db_connection, db_cursor
-    
-    if not current_db_path:
-        raise HTTPException(status_code=400, detail="Database not configured")
-        
-    cursor = get_db_connection()
-    if not cursor:
-        raise HTTPException(status_code=500, detail="Database not connected")
-        
-    try:
-        # First, get total count of all tokens for debugging
-        cursor.execute("SELECT COUNT(*) FROM Cards WHERE IsToken = 1")
-        total_tokens = cursor.fetchone()[0]
-        print(f"Total tokens in database: {total_tokens}")
-        
-        # Find all token cards with parallax style (IsToken = 1 AND tags contains '1696804317')
-        query = """
-            SELECT GrpId, tags
-            FROM Cards
-            WHERE IsToken = 1 
-            AND tags LIKE '%1696804317%'
-        """
-        
-        cursor.execute(query)
-        rows = cursor.fetchall()
-        
-        print(f"Found {len(rows)} tokens with parallax style")
-        
-        if not rows:
-            return {
-                "status": "success", 
-                "message": f"No token cards with parallax style found. (Total tokens in DB: {total_tokens})", 
-                "count": 0
-            }
-        
-        target_grp_ids = [str(row[0]) for row in rows]
-        
-        # Reset the parallax style tag for token cards
-        # Remove '1696804317' tag from the tags field
-        chunk_size = 900
-        total_processed = 0
-        failed_chunks = 0
-        
-        for i in range(0, len(target_grp_ids), chunk_size):
-            chunk = target_grp_ids[i:i + chunk_size]
-            try:
-                # Build SQL to remove the parallax tag
-                placeholders = ','.join(['?'] * len(chunk))
-                update_query = f"""
-                    UPDATE Cards
-                    SET tags = CASE
-                        WHEN tags = '1696804317' THEN ''
-                        WHEN tags LIKE '1696804317,%' THEN SUBSTR(tags, LENGTH('1696804317,') + 1)
-                        WHEN tags LIKE '%,1696804317' THEN SUBSTR(tags, 1, LENGTH(tags) - LENGTH(',1696804317'))
-                        WHEN tags LIKE '%,1696804317,%' THEN REPLACE(tags, ',1696804317,', ',')
-                        ELSE tags
-                    END
-                    WHERE GrpId IN ({placeholders})
-                    AND tags LIKE '%1696804317%'
-                """
-                
-                cursor.execute(update_query, chunk)
-                db_connection.commit()
-                
-                rows_affected = cursor.rowcount
-                print(f"Chunk {i//chunk_size}: {rows_affected} rows updated")
-                total_processed += rows_affected
-                
-            except Exception as e:
-                print(f"Error resetting token chunk {i//chunk_size}: {e}")
-                failed_chunks += 1
-        
-        if total_processed > 0:
-            msg = f"Reset Parallax for {total_processed} token cards."
-            if failed_chunks > 0:
-                msg += f" (Failed to process {failed_chunks} batches)"
-            return {
-                "status": "success", 
-                "message": msg, 
-                "count": total_processed
-            }
-        else:
-            return {
-                "status": "success", 
-                "message": f"No changes made. Found {len(target_grp_ids)} tokens with parallax but none were updated.", 
-                "count": 0
-            }
-            
-    except Exception as e:
-        print(f"Token reset error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    return await run_style_rule(
+        TOKEN_RESET_RULE,
+        "Reset Parallax for {count} token cards.",
+        "No token cards with parallax style found.",
+    )
 
 @router.post("/cards/style/reset-all-parallax")
 async def reset_all_parallax_styles():
@@ -966,83 +1093,11 @@ async def reset_all_parallax_styles():
     Reset parallax style for ALL cards in the database.
     This removes the parallax tag (1696804317) from every card.
     """
-    global current_db_path, db_connection, db_cursor
-    
-    if not current_db_path:
-        raise HTTPException(status_code=400, detail="Database not configured")
-        
-    cursor = get_db_connection()
-    if not cursor:
-        raise HTTPException(status_code=500, detail="Database not connected")
-        
-    try:
-        # Find all cards with parallax style
-        query = """
-            SELECT GrpId, tags
-            FROM Cards
-            WHERE tags LIKE '%1696804317%'
-        """
-        
-        cursor.execute(query)
-        rows = cursor.fetchall()
-        
-        print(f"Found {len(rows)} cards with parallax style")
-        
-        if not rows:
-            return {
-                "status": "success", 
-                "message": "No cards with parallax style found.", 
-                "count": 0
-            }
-        
-        target_grp_ids = [str(row[0]) for row in rows]
-        
-        # Reset the parallax style tag for all cards
-        chunk_size = 900
-        total_processed = 0
-        failed_chunks = 0
-        
-        for i in range(0, len(target_grp_ids), chunk_size):
-            chunk = target_grp_ids[i:i + chunk_size]
-            try:
-                placeholders = ','.join(['?'] * len(chunk))
-                update_query = f"""
-                    UPDATE Cards
-                    SET tags = CASE
-                        WHEN tags = '1696804317' THEN ''
-                        WHEN tags LIKE '1696804317,%' THEN SUBSTR(tags, LENGTH('1696804317,') + 1)
-                        WHEN tags LIKE '%,1696804317' THEN SUBSTR(tags, 1, LENGTH(tags) - LENGTH(',1696804317'))
-                        ELSE REPLACE(tags, ',1696804317,', ',')
-                    END
-                    WHERE GrpId IN ({placeholders})
-                """
-                
-                cursor.execute(update_query, chunk)
-                db_connection.commit()
-                total_processed += len(chunk)
-                print(f"Processed chunk {i//chunk_size + 1}: {len(chunk)} cards")
-            except Exception as chunk_error:
-                print(f"Error processing chunk {i//chunk_size + 1}: {chunk_error}")
-                failed_chunks += 1
-                continue
-        
-        if total_processed > 0:
-            return {
-                "status": "success",
-                "message": f"Successfully reset parallax style for {total_processed} cards. Failed chunks: {failed_chunks}",
-                "count": total_processed
-            }
-        else:
-            return {
-                "status": "success", 
-                "message": f"No changes made. Found {len(target_grp_ids)} cards with parallax but none were updated.", 
-                "count": 0
-            }
-            
-    except Exception as e:
-        print(f"Reset all parallax error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
-
+    return await run_style_rule(
+        ALL_PARALLAX_RESET_RULE,
+        "Successfully reset parallax style for {count} cards.",
+        "No cards with parallax style found.",
+    )
 
 @router.post("/cards/style/reset-colored-vehicles")
 async def reset_colored_vehicle_styles():
@@ -1051,269 +1106,77 @@ async def reset_colored_vehicle_styles():
     
     Colored mono-colored vehicles with parallax have a rendering bug
     where rules text displays in black instead of white.
-    
-    Criteria:
-    - SubTypes contains '331' (Vehicle)
-    - Colors is not empty (has color)
-    - Colors doesn't contain comma (mono-colored, not multicolor)
-    - tags contains '1696804317' (has parallax)
     """
-    global current_db_path, db_connection, db_cursor
-    
-    if not current_db_path:
-        raise HTTPException(status_code=400, detail="Database not configured")
-        
-    cursor = get_db_connection()
-    if not cursor:
-        raise HTTPException(status_code=500, detail="Database not connected")
-        
-    try:
-        # First, get total count of all vehicles for debugging
-        cursor.execute("""
-            SELECT COUNT(*) FROM Cards 
-            WHERE SubTypes LIKE '%331%'
-        """)
-        total_vehicles = cursor.fetchone()[0]
-        print(f"Total vehicles in database: {total_vehicles}")
-        
-        # Find colored mono-colored vehicles with parallax
-        # Colorless vehicles have Colors = NULL or ''
-        # Multicolor vehicles have ',' in Colors (e.g., "3,4")
-        query = """
-            SELECT GrpId, Order_Title, Colors, tags
-            FROM Cards
-            WHERE SubTypes LIKE '%331%'
-            AND tags LIKE '%1696804317%'
-            AND Colors IS NOT NULL
-            AND Colors != ''
-            AND Colors NOT LIKE '%,%'
-        """
-        
-        cursor.execute(query)
-        rows = cursor.fetchall()
-        
-        print(f"Found {len(rows)} colored mono-colored vehicles with parallax")
-        
-        if not rows:
-            return {
-                "status": "success", 
-                "message": f"No colored mono-colored vehicles with parallax found. (Total vehicles: {total_vehicles})", 
-                "count": 0
-            }
-        
-        target_grp_ids = [str(row[0]) for row in rows]
-        
-        # Reset the parallax style tag
-        chunk_size = 900
-        total_processed = 0
-        failed_chunks = 0
-        
-        for i in range(0, len(target_grp_ids), chunk_size):
-            chunk = target_grp_ids[i:i + chunk_size]
-            try:
-                # Build SQL to remove the parallax tag
-                placeholders = ','.join(['?'] * len(chunk))
-                update_query = f"""
-                    UPDATE Cards
-                    SET tags = CASE
-                        WHEN tags = '1696804317' THEN ''
-                        WHEN tags LIKE '1696804317,%' THEN SUBSTR(tags, LENGTH('1696804317,') + 1)
-                        WHEN tags LIKE '%,1696804317' THEN SUBSTR(tags, 1, LENGTH(tags) - LENGTH(',1696804317'))
-                        WHEN tags LIKE '%,1696804317,%' THEN REPLACE(tags, ',1696804317,', ',')
-                        ELSE tags
-                    END
-                    WHERE GrpId IN ({placeholders})
-                    AND tags LIKE '%1696804317%'
-                """
-                
-                cursor.execute(update_query, chunk)
-                db_connection.commit()
-                
-                rows_affected = cursor.rowcount
-                print(f"Chunk {i//chunk_size}: {rows_affected} rows updated")
-                total_processed += rows_affected
-                
-            except Exception as e:
-                print(f"Error resetting colored vehicle chunk {i//chunk_size}: {e}")
-                failed_chunks += 1
-        
-        if total_processed > 0:
-            msg = f"Reset Parallax for {total_processed} colored mono-colored vehicle cards (fixes black text bug)."
-            if failed_chunks > 0:
-                msg += f" (Failed to process {failed_chunks} batches)"
-            return {
-                "status": "success", 
-                "message": msg, 
-                "count": total_processed
-            }
-        else:
-            return {
-                "status": "success", 
-                "message": f"No changes made. Found {len(target_grp_ids)} colored vehicles with parallax but none were updated.", 
-                "count": 0
-            }
-            
-    except Exception as e:
-        print(f"Colored vehicle reset error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
-
+    return await run_style_rule(
+        COLORED_VEHICLE_RESET_RULE,
+        "Reset Parallax for {count} colored mono-colored vehicle cards (fixes black text bug).",
+        "No colored mono-colored vehicles with parallax found.",
+    )
 
 @router.get("/cards/style/reset-colored-vehicles-stream")
 async def reset_colored_vehicle_styles_stream():
     """SSE endpoint for resetting colored vehicle card styles with progress"""
-    global current_db_path, db_connection, db_cursor
-    
-    async def generate_progress():
-        try:
-            if not current_db_path:
-                yield f"data: {json.dumps({'type': 'error', 'message': 'Database not configured'})}\n\n"
-                return
-                
-            cursor = get_db_connection()
-            if not cursor:
-                yield f"data: {json.dumps({'type': 'error', 'message': 'Failed to connect to database'})}\n\n"
-                return
-            
-            # Get all mono-colored vehicles with parallax style
-            query = """
-                SELECT GrpId
-                FROM Cards
-                WHERE SubTypes LIKE '%331%'
-                AND tags LIKE '%1696804317%'
-                AND Colors IS NOT NULL
-                AND Colors != ''
-                AND Colors NOT LIKE '%,%'
-            """
-            cursor.execute(query)
-            target_grp_ids = [str(row[0]) for row in cursor.fetchall()]
-            total_cards = len(target_grp_ids)
-            
-            if total_cards == 0:
-                yield f"data: {json.dumps({'type': 'complete', 'total': 0, 'message': 'No colored vehicles with parallax found'})}\n\n"
-                return
-            
-            # Process in chunks
-            chunk_size = 100
-            total_processed = 0
-            failed_chunks = 0
-            
-            for i in range(0, len(target_grp_ids), chunk_size):
-                chunk = target_grp_ids[i:i + chunk_size]
-                try:
-                    placeholders = ','.join('?' * len(chunk))
-                    update_query = f"""
-                        UPDATE Cards
-                        SET tags = CASE
-                            WHEN tags = ',1696804317,' THEN ',,'
-                            WHEN tags LIKE ',1696804317,%' THEN REPLACE(tags, ',1696804317,', ',')
-                            WHEN tags LIKE '%,1696804317,' THEN REPLACE(tags, ',1696804317,', ',')
-                            ELSE tags
-                        END
-                        WHERE GrpId IN ({placeholders})
-                        AND tags LIKE '%1696804317%'
-                    """
-                    cursor.execute(update_query, chunk)
-                    db_connection.commit()
-                    rows_affected = cursor.rowcount
-                    total_processed += rows_affected
-                    
-                    # Send progress update
-                    progress_pct = round((total_processed / total_cards) * 100, 1)
-                    yield f"data: {json.dumps({'type': 'progress', 'current': total_processed, 'total': total_cards, 'percentage': progress_pct, 'message': f'Processing... {total_processed}/{total_cards}'})}\n\n"
-                    await asyncio.sleep(0)
-                    
-                except Exception as e:
-                    print(f"Chunk processing error: {e}")
-                    failed_chunks += 1
-            
-            # Send completion
-            if total_processed > 0:
-                msg = f"Reset Parallax for {total_processed} colored mono-colored vehicle cards."
-                if failed_chunks > 0:
-                    msg += f" (Failed to process {failed_chunks} batches)"
-                yield f"data: {json.dumps({'type': 'complete', 'total': total_processed, 'message': msg})}\n\n"
-            else:
-                yield f"data: {json.dumps({'type': 'complete', 'total': 0, 'message': 'No colored vehicles needed resetting (already clean).'})}\n\n"
-                
-        except Exception as e:
-            print(f"SSE Reset colored vehicles error: {e}")
-            yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
-    
-    return StreamingResponse(generate_progress(), media_type="text/event-stream")
-
+    return stream_style_rule(
+        COLORED_VEHICLE_RESET_RULE,
+        "Reset Parallax for {count} colored mono-colored vehicle cards.",
+        "No colored vehicles with parallax found",
+    )
 
 @router.get("/cards/style/reset-all-parallax-stream")
 async def reset_all_parallax_stream():
     """SSE endpoint for resetting all parallax styles with progress"""
-    global current_db_path, db_connection, db_cursor
-    
-    async def generate_progress():
-        try:
-            if not current_db_path:
-                yield f"data: {json.dumps({'type': 'error', 'message': 'Database not configured'})}\n\n"
-                return
-                
-            cursor = get_db_connection()
-            if not cursor:
-                yield f"data: {json.dumps({'type': 'error', 'message': 'Failed to connect to database'})}\n\n"
-                return
-            
-            # Get all cards with parallax style
-            query = "SELECT DISTINCT GrpId FROM Cards WHERE tags LIKE '%1696804317%'"
-            cursor.execute(query)
-            target_grp_ids = [str(row[0]) for row in cursor.fetchall()]
-            total_cards = len(target_grp_ids)
-            
-            if total_cards == 0:
-                yield f"data: {json.dumps({'type': 'complete', 'total': 0, 'message': 'No cards with parallax style found'})}\n\n"
-                return
-            
-            # Process in chunks
-            chunk_size = 100
-            total_processed = 0
-            failed_chunks = 0
-            
-            for i in range(0, len(target_grp_ids), chunk_size):
-                chunk = target_grp_ids[i:i + chunk_size]
-                try:
-                    placeholders = ','.join('?' * len(chunk))
-                    update_query = f"""
-                        UPDATE Cards
-                        SET tags = CASE
-                            WHEN tags = ',1696804317,' THEN ',,'
-                            WHEN tags LIKE ',1696804317,%' THEN REPLACE(tags, ',1696804317,', ',')
-                            WHEN tags LIKE '%,1696804317,' THEN REPLACE(tags, ',1696804317,', ',')
-                            ELSE tags
-                        END
-                        WHERE GrpId IN ({placeholders})
-                        AND tags LIKE '%1696804317%'
-                    """
-                    cursor.execute(update_query, chunk)
-                    db_connection.commit()
-                    rows_affected = cursor.rowcount
-                    total_processed += rows_affected
-                    
-                    # Send progress update
-                    progress_pct = round((total_processed / total_cards) * 100, 1)
-                    yield f"data: {json.dumps({'type': 'progress', 'current': total_processed, 'total': total_cards, 'percentage': progress_pct, 'message': f'Processing... {total_processed}/{total_cards}'})}\n\n"
-                    await asyncio.sleep(0)
-                    
-                except Exception as e:
-                    print(f"Chunk processing error: {e}")
-                    failed_chunks += 1
-            
-            # Send completion
-            if total_processed > 0:
-                msg = f"Reset Parallax for {total_processed} cards."
-                if failed_chunks > 0:
-                    msg += f" (Failed to process {failed_chunks} batches)"
-                yield f"data: {json.dumps({'type': 'complete', 'total': total_processed, 'message': msg})}\n\n"
-            else:
-                yield f"data: {json.dumps({'type': 'complete', 'total': 0, 'message': 'No cards needed resetting (already clean).'})}\n\n"
-                
-        except Exception as e:
-            print(f"SSE Reset all parallax error: {e}")
-            yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
-    
-    return StreamingResponse(generate_progress(), media_type="text/event-stream")
+    return stream_style_rule(
+        ALL_PARALLAX_RESET_RULE,
+        "Reset Parallax for {count} cards.",
+        "No cards with parallax style found",
+    )
+
+
+@router.get("/tag-index/{field}")
+async def get_tag_index_values(field: str):
+    """
+    List the values of one tag index field with their card counts.
 
+    Fields: tag, color, subtype, color_count, token.
+    """
+    if not current_db_path:
+        raise HTTPException(status_code=400, detail="Database not configured")
+    if field not in TAG_INDEX_FIELDS:
+        raise HTTPException(status_code=404, detail=f"Unknown tag index field: {field}")
+    values = await run_io(get_tag_index(current_db_path).values, field)
+    return {"field": field, "values": values}
+
+
+@router.get("/tag-index")
+async def select_from_tag_index(
+    tag: List[str] = Query(default=[]),
+    color: List[str] = Query(default=[]),
+    subtype: List[str] = Query(default=[]),
+    color_count: List[str] = Query(default=[]),
+    token: List[str] = Query(default=[]),
+    limit: Optional[int] = Query(default=None, ge=0),
+):
+    """
+    Return the GrpIds matching every given value (set intersection over the
+    tag index), e.g. /api/tag-index?subtype=331&color_count=1&tag=1696804317.
+    """
+    if not current_db_path:
+        raise HTTPException(status_code=400, detail="Database not configured")
+    criteria = {
+        field: values
+        for field, values in (
+            ("tag", tag),
+            ("color", color),
+            ("subtype", subtype),
+            ("color_count", color_count),
+            ("token", token),
+        )
+        if values
+    }
+    if not criteria:
+        raise HTTPException(status_code=400, detail="At least one of tag, color, subtype, color_count or token is required")
+    grp_ids = await select_grp_ids(criteria)
+    return {
+        "count": len(grp_ids),
+        "grp_ids": grp_ids if limit is None else grp_ids[:limit],
+    }
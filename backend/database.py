@@ -0,0 +1,306 @@
+# SQLite connection manager for the API
+# Reads of the game database use a small pool of read-only connections so they keep
+# working while a bulk style job runs; every mutation is queued onto one writer connection.
+# Optionally, those reads are served from an in-memory copy of the card tables.
+
+import asyncio
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from src import sql_editor
+from src.tag_engine import register_tag_functions
+from backend.executors import get_settings, run_db_read, run_db_write
+
+BUSY_TIMEOUT_SECONDS = 30
+
+# Tables kept in the in-memory snapshot; everything else is dropped after the copy
+SNAPSHOT_TABLES = ("Cards", "Localizations_enUS", "Localizations_koKR", "Enums")
+
+
+class DatabaseManager:
+    """
+    Connections to one Raw_CardDatabase file.
+
+    Read-only connections (mode=ro URI) are pooled and handed out one per read
+    job. A single writer connection runs on the dedicated writer thread (see
+    executors.run_db_write), whose work queue serializes all mutations. Every
+    connection has the tag_engine SQL functions (tag_has, tag_add, tag_remove).
+
+    The game database stays in its own rollback-journal mode; switching it to
+    WAL would leave -wal/-shm files next to a file the MTGA client owns.
+    Readers therefore wait (busy timeout) only for the instant a write commits.
+
+    Hot paths do not read the game database through this pool: card listing and
+    search are served by the card index sidecar (src/card_index.py), tag
+    selections by the in-memory tag index and image lookups by the bundle
+    index. The pool serves the remaining reads (validation, the change diff),
+    so it is kept small and its connections use SQLite's default cache and no
+    memory mapping, which would keep the MTGA-owned file mapped between jobs.
+
+    With `memory_snapshot` enabled ("InMemorySnapshot" in config.json), the
+    card tables are copied with the SQLite backup API into a shared-cache
+    in-memory database and pooled readers connect to that copy instead, so
+    those reads (art and token searches, the change diff) never hold the file
+    the game client uses. A write job or a change of the file's size/mtime
+    marks the copy stale; the next read takes a fresh copy under a new name,
+    and readers still on the previous copy finish with it undisturbed.
+    """
+
+    def __init__(
+        self, database_file_path: str, readers: Optional[int] = None, memory_snapshot: bool = False
+    ) -> None:
+        self.database_file_path = str(database_file_path)
+        self.max_readers = readers or get_settings()["db_readers"]
+        self.memory_snapshot = memory_snapshot
+
+        self._idle_readers: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._all_readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+        self._writer: Optional[sqlite3.Connection] = None
+        self._writer_cursor: Optional[sqlite3.Cursor] = None
+        self._write_listeners: List[Callable[[], None]] = []
+        self._rollback_listeners: List[Callable[[], None]] = []
+        self.writes = 0
+        self._pending_reads = 0
+        self._closed = False
+
+        self._snapshot_lock = threading.Lock()
+        self._snapshot_generation = 0
+        self._snapshot_holder: Optional[sqlite3.Connection] = None
+        self._snapshot_uri: Optional[str] = None
+        self._snapshot_stat_key: Optional[Tuple[int, int]] = None
+        self._snapshot_stale = True
+        self._reader_generations: Dict[sqlite3.Connection, int] = {}
+        self.snapshot_refreshes = 0
+
+    def _file_stat_key(self) -> Tuple[int, int]:
+        stat_result = os.stat(self.database_file_path)
+        return stat_result.st_size, stat_result.st_mtime_ns
+
+    def _refresh_snapshot(self) -> None:
+        """Copy the card tables into a new in-memory database and make it current."""
+        stat_key = self._file_stat_key()
+        self._snapshot_generation += 1
+        name = f"mtga_snapshot_{id(self)}_{self._snapshot_generation}"
+        uri = f"file:{name}?mode=memory&cache=shared"
+
+        holder = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        source = sqlite3.connect(
+            f"{Path(self.database_file_path).as_uri()}?mode=ro",
+            uri=True,
+            timeout=BUSY_TIMEOUT_SECONDS,
+        )
+        try:
+            source.backup(holder)
+        finally:
+            source.close()
+
+        tables = [
+            row[0]
+            for row in holder.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+            )
+        ]
+        for table in tables:
+            if table not in SNAPSHOT_TABLES:
+                holder.execute(f'DROP TABLE "{table}"')
+        holder.commit()
+        holder.execute("VACUUM")
+
+        # Readers of the previous copy keep it alive until they are reconnected
+        previous_holder = self._snapshot_holder
+        self._snapshot_holder = holder
+        self._snapshot_uri = uri
+        self._snapshot_stat_key = stat_key
+        self._snapshot_stale = False
+        self.snapshot_refreshes += 1
+        if previous_holder is not None:
+            previous_holder.close()
+
+    def _current_snapshot(self) -> Tuple[str, int]:
+        """Return (uri, generation) of an up-to-date snapshot, refreshing it if stale."""
+        with self._snapshot_lock:
+            if self._snapshot_stale or self._file_stat_key() != self._snapshot_stat_key:
+                self._refresh_snapshot()
+            return self._snapshot_uri, self._snapshot_generation
+
+    def _connect_reader(self) -> sqlite3.Connection:
+        if self.memory_snapshot:
+            uri, generation = self._current_snapshot()
+            connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            connection.execute("PRAGMA query_only = ON")
+            self._reader_generations[connection] = generation
+            return register_tag_functions(connection)
+
+        connection = sqlite3.connect(
+            f"{Path(self.database_file_path).as_uri()}?mode=ro",
+            uri=True,
+            check_same_thread=False,
+            timeout=BUSY_TIMEOUT_SECONDS,
+        )
+        connection.execute("PRAGMA temp_store = MEMORY")
+        return register_tag_functions(connection)
+
+    def _reconnect_if_stale(self, connection: sqlite3.Connection) -> sqlite3.Connection:
+        """Move a snapshot reader over to the current snapshot copy if needed."""
+        _, generation = self._current_snapshot()
+        if self._reader_generations.get(connection) == generation:
+            return connection
+        fresh_connection = self._connect_reader()
+        with self._readers_lock:
+            self._reader_generations.pop(connection, None)
+            self._all_readers.remove(connection)
+            self._all_readers.append(fresh_connection)
+        connection.close()
+        return fresh_connection
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """
+        Borrow a read-only connection from the pool, opening one if the pool
+        is not yet full and waiting for one to be returned otherwise.
+
+        Raises:
+            sqlite3.ProgrammingError: If the manager has been closed
+        """
+        if self._closed:
+            raise sqlite3.ProgrammingError(f"{self.database_file_path} is closed")
+        try:
+            connection = self._idle_readers.get_nowait()
+        except queue.Empty:
+            with self._readers_lock:
+                can_open = len(self._all_readers) < self.max_readers
+                if can_open:
+                    connection = self._connect_reader()
+                    self._all_readers.append(connection)
+            if not can_open:
+                connection = self._idle_readers.get()
+        if self.memory_snapshot:
+            connection = self._reconnect_if_stale(connection)
+        try:
+            yield connection
+        finally:
+            if connection.in_transaction:
+                connection.rollback()
+            self._idle_readers.put(connection)
+
+    def _get_writer(self):
+        if self._closed:
+            raise sqlite3.ProgrammingError(f"{self.database_file_path} is closed")
+        if self._writer is None:
+            self._writer_cursor, self._writer, _ = sql_editor.create_database_connection(
+                self.database_file_path, check_same_thread=False
+            )
+            self._writer.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_SECONDS * 1000}")
+        return self._writer_cursor, self._writer
+
+    def validate(self) -> None:
+        """
+        Check that the file is a card database.
+
+        Raises:
+            sqlite3.Error: If the Cards table cannot be read
+        """
+        with self.reader() as connection:
+            connection.execute("SELECT 1 FROM Cards LIMIT 1").fetchone()
+
+    def add_write_listener(self, listener: Callable[[], None]) -> None:
+        """Register a callback run on the writer thread after every write job."""
+        self._write_listeners.append(listener)
+
+    def add_rollback_listener(self, listener: Callable[[], None]) -> None:
+        """Register a callback run on the writer thread when a write job raises."""
+        self._rollback_listeners.append(listener)
+
+    def _run_write(self, function: Callable, *args) -> Any:
+        cursor, connection = self._get_writer()
+        try:
+            result = function(cursor, connection, *args)
+            if connection.in_transaction:
+                connection.commit()
+            return result
+        except Exception:
+            if connection.in_transaction:
+                connection.rollback()
+            for listener in self._rollback_listeners:
+                listener()
+            raise
+        finally:
+            self.writes += 1
+            self._snapshot_stale = True
+            for listener in self._write_listeners:
+                listener()
+
+    def _run_read(self, function: Callable, *args) -> Any:
+        with self.reader() as connection:
+            return function(connection, *args)
+
+    async def read(self, function: Callable, *args) -> Any:
+        """Run function(connection, *args) on a pooled read-only connection."""
+        self._pending_reads += 1
+        try:
+            return await run_db_read(self._run_read, function, *args)
+        finally:
+            self._pending_reads -= 1
+
+    async def write(self, function: Callable, *args) -> Any:
+        """
+        Queue function(cursor, connection, *args) on the writer connection.
+
+        Whatever the function leaves uncommitted is committed afterwards, or
+        rolled back if it raises.
+        """
+        return await run_db_write(self._run_write, function, *args)
+
+    async def close_when_idle(self, poll_seconds: float = 0.05) -> None:
+        """
+        Close once the jobs already queued on this manager have finished.
+
+        Call on the event loop after the manager has been unpublished, so no
+        new jobs arrive: an empty job queued behind the writer queue waits for
+        every pending write, then pending reads are waited for.
+        """
+        await run_db_write(lambda: None)
+        while self._pending_reads:
+            await asyncio.sleep(poll_seconds)
+        self.close()
+
+    def close(self) -> None:
+        """Close every connection (the manager must not be used afterwards)."""
+        self._closed = True
+        with self._readers_lock:
+            readers, self._all_readers = self._all_readers, []
+        for connection in readers:
+            try:
+                connection.close()
+            except sqlite3.Error:
+                pass
+        if self._writer is not None:
+            try:
+                self._writer.close()
+            except sqlite3.Error:
+                pass
+            self._writer = None
+            self._writer_cursor = None
+        with self._snapshot_lock:
+            if self._snapshot_holder is not None:
+                self._snapshot_holder.close()
+                self._snapshot_holder = None
+
+    def stats(self) -> dict:
+        """Return pool usage and write counters."""
+        with self._readers_lock:
+            open_readers = len(self._all_readers)
+        return {
+            "readers_open": open_readers,
+            "readers_idle": self._idle_readers.qsize(),
+            "max_readers": self.max_readers,
+            "writes": self.writes,
+            "memory_snapshot": self.memory_snapshot,
+            "snapshot_refreshes": self.snapshot_refreshes,
+        }
@@ -0,0 +1,195 @@
+# Worker pools that keep blocking work off the asyncio event loop
+# Bundle decode/encode runs in a process pool, file I/O in a thread pool,
+# SQLite reads in a small thread pool (one pooled read-only connection per job;
+# listing and image lookups use the card index sidecar and bundle index instead)
+# and SQLite writes on a single writer thread whose queue serializes them.
+
+import asyncio
+import functools
+import os
+import sys
+import threading
+import zlib
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Hashable, List, Optional
+
+from src.unity_bundle import DEFAULT_ENVIRONMENT_CACHE_BYTES, configure_environment_cache
+
+DEFAULT_BUNDLE_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+DEFAULT_IO_WORKERS = 8
+DEFAULT_DB_READERS = 2
+
+# Frozen (PyInstaller) builds cannot spawn worker processes without
+# freeze_support() in the entry point, so they fall back to threads.
+DEFAULT_BUNDLE_WORKER_MODE = "thread" if getattr(sys, "frozen", False) else "process"
+
+_settings = {
+    "bundle_workers": DEFAULT_BUNDLE_WORKERS,
+    "bundle_worker_mode": DEFAULT_BUNDLE_WORKER_MODE,
+    "io_workers": DEFAULT_IO_WORKERS,
+    "db_readers": DEFAULT_DB_READERS,
+    "bundle_cache_bytes": DEFAULT_ENVIRONMENT_CACHE_BYTES,
+}
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class ShardedProcessPool(Executor):
+    """
+    Process pool made of single-worker shards.
+
+    Keyed jobs always run on the same shard, so per-process state such as the
+    UnityPy environment cache is reused for a bundle across view and swap
+    requests. Unkeyed jobs go to the shard with the fewest pending jobs.
+    """
+
+    def __init__(self, workers: int, initializer=None, initargs=()) -> None:
+        self._shards: List[ProcessPoolExecutor] = [
+            ProcessPoolExecutor(max_workers=1, initializer=initializer, initargs=initargs)
+            for _ in range(workers)
+        ]
+        self._pending = [0] * workers
+        self._lock = threading.Lock()
+
+    def _submit_to_shard(self, shard_index: int, function, *args, **kwargs) -> Future:
+        with self._lock:
+            self._pending[shard_index] += 1
+        future = self._shards[shard_index].submit(function, *args, **kwargs)
+
+        def _done(_future, shard_index=shard_index):
+            with self._lock:
+                self._pending[shard_index] -= 1
+
+        future.add_done_callback(_done)
+        return future
+
+    def submit(self, function, *args, **kwargs) -> Future:
+        with self._lock:
+            shard_index = min(range(len(self._shards)), key=self._pending.__getitem__)
+        return self._submit_to_shard(shard_index, function, *args, **kwargs)
+
+    def submit_keyed(self, key: Hashable, function, *args, **kwargs) -> Future:
+        shard_index = zlib.crc32(str(key).encode("utf-8")) % len(self._shards)
+        return self._submit_to_shard(shard_index, function, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        for shard in self._shards:
+            shard.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+
+def configure(
+    bundle_workers: Optional[int] = None,
+    io_workers: Optional[int] = None,
+    bundle_worker_mode: Optional[str] = None,
+    bundle_cache_bytes: Optional[int] = None,
+    db_readers: Optional[int] = None,
+) -> None:
+    """
+    Set pool sizes. Pools that already exist are shut down and recreated lazily.
+
+    Args:
+        bundle_workers: Number of workers for bundle decode/encode jobs
+        io_workers: Number of threads for blocking file I/O
+        bundle_worker_mode: "process" or "thread" for the bundle pool
+        bundle_cache_bytes: Memory budget of each bundle worker's environment cache
+        db_readers: Number of concurrent SQLite read jobs (and read-only connections)
+    """
+    if bundle_workers:
+        _settings["bundle_workers"] = max(1, int(bundle_workers))
+    if io_workers:
+        _settings["io_workers"] = max(1, int(io_workers))
+    if db_readers:
+        _settings["db_readers"] = max(1, int(db_readers))
+    if bundle_worker_mode in ("process", "thread"):
+        _settings["bundle_worker_mode"] = bundle_worker_mode
+    if bundle_cache_bytes:
+        _settings["bundle_cache_bytes"] = int(bundle_cache_bytes)
+        configure_environment_cache(_settings["bundle_cache_bytes"])
+    shutdown(wait=False)
+
+
+def _get_pool(name: str) -> Executor:
+    with _pools_lock:
+        pool = _pools.get(name)
+        if pool is None:
+            if name == "bundle" and _settings["bundle_worker_mode"] == "process":
+                pool = ShardedProcessPool(
+                    _settings["bundle_workers"],
+                    initializer=configure_environment_cache,
+                    initargs=(_settings["bundle_cache_bytes"],),
+                )
+            elif name == "bundle":
+                pool = ThreadPoolExecutor(
+                    max_workers=_settings["bundle_workers"], thread_name_prefix="bundle"
+                )
+            elif name == "io":
+                pool = ThreadPoolExecutor(
+                    max_workers=_settings["io_workers"], thread_name_prefix="io"
+                )
+            elif name == "db_read":
+                pool = ThreadPoolExecutor(
+                    max_workers=_settings["db_readers"], thread_name_prefix="db-read"
+                )
+            else:
+                pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-write")
+            _pools[name] = pool
+        return pool
+
+
+async def _run(pool_name: str, function: Callable, *args, **kwargs) -> Any:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_pool(pool_name), functools.partial(function, *args, **kwargs)
+    )
+
+
+async def run_bundle_job(function: Callable, *args, **kwargs) -> Any:
+    """
+    Run CPU-bound bundle work (UnityPy load, texture decode, image encode).
+
+    In process mode the function and its arguments must be picklable, i.e. a
+    module-level function taking plain values such as paths and ints.
+    """
+    return await _run("bundle", function, *args, **kwargs)
+
+
+async def run_bundle_job_for(key: Hashable, function: Callable, *args, **kwargs) -> Any:
+    """
+    Run bundle work with worker affinity: jobs with the same key (a bundle path)
+    land on the same worker process and share its environment cache.
+    """
+    pool = _get_pool("bundle")
+    if not isinstance(pool, ShardedProcessPool):
+        return await run_bundle_job(function, *args, **kwargs)
+    return await asyncio.wrap_future(
+        pool.submit_keyed(key, functools.partial(function, *args, **kwargs))
+    )
+
+
+async def run_io(function: Callable, *args, **kwargs) -> Any:
+    """Run blocking file I/O on the I/O thread pool."""
+    return await _run("io", function, *args, **kwargs)
+
+
+async def run_db_read(function: Callable, *args, **kwargs) -> Any:
+    """Run SQLite read work on the database reader pool."""
+    return await _run("db_read", function, *args, **kwargs)
+
+
+async def run_db_write(function: Callable, *args, **kwargs) -> Any:
+    """Run SQLite write work on the single writer thread; jobs run in submission order."""
+    return await _run("db_write", function, *args, **kwargs)
+
+
+def shutdown(wait: bool = True) -> None:
+    """Shut down every pool; they are recreated on next use."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=wait, cancel_futures=not wait)
+
+
+def get_settings() -> dict:
+    """Return the current pool configuration."""
+    return dict(_settings)
@@ -1,9 +1,12 @@
 from fastapi import FastAPI
+import asyncio
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import os
 import sys
-from .api import router as api_router
+from .api import router as api_router, export_change_journal, start_update_watcher, stop_update_watcher
+from . import executors
+from src.backup_store import get_backup_store
 
 app = FastAPI(title="MTGA Swapper API")
 
@@ -19,6 +22,32 @@ app.add_middleware(
 # Include API router
 app.include_router(api_router, prefix="/api")
 
+@app.on_event("startup")
+async def watch_for_mtga_updates():
+    # Re-applies modifications when an MTGA update replaces the database or bundles
+    start_update_watcher(asyncio.get_running_loop())
+
+@app.on_event("startup")
+async def prune_bundle_backups():
+    # Remove backup objects superseded while the server was not running (e.g. by the desktop GUI)
+    await executors.run_io(get_backup_store().prune)
+
+@app.on_event("shutdown")
+def stop_watching_updates():
+    stop_update_watcher()
+
+@app.on_event("shutdown")
+def shutdown_workers():
+    executors.shutdown(wait=False)
+
+@app.on_event("shutdown")
+def export_changes_file():
+    # Keep changes.json in step with the change journal for tools that read the file
+    try:
+        export_change_journal()
+    except OSError as e:
+        print(f"Error exporting changes.json: {e}")
+
 # Serve frontend static files
 def get_static_dir():
     if getattr(sys, 'frozen', False):
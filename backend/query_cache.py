@@ -0,0 +1,84 @@
+# Listing result cache for the API
+# Keeps recent /api/cards responses in memory so paging back or retyping a
+# search term does not re-run the query. Every write path clears it (writes
+# run on the DB worker thread, so the cache is lock-protected).
+
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+DEFAULT_MAX_ENTRIES = 256
+
+
+class QueryCache:
+    """
+    Bounded LRU of query results with generation-based invalidation.
+
+    Callers read `generation` before running a query and pass it to put();
+    a result computed while a write was invalidating the cache is dropped
+    instead of being stored stale.
+
+    Attributes:
+        hits: Number of lookups served from the cache
+        misses: Number of lookups that had to run the query
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Look up a cached result and mark it as recently used.
+
+        Args:
+            key: Normalized query parameters
+
+        Returns:
+            The cached result, or None on a miss
+        """
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+    def put(self, key: Hashable, value: Any, generation: int) -> None:
+        """
+        Store a result unless the cache was invalidated since `generation` was read.
+
+        Args:
+            key: Normalized query parameters
+            value: Result to cache
+            generation: Value of `generation` read before the query ran
+        """
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        """Drop every cached result (called after any write to the game data)."""
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Return entry count and hit/miss counters."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "generation": self.generation,
+            }
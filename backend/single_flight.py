@@ -0,0 +1,53 @@
+# Request coalescing for the API
+# Concurrent callers asking for the same key share one running job instead of
+# each starting their own (e.g. the same card art requested several times while
+# the grid mounts).
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent async jobs by key.
+
+    The first caller starts the job as its own task; callers arriving while it
+    runs await the same task. Cancelling one caller (e.g. a closed browser
+    connection) does not cancel the job for the others.
+
+    Attributes:
+        executed: Number of jobs actually started
+        coalesced: Number of calls served by a job another caller started
+    """
+
+    def __init__(self) -> None:
+        self.executed = 0
+        self.coalesced = 0
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+
+    async def run(self, key: Hashable, job: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run `job()` unless a job with the same key is already running, and
+        return its result (or raise its exception).
+
+        Args:
+            key: Identity of the work, e.g. (bundle cache key, variant)
+            job: Zero-argument coroutine function doing the work
+        """
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(job())
+            self._in_flight[key] = task
+            self.executed += 1
+            task.add_done_callback(lambda _task: self._in_flight.pop(key, None))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        """Return started/saved job counters."""
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight),
+        }
@@ -0,0 +1,91 @@
+# Benchmark for main-texture colour-complexity scoring
+# Compares len(set(image.getdata())) with the NumPy scorer on synthetic art and,
+# optionally, on real bundles.
+#
+# Usage (from the repository root):
+#   python -m benchmarks.bench_texture_scoring
+#   python -m benchmarks.bench_texture_scoring path/to/401234_CardArt_x.mtga ...
+
+import sys
+import time
+import warnings
+from typing import Callable, List
+
+import numpy as np
+from PIL import Image
+
+from src.image_utils import count_unique_colors
+
+
+def legacy_unique_colors(image: Image.Image) -> int:
+    """The original per-pixel tuple set."""
+    return len(set(image.getdata()))
+
+
+def time_call(function: Callable, *args, repeat: int = 3) -> float:
+    """Return the best wall time of several runs, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def synthetic_card_art(size: int, mode: str) -> Image.Image:
+    """Noisy gradient, roughly as colourful as real card art."""
+    rng = np.random.default_rng(1234)
+    gradient = np.linspace(0, 255, size, dtype=np.float32)
+    channels = [
+        np.add.outer(gradient, gradient) / 2,
+        np.add.outer(gradient, gradient[::-1]) / 2,
+        np.tile(gradient, (size, 1)),
+    ]
+    if mode == "RGBA":
+        channels.append(np.full((size, size), 255, dtype=np.float32))
+    pixels = np.stack(channels, axis=-1)
+    pixels += rng.normal(0, 12, pixels.shape)
+    return Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8), mode)
+
+
+def benchmark_images() -> None:
+    print(f"{'image':<18}{'colours':>10}{'legacy (s)':>14}{'numpy (s)':>12}{'speedup':>10}")
+    for size in (512, 1024, 2048):
+        for mode in ("RGB", "RGBA"):
+            image = synthetic_card_art(size, mode)
+            colours = count_unique_colors(image)
+            assert colours == legacy_unique_colors(image)
+            legacy_time = time_call(legacy_unique_colors, image, repeat=1)
+            numpy_time = time_call(count_unique_colors, image)
+            print(
+                f"{f'{size}x{size} {mode}':<18}{colours:>10}"
+                f"{legacy_time:>14.3f}{numpy_time:>12.4f}{legacy_time / numpy_time:>9.1f}x"
+            )
+
+
+def benchmark_bundles(bundle_paths: List[str]) -> None:
+    from src.unity_bundle import load_unity_bundle
+
+    print(f"\n{'bundle':<40}{'textures':>10}{'legacy (s)':>14}{'numpy (s)':>12}")
+    for bundle_path in bundle_paths:
+        unity_environment = load_unity_bundle(bundle_path)
+        images = [
+            unity_object.read().image
+            for unity_object in unity_environment.objects
+            if unity_object.type.name == "Texture2D"
+        ]
+        legacy_time = time_call(
+            lambda: [legacy_unique_colors(image) for image in images], repeat=1
+        )
+        numpy_time = time_call(lambda: [count_unique_colors(image) for image in images])
+        print(
+            f"{bundle_path[-40:]:<40}{len(images):>10}{legacy_time:>14.3f}{numpy_time:>12.4f}"
+        )
+
+
+if __name__ == "__main__":
+    # getdata() is deprecated in recent Pillow; it is exactly what we measure
+    warnings.simplefilter("ignore", DeprecationWarning)
+    benchmark_images()
+    if len(sys.argv) > 1:
+        benchmark_bundles(sys.argv[1:])
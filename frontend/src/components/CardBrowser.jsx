@@ -7,8 +7,8 @@ function CardBrowser({ apiUrl, onSelectCard, language = 'ko' }) {
   const [cards, setCards] = useState([]);
   const [search, setSearch] = useState('');
   const [loading, setLoading] = useState(false);
-  const [page, setPage] = useState(0);
-  const [hasMore, setHasMore] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [totalCards, setTotalCards] = useState(0);
   const [hoveredButton, setHoveredButton] = useState(null);
   
   // Confirmation modal state
@@ -49,6 +49,7 @@ function CardBrowser({ apiUrl, onSelectCard, language = 'ko' }) {
       : 'Remove Parallax style from ALL cards?\n\nThis will remove Parallax effects applied to all cards in the database.',
     noResults: language === 'ko' ? '검색 결과가 없습니다' : 'No cards found matching your search',
     loadMore: language === 'ko' ? '더 보기' : 'Load More',
+    shownOfTotal: (shown, total) => language === 'ko' ? `${total}장 중 ${shown}장 표시` : `Showing ${shown} of ${total} cards`,
     loading: language === 'ko' ? '로딩 중...' : 'Loading...',
     failed: language === 'ko' ? '실패했습니다. 콘솔을 확인하세요.' : 'Failed. Check console for details.'
   };
@@ -158,24 +159,22 @@ function CardBrowser({ apiUrl, onSelectCard, language = 'ko' }) {
   const loadCards = async (reset = false) => {
     setLoading(true);
     try {
-      const currentPage = reset ? 0 : page;
       const res = await axios.get(`${apiUrl}/cards`, {
         params: {
           search: search,
           limit: 50,
-          offset: currentPage * 50
+          cursor: reset ? undefined : nextCursor
         }
       });
       
       if (reset) {
         setCards(res.data.cards);
-        setPage(1);
       } else {
         setCards(prev => [...prev, ...res.data.cards]);
-        setPage(prev => prev + 1);
       }
       
-      setHasMore(res.data.cards.length === 50);
+      setNextCursor(res.data.next_cursor);
+      setTotalCards(res.data.total);
     } catch (error) {
       console.error("Error loading cards:", error);
     } finally {
@@ -320,6 +319,12 @@ function CardBrowser({ apiUrl, onSelectCard, language = 'ko' }) {
           </div>
         )}
         
+        {cards.length > 0 && (
+          <p className="col-span-full text-xs text-center text-[var(--text-muted)]">
+            {t.shownOfTotal(cards.length, totalCards)}
+          </p>
+        )}
+        
         {cards.map((card) => {
           const isAlchemy = card.is_alchemy === 1 || card.is_alchemy === true;
           const koreanName = cleanKoreanName(card.korean_name);
@@ -344,7 +349,7 @@ function CardBrowser({ apiUrl, onSelectCard, language = 'ko' }) {
 
               <div className="aspect-[5/4.5] w-full bg-[var(--bg-surface)] rounded overflow-hidden relative shadow-inner">
                 <img 
-                  src={`${apiUrl}/cards/${card.art_id}/image`} 
+                  src={`${apiUrl}/cards/${card.art_id}/image?w=384&fmt=webp`} 
                   alt={card.name} 
                   className="w-full h-full object-contain"
                   loading="lazy"
@@ -361,7 +366,7 @@ function CardBrowser({ apiUrl, onSelectCard, language = 'ko' }) {
         })}
       </div>
 
-      {hasMore && cards.length > 0 && (
+      {nextCursor && cards.length > 0 && (
         <div className="flex justify-center mt-6">
           <button 
             className="btn btn-secondary"
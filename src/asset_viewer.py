@@ -10,6 +10,9 @@ from pathlib import Path
 import io
 import os
 
+from .bundle_index import asset_bundle_path_for_database, find_bundle_file
+from .unity_bundle import extract_textures_from_bundle
+
 
 def remove_alpha_channel(image, should_remove_alpha=True) -> Image.Image:
     """
@@ -124,33 +127,6 @@ def configure_unity_version(database_path, fallback_version) -> None:
         UnityPy.config.FALLBACK_UNITY_VERSION = fallback_version
 
 
-def extract_textures_from_bundle(
-    unity_environment: UnityPy.Environment,
-) -> list[UnityPy.classes.Texture2D]:
-    """
-    Extract all Texture2D objects from a Unity asset bundle.
-
-    Args:
-        unity_environment: Loaded Unity environment
-
-    Returns:
-        List of Texture2D objects sorted by size and complexity
-    """
-    texture_objects = [
-        obj.read() for obj in unity_environment.objects if obj.type.name == "Texture2D"
-    ]
-
-    # Sort by size (width + height) and color complexity (number of unique colors), largest first
-    return sorted(
-        texture_objects,
-        key=lambda texture: (
-            texture.image.size[0] + texture.image.size[1],
-            len(set(texture.image.getdata())),
-        ),
-        reverse=True,
-    )
-
-
 def export_3d_meshes(unity_environment: UnityPy.Environment, export_directory) -> int:
     """
     Export all 3D meshes from the Unity environment to OBJ files.
@@ -190,22 +166,15 @@ def get_card_texture_data(
     if card_object and database_file_path:
         try:
             # Construct path to AssetBundle directory
-            database_parent_directory = Path(database_file_path).parent
-            game_root_directory = database_parent_directory.parent
-            asset_bundle_path = str(game_root_directory / "AssetBundle")
+            asset_bundle_path = asset_bundle_path_for_database(database_file_path)
 
             # Find the asset bundle file for this card
-            matching_files = [
-                filename
-                for filename in os.listdir(asset_bundle_path)
-                if filename.startswith(str(card_object.art_id))
-                and filename.endswith(".mtga")
-            ]
-
-            if not matching_files:
+            matching_file = find_bundle_file(asset_bundle_path, card_object.art_id)
+
+            if not matching_file:
                 return None
 
-            bundle_file_path = os.path.join(asset_bundle_path, matching_files[0])
+            bundle_file_path = os.path.join(asset_bundle_path, matching_file)
             unity_environment = load_unity_bundle(bundle_file_path)
             texture_data_list = extract_textures_from_bundle(unity_environment)
 
@@ -0,0 +1,497 @@
+# Content-addressed bundle backup store for MTGA Swapper
+# Keeps every backed-up bundle version once under its SHA-256, compressed with zlib when
+# that actually saves space, plus an SQLite manifest naming the current MOD_/BACKUP_ copy
+# of each bundle. Replaces the loose MOD_*.mtga / BACKUP_*.mtga copies.
+
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+BACKUP_DIRECTORY = Path.home() / "MTGA_Swapper_Backups"
+STORE_DIRECTORY_NAME = "store"
+
+# Backup kinds: MOD = modified bundle to re-apply after a game update,
+# BACKUP = bundle as it was before an art swap
+MOD = "MOD"
+ORIGINAL = "BACKUP"
+KINDS = (MOD, ORIGINAL)
+
+CHUNK_SIZE = 1024 * 1024
+COMPRESSION_LEVEL = 6
+# Bundles are usually LZ4-compressed already; only deflate if a sample shrinks below this ratio
+COMPRESSION_MAX_RATIO = 0.9
+
+# Linux FICLONE ioctl (reflink the whole file on btrfs/XFS)
+FICLONE = 0x40049409
+
+MANIFEST_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS objects (
+        sha256 TEXT PRIMARY KEY,
+        size INTEGER NOT NULL,
+        stored_size INTEGER NOT NULL,
+        codec TEXT NOT NULL,
+        created REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS entries (
+        kind TEXT NOT NULL,
+        file_name TEXT NOT NULL,
+        sha256 TEXT NOT NULL REFERENCES objects(sha256),
+        saved_at REAL NOT NULL,
+        PRIMARY KEY (kind, file_name)
+    );
+    CREATE INDEX IF NOT EXISTS entries_saved_at ON entries(kind, saved_at);
+    CREATE TABLE IF NOT EXISTS hash_cache (
+        path TEXT PRIMARY KEY,
+        size INTEGER NOT NULL,
+        mtime_ns INTEGER NOT NULL,
+        sha256 TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS own_writes (
+        file_name TEXT PRIMARY KEY,
+        sha256 TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def copy_file(source: Union[str, Path], destination: Union[str, Path]) -> None:
+    """
+    Copy a file, sharing extents (reflink) or copying in-kernel where possible.
+
+    Tries the FICLONE ioctl, then os.copy_file_range, then a plain buffered copy.
+    """
+    with open(source, "rb") as source_file, open(destination, "wb") as destination_file:
+        source_fd = source_file.fileno()
+        destination_fd = destination_file.fileno()
+        try:
+            import fcntl
+
+            fcntl.ioctl(destination_fd, FICLONE, source_fd)
+            return
+        except (ImportError, OSError):
+            pass
+
+        if hasattr(os, "copy_file_range"):
+            remaining = os.fstat(source_fd).st_size
+            try:
+                while remaining > 0:
+                    copied = os.copy_file_range(source_fd, destination_fd, min(remaining, 1 << 30))
+                    if copied == 0:
+                        break
+                    remaining -= copied
+                if remaining == 0:
+                    return
+            except OSError:
+                pass
+            source_file.seek(0)
+            destination_file.seek(0)
+            destination_file.truncate()
+
+        shutil.copyfileobj(source_file, destination_file, CHUNK_SIZE)
+
+
+def _compresses_well(path: Path) -> bool:
+    with open(path, "rb") as file:
+        sample = file.read(CHUNK_SIZE)
+    if not sample:
+        return False
+    return len(zlib.compress(sample, COMPRESSION_LEVEL)) < len(sample) * COMPRESSION_MAX_RATIO
+
+
+class BackupStore:
+    """
+    Deduplicated store of bundle backups.
+
+    Objects live in store/objects/<aa>/<sha256>[.z]. The manifest maps
+    (kind, bundle file name) to the object holding that backup, so a backup
+    whose content is already stored costs one manifest row, and restores
+    walk only the manifest entries. Source hashes are cached by
+    (path, size, mtime), so backing up an unchanged bundle reads nothing.
+    """
+
+    def __init__(self, backup_directory: Union[str, Path] = BACKUP_DIRECTORY) -> None:
+        self.backup_directory = Path(backup_directory)
+        self.store_directory = self.backup_directory / STORE_DIRECTORY_NAME
+        self.objects_directory = self.store_directory / "objects"
+        self.manifest_path = self.store_directory / "manifest.db"
+        self.copies_skipped = 0
+        self.objects_written = 0
+        self.objects_pruned = 0
+        self.bytes_pruned = 0
+        self._lock = threading.RLock()
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def _get_connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.objects_directory.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.manifest_path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA synchronous = NORMAL")
+            connection.executescript(MANIFEST_SCHEMA)
+            self._connection = connection
+            self._import_legacy_copies()
+        return self._connection
+
+    def _import_legacy_copies(self) -> None:
+        """
+        Move loose MOD_*/BACKUP_* copies from older versions into the store (once).
+
+        Each copy is deleted once its stored object has been read back and
+        matches it; a copy that fails the check is left in place.
+        """
+        connection = self._connection
+        if connection.execute("SELECT 1 FROM store_meta WHERE key = 'legacy_imported'").fetchone():
+            return
+        legacy_files: List[Tuple[float, str, Path]] = []
+        for kind in KINDS:
+            for path in self.backup_directory.glob(f"{kind}_*.mtga"):
+                legacy_files.append((path.stat().st_mtime, kind, path))
+        removed = 0
+        freed_bytes = 0
+        for saved_at, kind, path in sorted(legacy_files):
+            sha256 = self._put(kind, path, path.name[len(kind) + 1 :], saved_at)
+            if not self._verify_object(sha256):
+                print(f"Kept legacy backup {path.name}: its stored copy did not verify")
+                continue
+            size = path.stat().st_size
+            try:
+                path.unlink()
+            except OSError as e:
+                print(f"Could not remove legacy backup {path.name}: {e}")
+                continue
+            with connection:
+                connection.execute("DELETE FROM hash_cache WHERE path = ?", (str(path.resolve()),))
+            removed += 1
+            freed_bytes += size
+        with connection:
+            connection.execute("INSERT OR REPLACE INTO store_meta(key, value) VALUES ('legacy_imported', '1')")
+        if legacy_files:
+            print(
+                f"Imported {len(legacy_files)} legacy bundle backups into the backup store "
+                f"({removed} loose copies removed, {freed_bytes / (1024 * 1024):.1f} MB freed)"
+            )
+
+    def _verify_object(self, sha256: str) -> bool:
+        """Read a stored object back (decompressing it) and check it still hashes to `sha256`."""
+        row = self._connection.execute("SELECT codec FROM objects WHERE sha256 = ?", (sha256,)).fetchone()
+        if row is None:
+            return False
+        digest = hashlib.sha256()
+        decompressor = zlib.decompressobj() if row[0] == "zlib" else None
+        try:
+            with open(self._object_path(sha256, row[0]), "rb") as object_file:
+                for chunk in iter(lambda: object_file.read(CHUNK_SIZE), b""):
+                    digest.update(decompressor.decompress(chunk) if decompressor else chunk)
+            if decompressor:
+                digest.update(decompressor.flush())
+        except (OSError, zlib.error):
+            return False
+        return digest.hexdigest() == sha256
+
+    def _object_path(self, sha256: str, codec: str) -> Path:
+        suffix = ".z" if codec == "zlib" else ""
+        return self.objects_directory / sha256[:2] / f"{sha256}{suffix}"
+
+    def file_hash(self, path: Union[str, Path]) -> str:
+        """
+        Return the SHA-256 of a file, from the hash cache if its size and mtime are unchanged.
+        """
+        path = Path(path)
+        stat_result = path.stat()
+        key = str(path.resolve())
+        with self._lock:
+            connection = self._get_connection()
+            row = connection.execute(
+                "SELECT sha256 FROM hash_cache WHERE path = ? AND size = ? AND mtime_ns = ?",
+                (key, stat_result.st_size, stat_result.st_mtime_ns),
+            ).fetchone()
+            if row:
+                return row[0]
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+        sha256 = digest.hexdigest()
+        with self._lock:
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO hash_cache(path, size, mtime_ns, sha256) VALUES (?, ?, ?, ?)",
+                    (key, stat_result.st_size, stat_result.st_mtime_ns, sha256),
+                )
+        return sha256
+
+    def _cache_hash(self, path: Path, sha256: str) -> None:
+        stat_result = path.stat()
+        with self._lock:
+            connection = self._get_connection()
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO hash_cache(path, size, mtime_ns, sha256) VALUES (?, ?, ?, ?)",
+                    (str(path.resolve()), stat_result.st_size, stat_result.st_mtime_ns, sha256),
+                )
+
+    def note_own_write(self, path: Union[str, Path], sha256: Optional[str] = None) -> None:
+        """
+        Record that the swapper itself wrote a bundle, so the update watcher can ignore the event.
+
+        Args:
+            path: Bundle file that was written
+            sha256: Hash of the written content (computed if not given)
+        """
+        path = Path(path)
+        sha256 = sha256 or self.file_hash(path)
+        with self._lock:
+            self._record_own_write(path.name, sha256)
+
+    def _record_own_write(self, file_name: str, sha256: str) -> None:
+        # Kept in the manifest so writes by the desktop GUI are recognised by the backend too
+        with self._get_connection() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO own_writes(file_name, sha256) VALUES (?, ?)", (file_name, sha256)
+            )
+
+    def is_own_write(self, path: Union[str, Path]) -> bool:
+        """True if a bundle still holds exactly the content the swapper last wrote to it."""
+        path = Path(path)
+        with self._lock:
+            row = self._get_connection().execute(
+                "SELECT sha256 FROM own_writes WHERE file_name = ?", (path.name,)
+            ).fetchone()
+        if row is None:
+            return False
+        sha256 = row[0]
+        try:
+            return self.file_hash(path) == sha256
+        except OSError:
+            return False
+
+    def _write_object(self, source: Path, sha256: str) -> None:
+        size = source.stat().st_size
+        codec = "zlib" if _compresses_well(source) else "raw"
+        object_path = self._object_path(sha256, codec)
+        object_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = object_path.with_name(object_path.name + ".tmp")
+        if codec == "zlib":
+            compressor = zlib.compressobj(COMPRESSION_LEVEL)
+            with open(source, "rb") as source_file, open(temp_path, "wb") as object_file:
+                for chunk in iter(lambda: source_file.read(CHUNK_SIZE), b""):
+                    object_file.write(compressor.compress(chunk))
+                object_file.write(compressor.flush())
+        else:
+            copy_file(source, temp_path)
+        os.replace(temp_path, object_path)
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO objects(sha256, size, stored_size, codec, created) VALUES (?, ?, ?, ?, ?)",
+                (sha256, size, object_path.stat().st_size, codec, time.time()),
+            )
+        self.objects_written += 1
+
+    def _put(self, kind: str, source: Path, file_name: str, saved_at: float) -> str:
+        sha256 = self.file_hash(source)
+        connection = self._connection
+        current = connection.execute(
+            "SELECT sha256 FROM entries WHERE kind = ? AND file_name = ?", (kind, file_name)
+        ).fetchone()
+        if current and current[0] == sha256:
+            self.copies_skipped += 1
+            return sha256
+        if connection.execute("SELECT 1 FROM objects WHERE sha256 = ?", (sha256,)).fetchone() is None:
+            self._write_object(source, sha256)
+        else:
+            self.copies_skipped += 1
+        with connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO entries(kind, file_name, sha256, saved_at) VALUES (?, ?, ?, ?)",
+                (kind, file_name, sha256, saved_at),
+            )
+        return sha256
+
+    def put(self, kind: str, source: Union[str, Path], file_name: Optional[str] = None) -> str:
+        """
+        Back up a bundle file.
+
+        Nothing is copied if this exact content is already stored; only the
+        manifest entry for (kind, file_name) is updated.
+
+        Args:
+            kind: MOD or BACKUP
+            source: Bundle file to back up
+            file_name: Bundle file name to record (defaults to the source's name)
+
+        Returns:
+            SHA-256 of the stored content
+        """
+        if kind not in KINDS:
+            raise ValueError(f"Unknown backup kind: {kind}")
+        source = Path(source)
+        with self._lock:
+            self._get_connection()
+            sha256 = self._put(kind, source, file_name or source.name, time.time())
+            if kind == MOD:
+                # A MOD backup is taken right after the swapper wrote the bundle
+                self._record_own_write(source.name, sha256)
+            return sha256
+
+    def entries(self, kind: str) -> List[Tuple[str, str]]:
+        """Return (file_name, sha256) of every backup of a kind, oldest first."""
+        with self._lock:
+            return self._get_connection().execute(
+                "SELECT file_name, sha256 FROM entries WHERE kind = ? ORDER BY saved_at", (kind,)
+            ).fetchall()
+
+    def restore_object(self, sha256: str, destination: Union[str, Path]) -> None:
+        """Write a stored object to `destination` (atomically replaced)."""
+        with self._lock:
+            row = self._get_connection().execute(
+                "SELECT codec FROM objects WHERE sha256 = ?", (sha256,)
+            ).fetchone()
+        if row is None:
+            raise KeyError(sha256)
+        object_path = self._object_path(sha256, row[0])
+        destination = Path(destination)
+        temp_path = destination.with_name(destination.name + ".restore")
+        if row[0] == "zlib":
+            decompressor = zlib.decompressobj()
+            with open(object_path, "rb") as object_file, open(temp_path, "wb") as output_file:
+                for chunk in iter(lambda: object_file.read(CHUNK_SIZE), b""):
+                    output_file.write(decompressor.decompress(chunk))
+                output_file.write(decompressor.flush())
+        else:
+            copy_file(object_path, temp_path)
+        os.replace(temp_path, destination)
+        # The content is known: seed the hash cache instead of rehashing it on the next check
+        self._cache_hash(destination, sha256)
+        self.note_own_write(destination, sha256)
+
+    def restore_all(
+        self,
+        kind: str,
+        resolve_destination: Callable[[str], Optional[Union[str, Path]]],
+        on_progress: Optional[Callable[[int, int, str], None]] = None,
+        dry_run: bool = False,
+        include: Optional[Callable[[str], bool]] = None,
+    ) -> Tuple[int, int]:
+        """
+        Restore every backup of a kind whose destination differs from it.
+
+        Args:
+            kind: MOD or BACKUP
+            resolve_destination: Maps a recorded bundle file name to the path to
+                restore to (e.g. through the bundle index), or None to skip it
+            on_progress: Callback receiving (current, total, message) per entry
+            dry_run: Only count the files that would be restored
+            include: Only consider recorded file names this returns True for
+
+        Returns:
+            Tuple of (files restored, files already up to date)
+        """
+        restored = 0
+        unchanged = 0
+        entries = self.entries(kind)
+        if include is not None:
+            entries = [entry for entry in entries if include(entry[0])]
+        for position, (file_name, sha256) in enumerate(entries, start=1):
+            if on_progress:
+                on_progress(position, len(entries), "Restoring bundles")
+            destination = resolve_destination(file_name)
+            if destination is None:
+                continue
+            destination = Path(destination)
+            if destination.exists():
+                with self._lock:
+                    size = self._connection.execute(
+                        "SELECT size FROM objects WHERE sha256 = ?", (sha256,)
+                    ).fetchone()[0]
+                # Different size means different content; skip hashing in that case
+                if destination.stat().st_size == size and self.file_hash(destination) == sha256:
+                    unchanged += 1
+                    continue
+            if not dry_run:
+                self.restore_object(sha256, destination)
+            restored += 1
+        return restored, unchanged
+
+    def prune(self) -> int:
+        """
+        Delete objects no manifest entry refers to any more.
+
+        Objects are orphaned when put() replaces an entry with new content (e.g.
+        a bundle swapped again). Run after a batch of puts and at startup.
+
+        Returns:
+            Number of objects removed
+        """
+        with self._lock:
+            connection = self._get_connection()
+            orphans = connection.execute(
+                "SELECT sha256, codec, stored_size FROM objects WHERE sha256 NOT IN (SELECT sha256 FROM entries)"
+            ).fetchall()
+            if not orphans:
+                return 0
+            for sha256, codec, _ in orphans:
+                try:
+                    self._object_path(sha256, codec).unlink()
+                except FileNotFoundError:
+                    pass
+            with connection:
+                connection.executemany("DELETE FROM objects WHERE sha256 = ?", [(row[0],) for row in orphans])
+            self.objects_pruned += len(orphans)
+            self.bytes_pruned += sum(row[2] for row in orphans)
+            print(f"Pruned {len(orphans)} superseded bundle backups")
+            return len(orphans)
+
+    def stats(self) -> dict:
+        """Return object/entry counts, stored vs. original bytes, copy and prune counters."""
+        with self._lock:
+            connection = self._get_connection()
+            objects, original_bytes, stored_bytes = connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(stored_size), 0) FROM objects"
+            ).fetchone()
+            entries: Dict[str, int] = dict(
+                connection.execute("SELECT kind, COUNT(*) FROM entries GROUP BY kind").fetchall()
+            )
+            orphaned = connection.execute(
+                "SELECT COUNT(*) FROM objects WHERE sha256 NOT IN (SELECT sha256 FROM entries)"
+            ).fetchone()[0]
+        return {
+            "objects": objects,
+            "entries": entries,
+            "original_bytes": original_bytes,
+            "stored_bytes": stored_bytes,
+            "objects_written": self.objects_written,
+            "copies_skipped": self.copies_skipped,
+            "orphaned_objects": orphaned,
+            "objects_pruned": self.objects_pruned,
+            "bytes_pruned": self.bytes_pruned,
+        }
+
+
+_stores: Dict[str, BackupStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_backup_store(backup_directory: Union[str, Path] = BACKUP_DIRECTORY) -> BackupStore:
+    """
+    Return the shared backup store of a backup directory, creating it on first use.
+
+    Args:
+        backup_directory: Backup root (defaults to ~/MTGA_Swapper_Backups)
+
+    Returns:
+        BackupStore shared by every caller using the same directory
+    """
+    key = str(Path(backup_directory))
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = BackupStore(backup_directory)
+            _stores[key] = store
+        return store
@@ -0,0 +1,243 @@
+# AssetBundle index for MTGA Swapper
+# Maps card ArtIds to their .mtga bundle files so lookups don't rescan the AssetBundle folder
+
+import hashlib
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+INDEX_DIRECTORY = Path.home() / ".mtga_swapper" / "cache"
+INDEX_FORMAT_VERSION = 1
+
+_LEADING_DIGITS = re.compile(r"^(\d+)")
+
+
+def asset_bundle_path_for_database(database_file_path: str) -> Path:
+    """
+    Derive the AssetBundle directory from the path of the MTGA card database.
+
+    Args:
+        database_file_path: Path to the Raw_CardDatabase file
+
+    Returns:
+        Path to the AssetBundle directory next to the database's Raw folder
+    """
+    return Path(database_file_path).parent.parent / "AssetBundle"
+
+
+def art_id_key(value: Union[str, int, None]) -> Optional[str]:
+    """
+    Normalize an ArtId or bundle file name to the key used by the index.
+
+    Leading zeros are dropped so that "001155_CardArt.mtga" and ArtId 1155
+    resolve to the same entry.
+
+    Args:
+        value: ArtId (int or str) or bundle file name
+
+    Returns:
+        Normalized key, or None if the value does not start with digits
+    """
+    if value is None:
+        return None
+    match = _LEADING_DIGITS.match(str(value))
+    if not match:
+        return None
+    return str(int(match.group(1)))
+
+
+class BundleIndex:
+    """
+    ArtId -> bundle file name map for a single AssetBundle directory.
+
+    The map is persisted to disk and refreshed incrementally whenever the
+    directory's mtime changes (files added, removed or renamed).
+    """
+
+    def __init__(
+        self, asset_bundle_path: Union[str, Path], index_file_path: Optional[Path] = None
+    ) -> None:
+        self.asset_bundle_path = Path(asset_bundle_path)
+        if index_file_path is None:
+            path_hash = hashlib.sha1(
+                str(self.asset_bundle_path.resolve()).encode("utf-8")
+            ).hexdigest()[:16]
+            index_file_path = INDEX_DIRECTORY / f"bundle_index_{path_hash}.json"
+        self.index_file_path = Path(index_file_path)
+
+        self._lock = threading.RLock()
+        self._entries: Dict[str, List[str]] = {}
+        self._file_names: set = set()
+        self._directory_mtime_ns: Optional[int] = None
+        self._loaded = False
+
+    def _load(self) -> None:
+        """Load the persisted index from disk if it matches this directory."""
+        self._loaded = True
+        try:
+            with open(self.index_file_path, "r") as index_file:
+                data = json.load(index_file)
+        except (OSError, ValueError):
+            return
+
+        if (
+            data.get("version") != INDEX_FORMAT_VERSION
+            or data.get("directory") != str(self.asset_bundle_path)
+        ):
+            return
+
+        self._entries = {key: list(names) for key, names in data["entries"].items()}
+        self._file_names = {name for names in self._entries.values() for name in names}
+        self._directory_mtime_ns = data.get("directory_mtime_ns")
+
+    def _save(self) -> None:
+        """Persist the index atomically."""
+        try:
+            self.index_file_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.index_file_path.with_suffix(".tmp")
+            with open(temp_path, "w") as index_file:
+                json.dump(
+                    {
+                        "version": INDEX_FORMAT_VERSION,
+                        "directory": str(self.asset_bundle_path),
+                        "directory_mtime_ns": self._directory_mtime_ns,
+                        "entries": self._entries,
+                    },
+                    index_file,
+                )
+            os.replace(temp_path, self.index_file_path)
+        except OSError as error:
+            print(f"Error saving bundle index: {error}")
+
+    def _add_file(self, file_name: str) -> None:
+        key = art_id_key(file_name)
+        if key is None:
+            return
+        names = self._entries.setdefault(key, [])
+        names.append(file_name)
+        names.sort()
+        self._file_names.add(file_name)
+
+    def _remove_file(self, file_name: str) -> None:
+        key = art_id_key(file_name)
+        names = self._entries.get(key)
+        if names and file_name in names:
+            names.remove(file_name)
+            if not names:
+                del self._entries[key]
+        self._file_names.discard(file_name)
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Bring the index up to date with the AssetBundle directory.
+
+        Only the file names that were added or removed since the last scan
+        are re-indexed.
+
+        Args:
+            force: Rescan even if the directory mtime has not changed
+
+        Returns:
+            True if the index changed, False otherwise
+        """
+        with self._lock:
+            if not self._loaded:
+                self._load()
+
+            try:
+                directory_mtime_ns = os.stat(self.asset_bundle_path).st_mtime_ns
+            except OSError:
+                return False
+
+            if not force and directory_mtime_ns == self._directory_mtime_ns:
+                return False
+
+            current_names = {
+                entry.name
+                for entry in os.scandir(self.asset_bundle_path)
+                if entry.name.endswith(".mtga")
+            }
+            added_names = current_names - self._file_names
+            removed_names = self._file_names - current_names
+
+            for file_name in removed_names:
+                self._remove_file(file_name)
+            for file_name in added_names:
+                self._add_file(file_name)
+
+            self._directory_mtime_ns = directory_mtime_ns
+            self._save()
+            return bool(added_names or removed_names)
+
+    def find(self, art_id: Union[str, int]) -> Optional[str]:
+        """
+        Find the bundle file name for an ArtId.
+
+        Args:
+            art_id: ArtId of the card
+
+        Returns:
+            Bundle file name (not the full path), or None if not found
+        """
+        key = art_id_key(art_id)
+        if key is None:
+            return None
+        self.refresh()
+        with self._lock:
+            names = self._entries.get(key)
+            return names[0] if names else None
+
+    def find_path(self, art_id: Union[str, int]) -> Optional[Path]:
+        """
+        Find the full bundle file path for an ArtId.
+
+        Args:
+            art_id: ArtId of the card
+
+        Returns:
+            Path to the bundle file, or None if not found
+        """
+        file_name = self.find(art_id)
+        return self.asset_bundle_path / file_name if file_name else None
+
+
+_indexes: Dict[str, BundleIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_bundle_index(asset_bundle_path: Union[str, Path]) -> BundleIndex:
+    """
+    Return the shared index for an AssetBundle directory, creating it on first use.
+
+    Args:
+        asset_bundle_path: Path to the MTGA AssetBundle directory
+
+    Returns:
+        BundleIndex shared by every caller using the same directory
+    """
+    key = str(Path(asset_bundle_path))
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = BundleIndex(asset_bundle_path)
+            _indexes[key] = index
+        return index
+
+
+def find_bundle_file(
+    asset_bundle_path: Union[str, Path], art_id: Union[str, int]
+) -> Optional[str]:
+    """
+    Find the bundle file name for an ArtId in an AssetBundle directory.
+
+    Args:
+        asset_bundle_path: Path to the MTGA AssetBundle directory
+        art_id: ArtId of the card
+
+    Returns:
+        Bundle file name, or None if no bundle exists for the ArtId
+    """
+    return get_bundle_index(asset_bundle_path).find(art_id)
@@ -0,0 +1,506 @@
+# Sidecar card index for MTGA Swapper
+# Materializes the card listing (flip-side titles, Korean names, alchemy flags) and an
+# FTS5 trigram search index into a local SQLite file, rebuilt only when the card data changes.
+
+import base64
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+INDEX_DIRECTORY = Path.home() / ".mtga_swapper" / "cache"
+INDEX_FORMAT_VERSION = 4
+TOTAL_COUNT_CACHE_SIZE = 256
+
+BASIC_LAND_NAMES = ("island", "forest", "mountain", "plains", "wastes", "swamp")
+
+# Columns searched by /api/cards, in index order
+SEARCH_COLUMNS = ("title", "linked_title", "korean_names", "set_code", "grp_id", "art_id")
+
+# Sort options of /api/cards -> card_view column (GrpId breaks ties)
+SORT_COLUMNS = {
+    "Name": "name",
+    "Set": "set_code",
+    "GrpID": "grp_id",
+    "ArtID": "art_id",
+}
+
+# Columns returned by list_cards, in order
+LISTING_COLUMNS = ("name", "set_code", "art_type", "grp_id", "art_id", "korean_name", "is_alchemy")
+
+# Cards columns the view is derived from; hashed to detect changes that matter
+FINGERPRINT_QUERY = """
+    SELECT GrpId, ArtId, Order_Title, ExpansionCode, ArtSize, TitleId,
+        LinkedFaceGrpIds, IsDigitalOnly, IsRebalanced
+    FROM Cards
+"""
+
+CARD_VIEW_SOURCE_QUERY = """
+    SELECT
+        c1.GrpId,
+        c1.ArtId,
+        c1.Order_Title,
+        MAX(c2.Order_Title),
+        group_concat(DISTINCT c2.Order_Title),
+        c1.ExpansionCode,
+        c1.ArtSize,
+        MAX(lko.Loc),
+        group_concat(DISTINCT lko.Loc),
+        c1.IsDigitalOnly,
+        c1.IsRebalanced
+    FROM Cards c1
+    LEFT JOIN Cards c2
+        ON c1.LinkedFaceGrpIds = c2.GrpId
+    AND NULLIF(c2.Order_Title, '') IS NOT NULL
+    LEFT JOIN Localizations_koKR lko ON c1.TitleId = lko.LocId
+    WHERE (NULLIF(c1.Order_Title, '') IS NOT NULL
+    OR NULLIF(c2.Order_Title, '') IS NOT NULL)
+    GROUP BY c1.GrpId, c1.ArtId
+"""
+
+CARD_VIEW_SCHEMA = """
+    CREATE TABLE card_view (
+        grp_id INTEGER PRIMARY KEY,
+        art_id INTEGER,
+        name TEXT,
+        title TEXT,
+        linked_title TEXT,
+        set_code TEXT,
+        art_type TEXT,
+        korean_name TEXT,
+        korean_names TEXT,
+        is_alchemy INTEGER NOT NULL,
+        is_basic_land INTEGER NOT NULL
+    );
+    CREATE INDEX card_view_name ON card_view(name, grp_id);
+    CREATE INDEX card_view_set_code ON card_view(set_code, grp_id);
+    CREATE INDEX card_view_art_id ON card_view(art_id, grp_id);
+    -- Case-insensitive prefix (LIKE 'abc%') and set code lookups of style rules
+    CREATE INDEX card_view_name_nocase ON card_view(name COLLATE NOCASE);
+    CREATE INDEX card_view_set_code_nocase ON card_view(set_code COLLATE NOCASE);
+    CREATE TABLE card_index_meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def encode_cursor(sort_column: str, sort_value: Any, grp_id: int) -> str:
+    """Encode a keyset position as an opaque URL-safe cursor string."""
+    payload = json.dumps([sort_column, sort_value, grp_id], ensure_ascii=False)
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, Any, int]:
+    """
+    Decode a cursor created by encode_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_column, sort_value, grp_id = json.loads(base64.urlsafe_b64decode(padded))
+        return str(sort_column), sort_value, int(grp_id)
+    except (TypeError, ValueError) as error:
+        raise ValueError(f"Invalid cursor: {cursor}") from error
+
+
+def connect_read_only(database_file_path: Union[str, Path]) -> sqlite3.Connection:
+    """Open the game database read-only (never creates or locks it for writing)."""
+    return sqlite3.connect(f"{Path(database_file_path).as_uri()}?mode=ro", uri=True)
+
+
+def is_basic_land_title(title: Optional[str]) -> bool:
+    """Return True if a card title starts with a basic land name."""
+    name = str(title).lower()
+    return any(name.startswith(land) for land in BASIC_LAND_NAMES)
+
+
+def _card_view_rows(source_connection: sqlite3.Connection):
+    for (
+        grp_id,
+        art_id,
+        title,
+        linked_title,
+        linked_titles,
+        set_code,
+        art_size,
+        korean_name,
+        korean_names,
+        is_digital_only,
+        is_rebalanced,
+    ) in source_connection.execute(CARD_VIEW_SOURCE_QUERY):
+        name = title if title else f"{linked_title}-flip-side"
+        yield (
+            grp_id,
+            art_id if art_id is not None else 0,
+            name,
+            title,
+            linked_titles,
+            set_code or "",
+            str(art_size),
+            korean_name,
+            korean_names,
+            int(bool(is_digital_only) or bool(is_rebalanced)),
+            int(is_basic_land_title(title)),
+        )
+
+
+class CardIndex:
+    """
+    Materialized card view plus FTS5 trigram search index in a sidecar database.
+
+    The game database's size and mtime are checked on every use. Only when they
+    change is the card data re-hashed, and only when the hash changes (a game
+    update, a GrpId swap, a preset apply) is a new sidecar built. Style edits
+    only touch Tags, which the view does not contain, so they never trigger a
+    rebuild.
+    """
+
+    def __init__(
+        self,
+        database_file_path: Union[str, Path],
+        index_directory: Union[str, Path] = INDEX_DIRECTORY,
+    ) -> None:
+        self.database_file_path = str(database_file_path)
+        self.index_directory = Path(index_directory)
+        self.builds = 0
+
+        self._lock = threading.Lock()
+        self._stat_key: Optional[Tuple[int, int]] = None
+        self._index_file_path: Optional[Path] = None
+        self._has_fts = True
+        self._local = threading.local()
+        self._total_counts: "OrderedDict[Tuple[Path, str], int]" = OrderedDict()
+
+    def content_fingerprint(self) -> str:
+        """
+        Hash the card columns the view is derived from.
+
+        Returns:
+            Short hex fingerprint of the database file name and card data
+        """
+        digest = hashlib.sha1(
+            f"{INDEX_FORMAT_VERSION}:{Path(self.database_file_path).name}".encode("utf-8")
+        )
+        source_connection = connect_read_only(self.database_file_path)
+        try:
+            cursor = source_connection.execute(FINGERPRINT_QUERY)
+            while True:
+                rows = cursor.fetchmany(5000)
+                if not rows:
+                    break
+                digest.update(repr(rows).encode("utf-8"))
+        finally:
+            source_connection.close()
+        return digest.hexdigest()[:16]
+
+    def ensure_built(self) -> Path:
+        """
+        Make sure the sidecar matches the current card data, building it if needed.
+
+        Returns:
+            Path to the sidecar index database
+        """
+        with self._lock:
+            stat_result = os.stat(self.database_file_path)
+            stat_key = (stat_result.st_size, stat_result.st_mtime_ns)
+            if stat_key == self._stat_key and self._index_file_path is not None:
+                return self._index_file_path
+
+            index_file_path = self.index_directory / f"card_index_{self.content_fingerprint()}.db"
+            if not index_file_path.exists():
+                self.build(index_file_path)
+            self._has_fts = self._read_meta(index_file_path, "has_fts") == "1"
+            self._index_file_path = index_file_path
+            self._stat_key = stat_key
+            return index_file_path
+
+    def build(self, index_file_path: Path) -> Path:
+        """
+        Build a sidecar index from the game database.
+
+        Args:
+            index_file_path: Destination file
+
+        Returns:
+            Path to the sidecar index database
+        """
+        self.index_directory.mkdir(parents=True, exist_ok=True)
+        temp_path = index_file_path.with_suffix(".tmp")
+        if temp_path.exists():
+            temp_path.unlink()
+
+        source_connection = connect_read_only(self.database_file_path)
+        index_connection = sqlite3.connect(temp_path)
+        try:
+            index_connection.executescript(CARD_VIEW_SCHEMA)
+            index_connection.executemany(
+                "INSERT INTO card_view VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                _card_view_rows(source_connection),
+            )
+
+            # Trigram search needs SQLite 3.34+ with FTS5; without it searches use LIKE
+            has_fts = True
+            try:
+                index_connection.execute(
+                    f"""
+                    CREATE VIRTUAL TABLE card_search USING fts5(
+                        {", ".join(SEARCH_COLUMNS)},
+                        tokenize = 'trigram'
+                    )
+                    """
+                )
+                index_connection.execute(
+                    f"INSERT INTO card_search(rowid, {', '.join(SEARCH_COLUMNS)}) "
+                    f"SELECT grp_id, {', '.join(SEARCH_COLUMNS)} FROM card_view"
+                )
+                index_connection.execute("INSERT INTO card_search(card_search) VALUES ('optimize')")
+            except sqlite3.OperationalError as error:
+                print(f"FTS5 trigram search unavailable, falling back to LIKE: {error}")
+                has_fts = False
+
+            index_connection.executemany(
+                "INSERT INTO card_index_meta VALUES (?, ?)",
+                [
+                    ("format_version", str(INDEX_FORMAT_VERSION)),
+                    ("database_file", Path(self.database_file_path).name),
+                    ("has_fts", "1" if has_fts else "0"),
+                ],
+            )
+            index_connection.commit()
+            index_connection.execute("ANALYZE")
+        finally:
+            index_connection.close()
+            source_connection.close()
+
+        os.replace(temp_path, index_file_path)
+        self._remove_stale_indexes(index_file_path)
+        self.builds += 1
+        print(f"Built card index: {index_file_path}")
+        return index_file_path
+
+    @staticmethod
+    def _read_meta(index_file_path: Path, key: str) -> Optional[str]:
+        connection = sqlite3.connect(index_file_path)
+        try:
+            row = connection.execute(
+                "SELECT value FROM card_index_meta WHERE key = ?", (key,)
+            ).fetchone()
+            return row[0] if row else None
+        finally:
+            connection.close()
+
+    def _remove_stale_indexes(self, current_index_path: Path) -> None:
+        # Files still open elsewhere (Windows) are left for the next build to remove
+        for stale_path in self.index_directory.glob("card_index_*.db"):
+            if stale_path != current_index_path:
+                try:
+                    stale_path.unlink()
+                except OSError:
+                    pass
+
+    def invalidate(self) -> None:
+        """Force the next use to re-check the card data."""
+        with self._lock:
+            self._stat_key = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """Per-thread read connection to the current sidecar."""
+        index_file_path = self.ensure_built()
+        cached = getattr(self._local, "connection", None)
+        if cached is not None and cached[0] == index_file_path:
+            return cached[1]
+        if cached is not None:
+            cached[1].close()
+        connection = sqlite3.connect(f"{index_file_path.as_uri()}?mode=ro", uri=True)
+        self._local.connection = (index_file_path, connection)
+        return connection
+
+    def search_filter_sql(self, search: Optional[str]) -> Tuple[str, List[str]]:
+        """
+        Build a WHERE fragment restricting card_view to rows matching `search`.
+
+        Terms of three or more characters use the trigram index (MATCH); shorter
+        terms, or a sidecar built without FTS5, use LIKE over the view.
+
+        Args:
+            search: Raw search text (substring, case-insensitive), may be empty
+
+        Returns:
+            Tuple of (sql_fragment starting with "AND", parameters)
+        """
+        if not search:
+            return "", []
+
+        if self._has_fts and len(search) >= 3:
+            phrase = '"' + search.replace('"', '""') + '"'
+            return (
+                " AND grp_id IN (SELECT rowid FROM card_search WHERE card_search MATCH ?)",
+                [phrase],
+            )
+
+        conditions = " OR ".join(f"{column} LIKE ?" for column in SEARCH_COLUMNS)
+        return f" AND ({conditions})", [f"%{search}%"] * len(SEARCH_COLUMNS)
+
+    def list_cards(
+        self,
+        search: Optional[str] = None,
+        sort_by: str = "Name",
+        limit: int = 100,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Tuple], Optional[str]]:
+        """
+        Fetch one page of the card listing.
+
+        With a cursor the page starts right after the row the cursor points to
+        (keyset pagination), so every page costs the same as the first one.
+        Without one, `offset` rows are skipped.
+
+        Args:
+            search: Optional search text
+            sort_by: One of SORT_COLUMNS; anything else sorts by GrpId
+            limit: Page size
+            offset: Number of rows to skip (ignored when a cursor is given)
+            cursor: next_cursor returned with the previous page
+
+        Returns:
+            Tuple of (rows of LISTING_COLUMNS, next_cursor or None on the last page)
+
+        Raises:
+            ValueError: If the cursor is malformed or belongs to another sort order
+        """
+        connection = self._connection()
+        search_sql, params = self.search_filter_sql(search)
+        sort_column = SORT_COLUMNS.get(sort_by, "grp_id")
+
+        if cursor:
+            cursor_sort_column, sort_value, grp_id = decode_cursor(cursor)
+            if cursor_sort_column != sort_column:
+                raise ValueError("Cursor does not match the requested sort order")
+            if sort_column == "grp_id":
+                search_sql += " AND grp_id > ?"
+                params = params + [grp_id]
+            else:
+                search_sql += f" AND ({sort_column}, grp_id) > (?, ?)"
+                params = params + [sort_value, grp_id]
+            offset = 0
+
+        order_sql = "grp_id" if sort_column == "grp_id" else f"{sort_column}, grp_id"
+        query = (
+            f"SELECT {', '.join(LISTING_COLUMNS)} "
+            f"FROM card_view WHERE 1 = 1{search_sql} ORDER BY {order_sql} LIMIT ? OFFSET ?"
+        )
+        rows = connection.execute(query, params + [int(limit), int(offset)]).fetchall()
+
+        next_cursor = None
+        if rows and len(rows) == limit:
+            last_row = rows[-1]
+            next_cursor = encode_cursor(
+                sort_column,
+                last_row[LISTING_COLUMNS.index(sort_column)],
+                last_row[LISTING_COLUMNS.index("grp_id")],
+            )
+        return rows, next_cursor
+
+    def count_cards(self, search: Optional[str] = None) -> int:
+        """
+        Count the cards matching a search. Counts are cached per sidecar and
+        search text (the sort order does not change the count).
+
+        Args:
+            search: Optional search text
+
+        Returns:
+            Number of matching cards
+        """
+        connection = self._connection()
+        key = (self._index_file_path, search or "")
+        with self._lock:
+            if key in self._total_counts:
+                self._total_counts.move_to_end(key)
+                return self._total_counts[key]
+
+        search_sql, params = self.search_filter_sql(search)
+        total = connection.execute(
+            f"SELECT COUNT(*) FROM card_view WHERE 1 = 1{search_sql}", params
+        ).fetchone()[0]
+
+        with self._lock:
+            self._total_counts[key] = total
+            while len(self._total_counts) > TOTAL_COUNT_CACHE_SIZE:
+                self._total_counts.popitem(last=False)
+        return total
+
+    def select_grp_ids(
+        self,
+        search: Optional[str] = None,
+        exclude_basic_lands: bool = True,
+        name_prefix: Optional[str] = None,
+        set_code: Optional[str] = None,
+    ) -> List[int]:
+        """
+        Fetch the GrpIds of every card matching a search, for bulk operations.
+
+        Args:
+            search: Optional search text (same semantics as list_cards)
+            exclude_basic_lands: Skip cards whose title starts with a basic land name
+            name_prefix: Only cards whose name starts with this (case-insensitive)
+            set_code: Only cards of this set (case-insensitive)
+
+        Returns:
+            List of GrpIds
+        """
+        connection = self._connection()
+        search_sql, params = self.search_filter_sql(search)
+        query = f"SELECT grp_id FROM card_view WHERE 1 = 1{search_sql}"
+        if name_prefix:
+            escaped = name_prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            query += " AND name LIKE ? ESCAPE '\\'"
+            params.append(f"{escaped}%")
+        if set_code:
+            query += " AND set_code = ? COLLATE NOCASE"
+            params.append(set_code)
+        if exclude_basic_lands:
+            query += " AND is_basic_land = 0"
+        return [row[0] for row in connection.execute(query, params)]
+
+    def stats(self) -> dict:
+        """Return the current sidecar file and the number of builds in this process."""
+        return {
+            "index_file": str(self._index_file_path) if self._index_file_path else None,
+            "has_fts": self._has_fts,
+            "builds": self.builds,
+        }
+
+
+_indexes: Dict[str, CardIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_card_index(database_file_path: Union[str, Path]) -> CardIndex:
+    """
+    Return the shared card index for a game database, creating it on first use.
+
+    Args:
+        database_file_path: Path to the Raw_CardDatabase file
+
+    Returns:
+        CardIndex shared by every caller using the same database
+    """
+    key = str(database_file_path)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = CardIndex(database_file_path)
+            _indexes[key] = index
+        return index
+
+
+def reset_card_index(database_file_path: Union[str, Path]) -> None:
+    """Forget the shared card index of a database file, so the next get_card_index() starts fresh."""
+    with _indexes_lock:
+        _indexes.pop(str(database_file_path), None)
@@ -0,0 +1,272 @@
+# Change journal for MTGA Swapper
+# Records modified Cards rows and localizations in a small SQLite file next to changes.json,
+# so logging a change costs one upsert instead of rewriting the whole JSON file.
+# changes.json itself is written from the journal on demand (export_json).
+
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+JOURNAL_SUFFIX = ".journal.db"
+
+JOURNAL_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS card_changes (
+        grp_id TEXT PRIMARY KEY,
+        seq INTEGER NOT NULL,
+        row_json TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS card_changes_seq ON card_changes(seq);
+    CREATE TABLE IF NOT EXISTS localization_changes (
+        grp_id TEXT NOT NULL,
+        loc_id TEXT NOT NULL,
+        seq INTEGER NOT NULL,
+        text TEXT,
+        PRIMARY KEY (grp_id, loc_id)
+    );
+    CREATE TABLE IF NOT EXISTS journal_meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def journal_path_for(changes_path: Union[str, Path]) -> Path:
+    """Return the journal file belonging to a changes.json path."""
+    changes_path = Path(changes_path)
+    return changes_path.with_name(changes_path.name + JOURNAL_SUFFIX)
+
+
+class ChangeJournal:
+    """
+    Journal of the changes recorded in one changes.json file.
+
+    Card rows are keyed by GrpId and keep the position of their first
+    recording, so export_json() produces the same key order the old
+    read-modify-write of the JSON file did. Re-recording a card replaces its
+    row and drops its localization overrides, as assigning a new dict did.
+
+    If changes.json is modified by something else (a preset copied over it,
+    a hand edit), the journal merges it in the next time it is opened or
+    used, detected by comparing the file's size/mtime with the last import
+    or export. Cards in the file replace their journal rows; cards recorded
+    only in the journal (not exported yet) are kept.
+    """
+
+    def __init__(self, changes_path: Union[str, Path]) -> None:
+        self.changes_path = Path(changes_path)
+        self.journal_path = journal_path_for(self.changes_path)
+        self._lock = threading.RLock()
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def _get_connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.journal_path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA synchronous = NORMAL")
+            connection.executescript(JOURNAL_SCHEMA)
+            self._connection = connection
+        self._import_if_changed()
+        return self._connection
+
+    def _json_stat_key(self) -> Optional[str]:
+        try:
+            stat_result = os.stat(self.changes_path)
+        except OSError:
+            return None
+        return f"{stat_result.st_size}:{stat_result.st_mtime_ns}"
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self._connection.execute(
+            "SELECT value FROM journal_meta WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: Optional[str]) -> None:
+        self._connection.execute(
+            "INSERT OR REPLACE INTO journal_meta(key, value) VALUES (?, ?)", (key, value)
+        )
+
+    def _import_if_changed(self) -> None:
+        """Merge changes.json into the journal if the file changed outside the journal."""
+        stat_key = self._json_stat_key()
+        if stat_key is None or stat_key == self._meta("json_stat"):
+            return
+        try:
+            with open(self.changes_path, "r") as changes_file:
+                content = changes_file.read()
+            changes_data = json.loads(content) if content.strip() else {}
+        except (OSError, ValueError) as error:
+            print(f"Error importing {self.changes_path} into the change journal: {error}")
+            return
+
+        connection = self._connection
+        with connection:
+            next_seq = connection.execute("SELECT COALESCE(MAX(seq), 0) + 1 FROM card_changes").fetchone()[0]
+            for position, (grp_id, row) in enumerate(changes_data.items()):
+                row = dict(row)
+                localizations = row.pop("Localizations_enUS", None) or {}
+                # Existing cards keep their position; the file's row and overrides replace the journal's
+                connection.execute(
+                    """
+                    INSERT INTO card_changes(grp_id, seq, row_json) VALUES (?, ?, ?)
+                    ON CONFLICT(grp_id) DO UPDATE SET row_json = excluded.row_json
+                    """,
+                    (str(grp_id), next_seq + position, json.dumps(row)),
+                )
+                connection.execute("DELETE FROM localization_changes WHERE grp_id = ?", (str(grp_id),))
+                connection.executemany(
+                    "INSERT OR REPLACE INTO localization_changes(grp_id, loc_id, seq, text) VALUES (?, ?, ?, ?)",
+                    [
+                        (str(grp_id), str(loc_id), loc_seq, text)
+                        for loc_seq, (loc_id, text) in enumerate(localizations.items())
+                    ],
+                )
+            self._set_meta("json_stat", stat_key)
+        print(f"Merged {len(changes_data)} changes from {self.changes_path} into the change journal")
+
+    def record_cards(self, rows: Iterable[Tuple[Any, Dict[str, Any]]]) -> int:
+        """
+        Record the current state of changed cards.
+
+        Args:
+            rows: (GrpId, {column: value} without GrpId) pairs
+
+        Returns:
+            Number of rows recorded
+        """
+        records = [(str(grp_id), json.dumps(row)) for grp_id, row in rows]
+        if not records:
+            return 0
+        with self._lock:
+            connection = self._get_connection()
+            with connection:
+                next_seq = connection.execute(
+                    "SELECT COALESCE(MAX(seq), 0) + 1 FROM card_changes"
+                ).fetchone()[0]
+                connection.executemany(
+                    """
+                    INSERT INTO card_changes(grp_id, seq, row_json) VALUES (?, ?, ?)
+                    ON CONFLICT(grp_id) DO UPDATE SET row_json = excluded.row_json
+                    """,
+                    [
+                        (grp_id, next_seq + position, row_json)
+                        for position, (grp_id, row_json) in enumerate(records)
+                    ],
+                )
+                connection.executemany(
+                    "DELETE FROM localization_changes WHERE grp_id = ?",
+                    [(grp_id,) for grp_id, _ in records],
+                )
+        return len(records)
+
+    def record_localization(self, grp_id: Any, loc_id: Any, text: str) -> None:
+        """
+        Record a localization override of an already recorded card.
+
+        Raises:
+            KeyError: If the card has not been recorded
+        """
+        with self._lock:
+            connection = self._get_connection()
+            with connection:
+                if connection.execute(
+                    "SELECT 1 FROM card_changes WHERE grp_id = ?", (str(grp_id),)
+                ).fetchone() is None:
+                    raise KeyError(grp_id)
+                next_seq = connection.execute(
+                    "SELECT COALESCE(MAX(seq), 0) + 1 FROM localization_changes WHERE grp_id = ?",
+                    (str(grp_id),),
+                ).fetchone()[0]
+                connection.execute(
+                    """
+                    INSERT INTO localization_changes(grp_id, loc_id, seq, text) VALUES (?, ?, ?, ?)
+                    ON CONFLICT(grp_id, loc_id) DO UPDATE SET text = excluded.text
+                    """,
+                    (str(grp_id), str(loc_id), next_seq, text),
+                )
+
+    def changes(self) -> Dict[str, Dict[str, Any]]:
+        """Return every recorded change in the changes.json layout."""
+        with self._lock:
+            connection = self._get_connection()
+            changes_data = {
+                grp_id: json.loads(row_json)
+                for grp_id, row_json in connection.execute(
+                    "SELECT grp_id, row_json FROM card_changes ORDER BY seq"
+                )
+            }
+            for grp_id, loc_id, text in connection.execute(
+                "SELECT grp_id, loc_id, text FROM localization_changes ORDER BY grp_id, seq"
+            ):
+                if grp_id in changes_data:
+                    changes_data[grp_id].setdefault("Localizations_enUS", {})[loc_id] = text
+            return changes_data
+
+    def count(self) -> int:
+        """Return the number of recorded cards."""
+        with self._lock:
+            return self._get_connection().execute("SELECT COUNT(*) FROM card_changes").fetchone()[0]
+
+    def export_json(self, output_path: Optional[Union[str, Path]] = None) -> int:
+        """
+        Write the recorded changes in the changes.json format (indent=4).
+
+        Args:
+            output_path: Where to write; defaults to the journal's changes.json
+
+        Returns:
+            Number of cards written
+        """
+        with self._lock:
+            changes_data = self.changes()
+            target = Path(output_path) if output_path else self.changes_path
+            temp_path = target.with_name(target.name + ".tmp")
+            with open(temp_path, "w") as output_file:
+                json.dump(changes_data, output_file, indent=4)
+            os.replace(temp_path, target)
+            if target == self.changes_path:
+                with self._connection:
+                    self._set_meta("json_stat", self._json_stat_key())
+            return len(changes_data)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+_journals: Dict[str, ChangeJournal] = {}
+_journals_lock = threading.Lock()
+
+
+def get_change_journal(changes_path: Union[str, Path]) -> ChangeJournal:
+    """
+    Return the shared journal of a changes.json path, creating it on first use.
+
+    Args:
+        changes_path: Path to changes.json
+
+    Returns:
+        ChangeJournal shared by every caller using the same path
+    """
+    key = str(Path(changes_path).resolve())
+    with _journals_lock:
+        journal = _journals.get(key)
+        if journal is None:
+            journal = ChangeJournal(changes_path)
+            _journals[key] = journal
+        return journal
+
+
+def load_changes(changes_path: Union[str, Path]) -> Dict[str, Dict[str, Any]]:
+    """
+    Read a changes file, through its journal if it has one.
+
+    Preset files without a journal are read as plain JSON.
+    """
+    if journal_path_for(changes_path).exists():
+        return get_change_journal(changes_path).changes()
+    with open(changes_path, "r") as changes_file:
+        return json.load(changes_file)
@@ -35,6 +35,8 @@ import FreeSimpleGUI as sg
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
+from src.sql_editor import find_art_id_by_card_name
+
 
 class ArtCropData:
     """Represents a single art crop entry from the Crops table."""
@@ -180,39 +182,6 @@ def update_crop_entry(
         return False
 
 
-def find_art_id_by_card_name(
-    card_name: str, database_cursor: sqlite3.Cursor
-) -> List[Tuple[str, str]]:
-    """
-    Search for cards by name and return their ArtIds.
-
-    Args:
-        card_name: Name (or partial name) to search for
-        database_cursor: SQLite cursor for the card database
-
-    Returns:
-        List of tuples (card_name, art_id)
-    """
-    try:
-        # Search in the Cards table with the TitleId linked to Localizations
-        query = """
-            SELECT DISTINCT c.ArtId, l.Loc
-            FROM Cards c
-            LEFT JOIN Localizations_enUS l ON c.TitleId = l.LocId
-            WHERE l.Loc LIKE ? OR c.Order_Title LIKE ?
-        """
-
-        search_pattern = f"%{card_name}%"
-        database_cursor.execute(query, (search_pattern, search_pattern))
-        results = database_cursor.fetchall()
-
-        return [(str(art_id), name) for art_id, name in results if art_id]
-
-    except Exception as e:
-        print(f"Error searching for card: {e}")
-        return []
-
-
 def filter_crops_by_art_id(
     crop_data: List[ArtCropData], art_id: str
 ) -> List[ArtCropData]:
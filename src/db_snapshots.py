@@ -0,0 +1,311 @@
+# Card database snapshots for MTGA Swapper
+# Copies the live game database with SQLite's online backup API (a few pages per step, so
+# readers are never blocked for long), stores the copy gzip-compressed with retention
+# limits, and restores a snapshot as one page-level backup into the live database.
+
+import gzip
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+from src.backup_store import BACKUP_DIRECTORY
+
+SNAPSHOT_DIRECTORY = BACKUP_DIRECTORY / "db_snapshots"
+MANIFEST_NAME = "snapshots.json"
+SNAPSHOT_SUFFIX = ".sqlite.gz"
+
+# Pages copied per backup step; the source is unlocked between steps
+PAGES_PER_STEP = 1024
+# Snapshots are taken right before a bulk operation, so favour speed over ratio
+COMPRESSION_LEVEL = 1
+CHUNK_SIZE = 1024 * 1024
+
+DEFAULT_MAX_SNAPSHOTS = 5
+DEFAULT_MAX_TOTAL_BYTES = 2 * 1024 * 1024 * 1024
+
+
+def _safe_label(label: str) -> str:
+    cleaned = "".join(char if char.isalnum() or char in "-_" else "-" for char in label)
+    return cleaned.strip("-")[:40] or "snapshot"
+
+
+class SnapshotStore:
+    """
+    Compressed snapshots of the game database with count and size retention.
+
+    snapshots.json lists every snapshot (id, label, source database, time,
+    page count, sizes), newest last. Taking a snapshot prunes the oldest ones
+    beyond max_snapshots or max_total_bytes.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path] = SNAPSHOT_DIRECTORY,
+        max_snapshots: int = DEFAULT_MAX_SNAPSHOTS,
+        max_total_bytes: int = DEFAULT_MAX_TOTAL_BYTES,
+    ) -> None:
+        self.directory = Path(directory)
+        self.max_snapshots = max_snapshots
+        self.max_total_bytes = max_total_bytes
+        self._lock = threading.RLock()
+
+    def _manifest_path(self) -> Path:
+        return self.directory / MANIFEST_NAME
+
+    def _read_manifest(self) -> List[dict]:
+        try:
+            with open(self._manifest_path(), "r") as manifest_file:
+                return json.load(manifest_file)
+        except (OSError, ValueError):
+            return []
+
+    def _write_manifest(self, snapshots: List[dict]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        temp_path = self._manifest_path().with_suffix(".tmp")
+        with open(temp_path, "w") as manifest_file:
+            json.dump(snapshots, manifest_file, indent=4)
+        os.replace(temp_path, self._manifest_path())
+
+    def list(self) -> List[dict]:
+        """Return the snapshots, newest first."""
+        with self._lock:
+            return list(reversed(self._read_manifest()))
+
+    def get(self, snapshot_id: str) -> dict:
+        """
+        Return one snapshot's manifest entry.
+
+        Raises:
+            KeyError: If there is no such snapshot
+        """
+        with self._lock:
+            for snapshot in self._read_manifest():
+                if snapshot["id"] == snapshot_id:
+                    return snapshot
+        raise KeyError(snapshot_id)
+
+    def take(
+        self,
+        source: sqlite3.Connection,
+        label: str,
+        database_file_path: Optional[str] = None,
+        on_progress: Optional[Callable[[int, int, str], None]] = None,
+    ) -> dict:
+        """
+        Snapshot a database through an open connection.
+
+        Args:
+            source: Connection to the live database (e.g. the writer connection,
+                so no write can interleave with the copy)
+            label: Short description, e.g. the operation about to run
+            database_file_path: Recorded in the manifest for display
+            on_progress: Callback receiving (current, total, message) per backup step
+
+        Returns:
+            Manifest entry of the new snapshot
+        """
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            created = time.time()
+            timestamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(created))
+            snapshot_id = f"{timestamp}-{int(created * 1000) % 1000:03d}_{_safe_label(label)}"
+            snapshot_path = self.directory / f"{snapshot_id}{SNAPSHOT_SUFFIX}"
+
+            def report(status, remaining, total):
+                if on_progress:
+                    on_progress(total - remaining, total, "Snapshotting database")
+
+            handle, copy_path = tempfile.mkstemp(suffix=".sqlite", dir=self.directory)
+            os.close(handle)
+            try:
+                destination = sqlite3.connect(copy_path)
+                try:
+                    source.backup(destination, pages=PAGES_PER_STEP, progress=report)
+                    page_count = destination.execute("PRAGMA page_count").fetchone()[0]
+                finally:
+                    destination.close()
+                size = os.path.getsize(copy_path)
+
+                temp_snapshot_path = snapshot_path.with_name(snapshot_path.name + ".tmp")
+                with open(copy_path, "rb") as copy_file, gzip.open(
+                    temp_snapshot_path, "wb", compresslevel=COMPRESSION_LEVEL
+                ) as snapshot_file:
+                    shutil.copyfileobj(copy_file, snapshot_file, CHUNK_SIZE)
+                os.replace(temp_snapshot_path, snapshot_path)
+            finally:
+                os.unlink(copy_path)
+
+            snapshot = {
+                "id": snapshot_id,
+                "label": label,
+                "database": database_file_path,
+                "created": created,
+                "pages": page_count,
+                "size": size,
+                "compressed_size": snapshot_path.stat().st_size,
+                "file": snapshot_path.name,
+            }
+            snapshots = self._read_manifest()
+            snapshots.append(snapshot)
+            self._write_manifest(self._prune(snapshots))
+            print(
+                f"Snapshot {snapshot_id}: {page_count} pages, "
+                f"{size // 1024} KiB -> {snapshot['compressed_size'] // 1024} KiB"
+            )
+            return snapshot
+
+    def _prune(self, snapshots: List[dict]) -> List[dict]:
+        """Drop the oldest snapshots beyond the count and size limits (the newest is always kept)."""
+        kept = list(snapshots)
+        while len(kept) > 1 and (
+            len(kept) > self.max_snapshots
+            or sum(snapshot["compressed_size"] for snapshot in kept) > self.max_total_bytes
+        ):
+            oldest = kept.pop(0)
+            try:
+                (self.directory / oldest["file"]).unlink()
+            except FileNotFoundError:
+                pass
+            print(f"Removed old snapshot {oldest['id']}")
+        return kept
+
+    def delete(self, snapshot_id: str) -> None:
+        """
+        Delete a snapshot.
+
+        Raises:
+            KeyError: If there is no such snapshot
+        """
+        with self._lock:
+            snapshot = self.get(snapshot_id)
+            try:
+                (self.directory / snapshot["file"]).unlink()
+            except FileNotFoundError:
+                pass
+            self._write_manifest([s for s in self._read_manifest() if s["id"] != snapshot_id])
+
+    def restore(self, snapshot_id: str, target: sqlite3.Connection) -> dict:
+        """
+        Replace the live database's contents with a snapshot.
+
+        The snapshot is decompressed to a temporary file and copied into the
+        target with one backup step (every page at once), inside a single
+        write lock on the target.
+
+        Args:
+            snapshot_id: Snapshot to restore
+            target: Writer connection of the live database
+
+        Returns:
+            Manifest entry of the restored snapshot
+
+        Raises:
+            KeyError: If there is no such snapshot
+        """
+        with self._lock:
+            snapshot = self.get(snapshot_id)
+            handle, copy_path = tempfile.mkstemp(suffix=".sqlite", dir=self.directory)
+            os.close(handle)
+            try:
+                with gzip.open(self.directory / snapshot["file"], "rb") as snapshot_file, open(
+                    copy_path, "wb"
+                ) as copy_file:
+                    shutil.copyfileobj(snapshot_file, copy_file, CHUNK_SIZE)
+                source = sqlite3.connect(copy_path)
+                try:
+                    if target.in_transaction:
+                        target.commit()
+                    source.backup(target, pages=-1)
+                finally:
+                    source.close()
+            finally:
+                os.unlink(copy_path)
+            print(f"Restored snapshot {snapshot_id} ({snapshot['pages']} pages)")
+            return snapshot
+
+    def stats(self) -> dict:
+        with self._lock:
+            snapshots = self._read_manifest()
+        return {
+            "count": len(snapshots),
+            "bytes": sum(snapshot["compressed_size"] for snapshot in snapshots),
+            "max_snapshots": self.max_snapshots,
+            "max_total_bytes": self.max_total_bytes,
+        }
+
+
+_stores: Dict[str, SnapshotStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_snapshot_store(directory: Union[str, Path] = SNAPSHOT_DIRECTORY) -> SnapshotStore:
+    """
+    Return the shared snapshot store of a directory, creating it on first use.
+
+    Args:
+        directory: Snapshot directory (defaults to ~/MTGA_Swapper_Backups/db_snapshots)
+
+    Returns:
+        SnapshotStore shared by every caller using the same directory
+    """
+    key = str(Path(directory))
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = SnapshotStore(directory)
+            _stores[key] = store
+        return store
+
+
+def snapshot_before(function: Callable, label: str, database_file_path: Optional[str] = None) -> Callable:
+    """
+    Wrap a writer job so it snapshots the database before running.
+
+    The snapshot is taken on the writer connection, so nothing can be written
+    between the snapshot and the job.
+
+    Args:
+        function: Writer job, called as function(cursor, connection, *args)
+        label: Snapshot label (usually the operation name)
+        database_file_path: Recorded in the snapshot manifest
+
+    Returns:
+        Writer job with the same signature
+    """
+
+    take_snapshot = snapshot_hook(label, database_file_path)
+
+    def job(cursor: sqlite3.Cursor, connection: sqlite3.Connection, *args):
+        take_snapshot(connection)
+        return function(cursor, connection, *args)
+
+    return job
+
+
+def snapshot_hook(label: str, database_file_path: Optional[str] = None) -> Callable[[sqlite3.Connection], None]:
+    """
+    Return a callback that snapshots the database through the connection it is given.
+
+    For writer jobs that only know whether they will write after a read-only
+    stage (e.g. restore_changes' before_write), so unchanged data costs no snapshot.
+
+    Args:
+        label: Snapshot label (usually the operation name)
+        database_file_path: Recorded in the snapshot manifest
+
+    Returns:
+        Callback taking the writer connection
+    """
+
+    def take_snapshot(connection: sqlite3.Connection) -> None:
+        if connection.in_transaction:
+            connection.commit()
+        get_snapshot_store().take(connection, label, database_file_path)
+
+    return take_snapshot
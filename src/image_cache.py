@@ -0,0 +1,177 @@
+# On-disk cache of encoded card images for MTGA Swapper
+# Stores already-encoded image bytes keyed by bundle file name, mtime and size
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Union
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+CACHE_FILE_SUFFIX = ".img"
+
+
+class ImageCache:
+    """
+    Size-bounded LRU cache of encoded images stored as files.
+
+    Entries are named "<bundle file name>.<digest>.img" where the digest covers
+    the bundle's mtime, size and the image variant. A rewritten bundle therefore
+    never serves a stale image, and all entries of a bundle can be dropped at once.
+    """
+
+    def __init__(
+        self, cache_directory: Union[str, Path], max_bytes: int = DEFAULT_MAX_BYTES
+    ) -> None:
+        self.cache_directory = Path(cache_directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._loaded = False
+
+    def _load(self) -> None:
+        """Rebuild the LRU order from the files already on disk."""
+        self._loaded = True
+        self.cache_directory.mkdir(parents=True, exist_ok=True)
+        files = []
+        for entry in os.scandir(self.cache_directory):
+            if entry.name.endswith(CACHE_FILE_SUFFIX):
+                stat_result = entry.stat()
+                files.append((stat_result.st_mtime_ns, entry.name, stat_result.st_size))
+        for _, file_name, size in sorted(files):
+            self._entries[file_name] = size
+            self._total_bytes += size
+
+    @staticmethod
+    def make_key(bundle_file_path: Union[str, Path], variant: str = "full") -> Optional[str]:
+        """
+        Build the cache key for an image rendered from a bundle.
+
+        Args:
+            bundle_file_path: Path to the .mtga bundle the image comes from
+            variant: Name of the rendered variant (size/format)
+
+        Returns:
+            Cache key, or None if the bundle cannot be stat'ed
+        """
+        try:
+            stat_result = os.stat(bundle_file_path)
+        except OSError:
+            return None
+        digest = hashlib.sha1(
+            f"{stat_result.st_mtime_ns}:{stat_result.st_size}:{variant}".encode("utf-8")
+        ).hexdigest()[:20]
+        return f"{Path(bundle_file_path).name}.{digest}{CACHE_FILE_SUFFIX}"
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Read a cached image and mark it as recently used.
+
+        Args:
+            key: Key returned by make_key
+
+        Returns:
+            Encoded image bytes, or None on a cache miss
+        """
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+
+        file_path = self.cache_directory / key
+        try:
+            with open(file_path, "rb") as cache_file:
+                data = cache_file.read()
+            os.utime(file_path)
+        except OSError:
+            with self._lock:
+                self._total_bytes -= self._entries.pop(key, 0)
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """
+        Store encoded image bytes and evict least recently used entries over budget.
+
+        Args:
+            key: Key returned by make_key
+            data: Encoded image bytes
+        """
+        if len(data) > self.max_bytes:
+            return
+
+        with self._lock:
+            if not self._loaded:
+                self._load()
+
+            file_path = self.cache_directory / key
+            temp_path = file_path.with_name(file_path.name + ".tmp")
+            try:
+                with open(temp_path, "wb") as cache_file:
+                    cache_file.write(data)
+                os.replace(temp_path, file_path)
+            except OSError as error:
+                print(f"Error writing image cache entry: {error}")
+                return
+
+            self._total_bytes -= self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            self._total_bytes += len(data)
+            self._evict()
+
+    def _evict(self) -> None:
+        while self._total_bytes > self.max_bytes and self._entries:
+            file_name, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.remove(self.cache_directory / file_name)
+            except OSError:
+                pass
+
+    def invalidate_bundle(self, bundle_file_name: str) -> int:
+        """
+        Drop every cached image rendered from a bundle.
+
+        Args:
+            bundle_file_name: File name of the bundle (without directory)
+
+        Returns:
+            Number of entries removed
+        """
+        prefix = f"{bundle_file_name}."
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            stale_keys = [key for key in self._entries if key.startswith(prefix)]
+            for key in stale_keys:
+                self._total_bytes -= self._entries.pop(key)
+                try:
+                    os.remove(self.cache_directory / key)
+                except OSError:
+                    pass
+        return len(stale_keys)
+
+    def stats(self) -> dict:
+        """Return entry count, byte usage and hit/miss counters."""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
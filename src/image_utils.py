@@ -3,6 +3,7 @@
 
 from PIL import Image
 import io
+import numpy as np
 from typing import Union, Tuple, Optional
 
 
@@ -122,6 +123,104 @@ def convert_texture_to_bytes(texture_image: Optional[Image.Image]) -> Optional[b
     return None
 
 
+def count_unique_colors(image: Image.Image) -> int:
+    """
+    Count the distinct pixel values of an image using a packed uint32 view.
+
+    Equivalent to len(set(image.getdata())) without building a Python tuple
+    per pixel.
+
+    Args:
+        image: PIL Image object
+
+    Returns:
+        Number of distinct colours (including alpha for images with alpha)
+    """
+    if image.mode not in ("L", "RGB", "RGBA"):
+        image = image.convert("RGBA")
+
+    pixels = np.asarray(image)
+    if image.mode == "L":
+        return int(np.count_nonzero(np.bincount(pixels.ravel(), minlength=256)))
+
+    channels = pixels.reshape(-1, pixels.shape[-1]).astype(np.uint32)
+    packed = (channels[:, 0] << 16) | (channels[:, 1] << 8) | channels[:, 2]
+
+    if image.mode == "RGBA":
+        packed |= channels[:, 3] << 24
+
+    # Sorting and counting boundaries is far cheaper than np.unique's bookkeeping
+    packed.sort()
+    return int(np.count_nonzero(packed[1:] != packed[:-1])) + int(packed.size > 0)
+
+
+# Supported output formats: query value -> (PIL format name, media type)
+IMAGE_OUTPUT_FORMATS = {
+    "png": ("PNG", "image/png"),
+    "jpeg": ("JPEG", "image/jpeg"),
+    "jpg": ("JPEG", "image/jpeg"),
+    "webp": ("WEBP", "image/webp"),
+}
+
+
+def encode_image(
+    image: Image.Image, image_format: str = "png", quality: int = 85
+) -> Tuple[bytes, str]:
+    """
+    Encode a PIL Image into bytes in the requested output format.
+
+    Args:
+        image: PIL Image object
+        image_format: One of the keys of IMAGE_OUTPUT_FORMATS
+        quality: Quality for lossy formats (JPEG/WebP)
+
+    Returns:
+        Tuple of (encoded_bytes, media_type)
+    """
+    pil_format, media_type = IMAGE_OUTPUT_FORMATS[image_format.lower()]
+
+    # JPEG has no alpha or palette support
+    if pil_format == "JPEG" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    image_byte_buffer = io.BytesIO()
+    if pil_format == "PNG":
+        image.save(image_byte_buffer, format=pil_format)
+    else:
+        image.save(image_byte_buffer, format=pil_format, quality=quality)
+    return image_byte_buffer.getvalue(), media_type
+
+
+def render_image_variant(
+    image: Union[bytes, Image.Image],
+    width: Optional[int] = None,
+    height: Optional[int] = None,
+    image_format: str = "png",
+) -> Tuple[bytes, str]:
+    """
+    Resize an image to fit optional bounds (never upscaling) and encode it.
+
+    Args:
+        image: PIL Image object or encoded image bytes
+        width: Maximum width, or None for no bound
+        height: Maximum height, or None for no bound
+        image_format: One of the keys of IMAGE_OUTPUT_FORMATS
+
+    Returns:
+        Tuple of (encoded_bytes, media_type)
+    """
+    if isinstance(image, bytes):
+        image = Image.open(io.BytesIO(image))
+
+    if width or height:
+        image = resize_image_to_screen(
+            image,
+            target_width=width or image.size[0],
+            target_height=height or image.size[1],
+        )
+    return encode_image(image, image_format)
+
+
 def resize_image_for_gallery(
     image: Image.Image, target_size: Tuple[int, int] = (200, 200)
 ) -> Image.Image:
@@ -3,7 +3,9 @@ import platform
 import sqlite3
 from pathlib import Path
 import os
-import shutil
+
+from src.change_journal import get_change_journal, load_changes
+from src.preset_restore import restore_changes
 
 
 def save_grp_id_info(
@@ -14,19 +16,21 @@ def save_grp_id_info(
     asset_bundle_path: str,
 ) -> None:
     """
-    Save the information of a list of GrpIds to a JSON file.
+    Save the information of a list of GrpIds to the change journal of a changes JSON file.
+
+    Only rows are recorded here. Bundles get their MOD backup where they are
+    actually rewritten (the art swap endpoint and the set swapper), so a
+    row-only change does not pin the current, unmodified bundle as a
+    modification that would later be restored over a client update.
 
     Args:
         grp_id: The Group ID of the card to load changes for
         user_save_changes_path: Path to the user's save changes JSON file
         cursor: SQLite database cursor
         connection: SQLite database connection
-        asset_bundle_path: Path to the MTGA asset bundle directory
+        asset_bundle_path: Path to the MTGA asset bundle directory (unused, kept for callers)
 
     """
-    with open(user_save_changes_path, "r") as changes_file:
-        changes_data = json.load(changes_file)
-    changes_file.close()
     # Use IN clause with placeholders for multiple GrpIds
     placeholders = ",".join("?" * len(grp_id))
     cursor.execute(f"SELECT * FROM Cards WHERE GrpId IN ({placeholders})", grp_id)
@@ -36,6 +40,7 @@ def save_grp_id_info(
 
     # Fetch all results and format with column names
     rows = cursor.fetchall()
+    changed_rows = []
 
     for row in rows:
         # Create a dictionary for this row with column names as keys
@@ -47,24 +52,11 @@ def save_grp_id_info(
         )  # Remove GrpId from the dict and get its value
 
         # Use GrpId as the key, and the remaining columns as the value
-        changes_data[grp_id_value] = row_dict
-
-        artid = row_dict.get("ArtId")
-        matching_files = [
-            filename
-            for filename in os.listdir(asset_bundle_path)
-            if filename.startswith(str(artid)) and filename.endswith(".mtga")
-        ]
-        if matching_files:
-            shutil.copy(
-                os.path.join(asset_bundle_path, matching_files[0]),
-                Path.home() / "MTGA_Swapper_Backups" / f"MOD_{matching_files[0]}",
-            )
+        changed_rows.append((grp_id_value, row_dict))
 
     connection.commit()
-    with open(user_save_changes_path, "w") as output_file:
-        json.dump(changes_data, output_file, indent=4)
-    output_file.close()
+    # One upsert per card in the change journal; changes.json is exported on demand
+    get_change_journal(user_save_changes_path).record_cards(changed_rows)
 
 
 def change_grp_id(
@@ -73,7 +65,22 @@ def change_grp_id(
     connection,
     json_manual: dict | None = None,
     asset_bundle_path: str | None = None,
-) -> None:
+    on_progress=None,
+) -> dict | None:
+    """
+    Apply a changes file (or one manual row) to the game database.
+
+    Args:
+        change_path: Path to the changes JSON file
+        cursor: SQLite database cursor
+        connection: SQLite database connection
+        json_manual: Single row to apply instead of the file (must include GrpId)
+        asset_bundle_path: Path to the MTGA asset bundle directory
+        on_progress: Callback receiving (current, total, message)
+
+    Returns:
+        Restore report for a changes file, None for a manual row
+    """
     print("Applying changes to the database...")
     if json_manual:
         grp_id = json_manual.pop("GrpId")
@@ -89,41 +96,17 @@ def change_grp_id(
             f"UPDATE Cards SET {set_values} WHERE GrpId = ?",
             list(json_manual.values()) + [grp_id],
         )
-    else:
-        with open(change_path, "r") as changes_file:
-            changes_data = json.load(changes_file)
-        changes_file.close()
-        available_backups = Path.home() / "MTGA_Swapper_Backups"
-        backups = list(available_backups.glob("MOD_*.mtga"))
-        backups.sort(key=os.path.getmtime)
-        for art in backups:
-            matching_files = [
-                filename
-                for filename in os.listdir(asset_bundle_path)
-                if filename.startswith(str(art.name)[4:10])
-                and filename.endswith(".mtga")
-            ]
-            if matching_files:
-                shutil.copy(
-                    art,
-                    os.path.join(asset_bundle_path, matching_files[0]),
-                )
-        for grp_id, new_values in changes_data.items():
-
-            localizations = new_values.pop("Localizations_enUS", None)
-            # Update the database with the new values for the specified GrpId
-            set_values = ", ".join([f"{col} = ?" for col in new_values.keys()])
-            cursor.execute(
-                f"UPDATE Cards SET {set_values} WHERE GrpId = ?",
-                list(new_values.values()) + [grp_id],
-            )
-            if localizations:
-                cursor.executemany(
-                    f"UPDATE Localizations_enUS SET Loc = ? WHERE LocId = ?",
-                    [(text, loc_id) for loc_id, text in localizations.items()],
-                )
+        connection.commit()
+        return None
 
-    connection.commit()
+    # Bundles that differ from their MOD backup, then one transaction of grouped UPDATEs
+    return restore_changes(
+        cursor,
+        connection,
+        load_changes(change_path),
+        asset_bundle_path,
+        on_progress,
+    )
 
 
 def save_loc_id_info(
@@ -131,19 +114,21 @@ def save_loc_id_info(
     loc_id: str,
     new_loc: str,
     grp_id: str | None = None,
-) -> dict[str, str] | dict:
-
-    with open(user_save_changes_path, "r") as changes_file:
-        changes_data = json.load(changes_file)
-    changes_file.close()
-    changes_data[grp_id].setdefault("Localizations_enUS", {})
+) -> dict[str, dict]:
+    """
+    Record a localization override of an already recorded card.
 
-    changes_data[grp_id]["Localizations_enUS"][loc_id] = new_loc
+    Args:
+        user_save_changes_path: Path to the user's save changes JSON file
+        loc_id: LocId of the changed text
+        new_loc: New text
+        grp_id: GrpId of the card the text belongs to
 
-    with open(user_save_changes_path, "w") as output_file:
-        json.dump(changes_data, output_file, indent=4)
-    output_file.close()
-    return changes_data
+    Returns:
+        The recorded change in the changes.json layout ({GrpId: {"Localizations_enUS": {LocId: text}}})
+    """
+    get_change_journal(user_save_changes_path).record_localization(grp_id, loc_id, new_loc)
+    return {str(grp_id): {"Localizations_enUS": {str(loc_id): new_loc}}}
 
 
 # Credit to Bassiuz for the improved MTGA path detection logic
@@ -0,0 +1,285 @@
+# Preset restore engine for MTGA Swapper
+# Re-applies a changes file: modified bundles come back from the backup store (only the
+# ones that differ), then the Cards rows that differ from the live database are written
+# as one executemany per distinct column set, all in one transaction.
+
+import hashlib
+import json
+import re
+import sqlite3
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.backup_store import MOD, get_backup_store
+from src.bundle_index import get_bundle_index
+
+ProgressCallback = Callable[[int, int, str], None]
+
+# Rows per executemany call (progress is reported between batches)
+BATCH_SIZE = 2000
+
+LOCALIZATION_UPDATE = "UPDATE Localizations_enUS SET Loc = ? WHERE LocId = ?"
+
+# GrpIds / LocIds per live-row lookup (below SQLite's bound-parameter limit)
+LOOKUP_CHUNK_SIZE = 500
+
+# Text that SQLite would store as a number in a numeric column ("5", "-1.5", "2e3")
+NUMERIC_TEXT = re.compile(r"-?\d+(\.\d*)?([eE][-+]?\d+)?")
+
+
+def quote_identifier(name: str) -> str:
+    """Quote a column name for use in SQL."""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def table_columns(cursor: sqlite3.Cursor, table: str) -> List[str]:
+    """Return the column names of a table."""
+    return [row[1] for row in cursor.execute(f"PRAGMA table_info({quote_identifier(table)})")]
+
+
+def group_updates(
+    changes_data: Dict[str, Dict[str, Any]],
+    known_columns: Optional[List[str]] = None,
+) -> Tuple[Dict[Tuple[str, ...], List[tuple]], List[Tuple[Any, Any]], List[str]]:
+    """
+    Group recorded rows by the set of columns they assign.
+
+    Rows from one changes file almost always share a column set (a full Cards
+    row), so this usually yields a single group.
+
+    Args:
+        changes_data: Changes in the changes.json layout (not modified)
+        known_columns: Columns of the Cards table; others are dropped (e.g.
+            a column removed by a game update)
+
+    Returns:
+        Tuple of ({columns: [(values..., GrpId)]}, [(text, LocId)], dropped column names)
+    """
+    known = set(known_columns) if known_columns is not None else None
+    groups: Dict[Tuple[str, ...], List[tuple]] = {}
+    localizations: List[Tuple[Any, Any]] = []
+    dropped = set()
+    for grp_id, row in changes_data.items():
+        columns = []
+        values = []
+        for column, value in row.items():
+            if column == "Localizations_enUS":
+                localizations.extend((text, loc_id) for loc_id, text in (value or {}).items())
+            elif column == "GrpId":
+                continue
+            elif known is not None and column not in known:
+                dropped.add(column)
+            else:
+                columns.append(column)
+                values.append(value)
+        if columns:
+            groups.setdefault(tuple(columns), []).append((*values, grp_id))
+    return groups, localizations, sorted(dropped)
+
+
+def normalize_value(value: Any) -> Optional[str]:
+    """
+    Normalize a column value for comparison, the way SQLite's column affinity
+    equates them: numbers compare by value whatever their type or spelling
+    (1, 1.0, "1" and "1.0" match), other values as text; None stays NULL.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        if not NUMERIC_TEXT.fullmatch(value):
+            return value
+        value = float(value) if any(character in value for character in ".eE") else int(value)
+    if isinstance(value, float):
+        if value.is_integer() and abs(value) < 2**63:
+            return str(int(value))
+        return repr(value)
+    if isinstance(value, int):
+        return str(int(value))
+    return str(value)
+
+
+def fingerprint(values) -> bytes:
+    """Fingerprint a sequence of column values (see normalize_value)."""
+    normalized = [normalize_value(value) for value in values]
+    return hashlib.blake2b(json.dumps(normalized).encode("utf-8"), digest_size=16).digest()
+
+
+def _live_rows(cursor: sqlite3.Cursor, select_sql: str, keys: List[Any]):
+    for start in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+        chunk = keys[start : start + LOOKUP_CHUNK_SIZE]
+        placeholders = ",".join("?" * len(chunk))
+        yield from cursor.execute(select_sql.format(placeholders=placeholders), chunk)
+
+
+def diff_updates(
+    cursor: sqlite3.Cursor,
+    groups: Dict[Tuple[str, ...], List[tuple]],
+    localizations: List[Tuple[Any, Any]],
+) -> Tuple[Dict[Tuple[str, ...], List[tuple]], List[Tuple[Any, Any]], dict]:
+    """
+    Drop the updates that would not change the live database.
+
+    Each recorded row is fingerprinted against the live Cards row (only the
+    columns it assigns); localizations are compared with every live row of
+    their LocId. Rows and LocIds the live database no longer has are counted
+    as missing and their LocIds listed, since an UPDATE cannot restore them.
+
+    Args:
+        cursor: SQLite database cursor
+        groups: Row updates from group_updates
+        localizations: (text, LocId) updates from group_updates
+
+    Returns:
+        Tuple of (differing row groups, differing localizations, counts dict with
+        cards_changed / cards_unchanged / cards_missing,
+        localizations_changed / localizations_unchanged / localizations_missing
+        and missing_loc_ids)
+    """
+    counts = {
+        "cards_changed": 0,
+        "cards_unchanged": 0,
+        "cards_missing": 0,
+        "localizations_changed": 0,
+        "localizations_unchanged": 0,
+        "localizations_missing": 0,
+        "missing_loc_ids": [],
+    }
+    changed_groups: Dict[Tuple[str, ...], List[tuple]] = {}
+    for columns, rows in groups.items():
+        column_sql = ", ".join(quote_identifier(column) for column in columns)
+        live = {
+            str(row[0]): fingerprint(row[1:])
+            for row in _live_rows(
+                cursor,
+                f"SELECT GrpId, {column_sql} FROM Cards WHERE GrpId IN ({{placeholders}})",
+                [row[-1] for row in rows],
+            )
+        }
+        for row in rows:
+            live_fingerprint = live.get(str(row[-1]))
+            if live_fingerprint is None:
+                counts["cards_missing"] += 1
+            elif live_fingerprint == fingerprint(row[:-1]):
+                counts["cards_unchanged"] += 1
+            else:
+                changed_groups.setdefault(columns, []).append(row)
+                counts["cards_changed"] += 1
+
+    live_texts: Dict[str, set] = {}
+    for loc_id, text in _live_rows(
+        cursor,
+        "SELECT LocId, Loc FROM Localizations_enUS WHERE LocId IN ({placeholders})",
+        list({loc_id for _, loc_id in localizations}),
+    ):
+        live_texts.setdefault(str(loc_id), set()).add(text)
+    changed_localizations = []
+    for text, loc_id in localizations:
+        texts = live_texts.get(str(loc_id))
+        if texts is None:
+            counts["localizations_missing"] += 1
+            counts["missing_loc_ids"].append(str(loc_id))
+        elif texts == {text}:
+            counts["localizations_unchanged"] += 1
+        else:
+            changed_localizations.append((text, loc_id))
+            counts["localizations_changed"] += 1
+    return changed_groups, changed_localizations, counts
+
+
+def restore_changes(
+    cursor: sqlite3.Cursor,
+    connection: sqlite3.Connection,
+    changes_data: Dict[str, Dict[str, Any]],
+    asset_bundle_path: Optional[str] = None,
+    on_progress: Optional[ProgressCallback] = None,
+    dry_run: bool = False,
+    before_write: Optional[Callable[[sqlite3.Connection], None]] = None,
+) -> dict:
+    """
+    Re-apply recorded changes to the game database and AssetBundle folder.
+
+    Bundles are restored first (not transactional: they are whole-file
+    replacements), skipping those whose hash already matches. Rows and
+    localizations already equal to the recorded values are skipped; the rest
+    are written in one transaction that is rolled back if any statement fails.
+
+    Args:
+        cursor: SQLite database cursor
+        connection: SQLite database connection
+        changes_data: Changes in the changes.json layout
+        asset_bundle_path: Path to the MTGA AssetBundle directory (None skips bundles)
+        on_progress: Callback receiving (current, total, message)
+        dry_run: Only compute the report; nothing is written
+        before_write: Called with the connection once the diff stage has found
+            rows to write (e.g. to snapshot the database), not when nothing changed
+
+    Returns:
+        Report dict: cards/localizations recorded, changed, unchanged and
+        missing, statements run, bundles restored and unchanged
+    """
+    report = {
+        "cards": len(changes_data),
+        "statements": 0,
+        "localizations": 0,
+        "bundles_restored": 0,
+        "bundles_unchanged": 0,
+        "dropped_columns": [],
+    }
+
+    if asset_bundle_path:
+        bundle_index = get_bundle_index(asset_bundle_path)
+        restored, unchanged = get_backup_store().restore_all(
+            MOD, bundle_index.find_path, on_progress, dry_run=dry_run
+        )
+        report["bundles_restored"] = restored
+        report["bundles_unchanged"] = unchanged
+
+    groups, localizations, dropped = group_updates(changes_data, table_columns(cursor, "Cards"))
+    if dropped:
+        print(f"Skipping columns no longer in the Cards table: {', '.join(dropped)}")
+    report["dropped_columns"] = dropped
+    report["localizations"] = len(localizations)
+    groups, localizations, counts = diff_updates(cursor, groups, localizations)
+    report.update(counts)
+    report["statements"] = len(groups)
+    if counts["missing_loc_ids"]:
+        print(
+            f"{counts['localizations_missing']} recorded localizations have no row in the database "
+            f"(LocIds {', '.join(counts['missing_loc_ids'][:20])}"
+            f"{', ...' if len(counts['missing_loc_ids']) > 20 else ''})"
+        )
+    if dry_run:
+        return report
+    if before_write and (groups or localizations):
+        before_write(connection)
+
+    total = sum(len(rows) for rows in groups.values()) + len(localizations)
+    done = 0
+    try:
+        for columns, rows in groups.items():
+            set_values = ", ".join(f"{quote_identifier(column)} = ?" for column in columns)
+            statement = f"UPDATE Cards SET {set_values} WHERE GrpId = ?"
+            for start in range(0, len(rows), BATCH_SIZE):
+                batch = rows[start : start + BATCH_SIZE]
+                cursor.executemany(statement, batch)
+                done += len(batch)
+                if on_progress:
+                    on_progress(done, total, "Applying cards")
+        for start in range(0, len(localizations), BATCH_SIZE):
+            batch = localizations[start : start + BATCH_SIZE]
+            cursor.executemany(LOCALIZATION_UPDATE, batch)
+            done += len(batch)
+            if on_progress:
+                on_progress(done, total, "Applying localizations")
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+
+    print(
+        f"Applied {report['cards_changed']} of {report['cards']} cards "
+        f"({report['cards_unchanged']} unchanged, {report['cards_missing']} missing) in "
+        f"{report['statements']} statement groups, {report['localizations_changed']} of "
+        f"{report['localizations']} localizations ({report['localizations_missing']} missing), restored {report['bundles_restored']} bundles "
+        f"({report['bundles_unchanged']} unchanged)"
+    )
+    return report
@@ -0,0 +1,389 @@
+# Scryfall HTTP client for MTGA Swapper
+# One pooled requests.Session shared by a bounded worker pool, a shared rate limit with
+# retries, and a size-bounded on-disk response cache keyed by URL and revalidated with
+# ETag / Last-Modified, so repeated set swaps do not download the same JSON and images again.
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, TypeVar, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.backup_store import copy_file
+
+DEFAULT_BASE_URL = "https://api.scryfall.com"
+CACHE_DIRECTORY = Path.home() / ".mtga_swapper" / "cache" / "scryfall"
+USER_CONFIG_FILE = Path.home() / ".mtga_swapper" / "config.json"
+
+DEFAULT_MAX_WORKERS = 8
+# Scryfall asks for 50-100 ms between requests
+DEFAULT_REQUESTS_PER_SECOND = 10.0
+DEFAULT_RETRIES = 3
+DEFAULT_TIMEOUT = 30.0
+# Cached responses younger than this are used without asking the server
+DEFAULT_FRESH_SECONDS = 6 * 60 * 60
+# Card images dominate the cache; least recently used responses are evicted past this
+DEFAULT_MAX_CACHE_BYTES = 512 * 1024 * 1024
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+BACKOFF_SECONDS = 0.5
+CHUNK_SIZE = 64 * 1024
+USER_AGENT = "MTGA-Swapper/1.0"
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class RateLimiter:
+    """Spaces calls at least 1 / rate seconds apart across all threads."""
+
+    def __init__(self, requests_per_second: float) -> None:
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self._next_time = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_time)
+            self._next_time = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class ScryfallClient:
+    """
+    HTTP client for the Scryfall API and its image CDN.
+
+    Every request goes through one Session (connection pooling), the shared
+    rate limiter and the retry loop. GET responses are cached on disk under
+    the SHA-256 of their URL: a body file plus a small JSON file with the
+    ETag / Last-Modified validators. Fresh entries are served without a
+    request; stale ones are revalidated and a 304 reuses the cached body.
+    Like ImageCache, the cache is an LRU bounded by max_cache_bytes (body
+    sizes), rebuilt from file mtimes on first use.
+
+    URLs under DEFAULT_BASE_URL (including the next_page and uri links that
+    Scryfall returns) are rewritten to `base_url`, so the client can be
+    pointed at a mirror or a local stub server.
+    """
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_BASE_URL,
+        cache_directory: Optional[Union[str, Path]] = CACHE_DIRECTORY,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+        retries: int = DEFAULT_RETRIES,
+        timeout: float = DEFAULT_TIMEOUT,
+        fresh_seconds: float = DEFAULT_FRESH_SECONDS,
+        max_cache_bytes: int = DEFAULT_MAX_CACHE_BYTES,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.cache_directory = Path(cache_directory) if cache_directory else None
+        self.max_workers = max(1, max_workers)
+        self.retries = retries
+        self.timeout = timeout
+        self.fresh_seconds = fresh_seconds
+        self.max_cache_bytes = max_cache_bytes
+        self.rate_limiter = RateLimiter(requests_per_second)
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": USER_AGENT, "Accept": "application/json;q=0.9,*/*;q=0.8"})
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.counters = {
+            "requests": 0,
+            "retries": 0,
+            "cache_fresh": 0,
+            "cache_revalidated": 0,
+            "downloads": 0,
+            "cache_evictions": 0,
+        }
+        self._counters_lock = threading.Lock()
+
+        self._cache_lock = threading.Lock()
+        self._cache_entries: "OrderedDict[str, int]" = OrderedDict()
+        self._cache_bytes = 0
+        self._cache_loaded = False
+
+    def _count(self, counter: str) -> None:
+        with self._counters_lock:
+            self.counters[counter] += 1
+
+    def resolve(self, url: str) -> str:
+        """Rewrite Scryfall API URLs to the configured base URL; relative paths are joined to it."""
+        if url.startswith(DEFAULT_BASE_URL):
+            return self.base_url + url[len(DEFAULT_BASE_URL):]
+        if url.startswith("/"):
+            return self.base_url + url
+        return url
+
+    def _request(self, url: str, headers: Optional[Dict[str, str]] = None, stream: bool = False) -> requests.Response:
+        """GET with rate limiting and retries on connection errors and 429/5xx responses."""
+        for attempt in range(self.retries + 1):
+            self.rate_limiter.wait()
+            self._count("requests")
+            try:
+                response = self.session.get(url, headers=headers, stream=stream, timeout=self.timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt == self.retries:
+                    raise
+                self._count("retries")
+                time.sleep(BACKOFF_SECONDS * 2**attempt)
+                continue
+
+            if response.status_code in RETRY_STATUSES and attempt < self.retries:
+                retry_after = response.headers.get("Retry-After", "")
+                delay = float(retry_after) if retry_after.isdigit() else BACKOFF_SECONDS * 2**attempt
+                response.close()
+                self._count("retries")
+                time.sleep(delay)
+                continue
+            return response
+        raise AssertionError("unreachable")
+
+    def _cache_paths(self, url: str):
+        return self._cache_paths_for_key(hashlib.sha256(url.encode("utf-8")).hexdigest())
+
+    def _cache_paths_for_key(self, key: str):
+        directory = self.cache_directory / key[:2]
+        return directory / f"{key}.body", directory / f"{key}.json"
+
+    def _load_cache(self) -> None:
+        """Rebuild the LRU order from the cached bodies already on disk."""
+        self._cache_loaded = True
+        if not self.cache_directory.is_dir():
+            return
+        bodies = []
+        for body_path in self.cache_directory.glob("*/*.body"):
+            try:
+                stat_result = body_path.stat()
+            except OSError:
+                continue
+            bodies.append((stat_result.st_mtime_ns, body_path.stem, stat_result.st_size))
+        for _, key, size in sorted(bodies):
+            self._cache_entries[key] = size
+            self._cache_bytes += size
+
+    def _touch_cache(self, body_path: Path, size: Optional[int] = None) -> None:
+        """
+        Mark a cached body as most recently used (recording its size if it was
+        just written) and evict least recently used bodies over the budget.
+        """
+        key = body_path.stem
+        with self._cache_lock:
+            if not self._cache_loaded:
+                self._load_cache()
+            if size is None:
+                if key in self._cache_entries:
+                    self._cache_entries.move_to_end(key)
+                    try:
+                        os.utime(body_path)
+                    except OSError:
+                        pass
+                    return
+                # Written by another process since the LRU order was loaded
+                try:
+                    size = body_path.stat().st_size
+                except OSError:
+                    return
+            self._cache_bytes -= self._cache_entries.pop(key, 0)
+            self._cache_entries[key] = size
+            self._cache_bytes += size
+            # The entry just written is always kept, even if it alone is over budget
+            while self._cache_bytes > self.max_cache_bytes and len(self._cache_entries) > 1:
+                evicted_key, evicted_size = self._cache_entries.popitem(last=False)
+                self._cache_bytes -= evicted_size
+                for path in self._cache_paths_for_key(evicted_key):
+                    try:
+                        path.unlink()
+                    except OSError:
+                        pass
+                self._count("cache_evictions")
+
+    def fetch(self, url: str) -> Path:
+        """
+        GET a URL into the response cache and return the cached body file.
+
+        Raises:
+            requests.exceptions.RequestException: On network errors or an error status
+        """
+        url = self.resolve(url)
+        if self.cache_directory is None:
+            raise ValueError("fetch() needs a cache directory")
+        body_path, meta_path = self._cache_paths(url)
+
+        meta = None
+        try:
+            with open(meta_path, "r") as meta_file:
+                meta = json.load(meta_file)
+            if not body_path.exists():
+                meta = None
+        except (OSError, ValueError):
+            pass
+
+        headers = {}
+        if meta:
+            if time.time() - meta.get("fetched", 0) < self.fresh_seconds:
+                self._count("cache_fresh")
+                self._touch_cache(body_path)
+                return body_path
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        with self._request(url, headers=headers, stream=True) as response:
+            if meta and response.status_code == 304:
+                self._count("cache_revalidated")
+                meta["fetched"] = time.time()
+                self._write_meta(meta_path, meta)
+                self._touch_cache(body_path)
+                return body_path
+            response.raise_for_status()
+
+            body_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = body_path.with_name(f"{body_path.name}.{threading.get_ident()}.tmp")
+            with open(temp_path, "wb") as body_file:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    body_file.write(chunk)
+            os.replace(temp_path, body_path)
+            self._count("downloads")
+            size = body_path.stat().st_size
+            self._write_meta(
+                meta_path,
+                {
+                    "url": url,
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "fetched": time.time(),
+                },
+            )
+        self._touch_cache(body_path, size)
+        return body_path
+
+    @staticmethod
+    def _write_meta(meta_path: Path, meta: dict) -> None:
+        temp_path = meta_path.with_name(f"{meta_path.name}.{threading.get_ident()}.tmp")
+        with open(temp_path, "w") as meta_file:
+            json.dump(meta, meta_file)
+        os.replace(temp_path, meta_path)
+
+    def get_json(self, url: str) -> Dict:
+        """
+        GET a JSON document (through the cache if there is one).
+
+        Raises:
+            requests.exceptions.RequestException: On network errors or an error status
+            ValueError: If the body is not JSON
+        """
+        if self.cache_directory is None:
+            with self._request(self.resolve(url)) as response:
+                response.raise_for_status()
+                return response.json()
+        with open(self.fetch(url), "rb") as body_file:
+            return json.load(body_file)
+
+    def download(self, url: str, dest_path: Union[str, Path]) -> None:
+        """
+        Download a file (e.g. a card image) to `dest_path`, through the cache.
+
+        Raises:
+            requests.exceptions.RequestException: On network errors or an error status
+        """
+        if self.cache_directory is None:
+            with self._request(self.resolve(url), stream=True) as response:
+                response.raise_for_status()
+                with open(dest_path, "wb") as dest_file:
+                    for chunk in response.iter_content(CHUNK_SIZE):
+                        dest_file.write(chunk)
+            return
+        copy_file(self.fetch(url), dest_path)
+
+    def get_pages(self, url: str) -> List[Dict]:
+        """Follow a paginated list (data / has_more / next_page) and return every item."""
+        items: List[Dict] = []
+        next_page_url: Optional[str] = url
+        while next_page_url:
+            page = self.get_json(next_page_url)
+            items.extend(page.get("data", []))
+            next_page_url = page.get("next_page") if page.get("has_more", True) else None
+        return items
+
+    def map(self, function: Callable[[T], R], items: Iterable[T]) -> List[R]:
+        """
+        Run `function` over items on at most max_workers threads, keeping input order.
+
+        Requests made by `function` share this client's rate limit.
+        """
+        items = list(items)
+        if len(items) <= 1:
+            return [function(item) for item in items]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(items)), thread_name_prefix="scryfall") as pool:
+            return list(pool.map(function, items))
+
+    def stats(self) -> dict:
+        with self._counters_lock:
+            counters = dict(self.counters)
+        with self._cache_lock:
+            if self.cache_directory is not None and not self._cache_loaded:
+                self._load_cache()
+            counters["cache_entries"] = len(self._cache_entries)
+            counters["cache_bytes"] = self._cache_bytes
+            counters["max_cache_bytes"] = self.max_cache_bytes
+        return counters
+
+    def close(self) -> None:
+        self.session.close()
+
+
+_clients: Dict[str, ScryfallClient] = {}
+_clients_lock = threading.Lock()
+
+
+def load_client_settings() -> dict:
+    """
+    Read the client settings from ~/.mtga_swapper/config.json.
+
+    Keys: "ScryfallBaseUrl", "ScryfallWorkers", "ScryfallRequestsPerSecond", "ScryfallCacheSizeMB".
+    """
+    try:
+        with open(USER_CONFIG_FILE, "r") as config_file:
+            config = json.load(config_file)
+    except (OSError, ValueError):
+        config = {}
+    return {
+        "base_url": config.get("ScryfallBaseUrl") or DEFAULT_BASE_URL,
+        "max_workers": int(config.get("ScryfallWorkers") or DEFAULT_MAX_WORKERS),
+        "requests_per_second": float(config.get("ScryfallRequestsPerSecond") or DEFAULT_REQUESTS_PER_SECOND),
+        "max_cache_bytes": int(config.get("ScryfallCacheSizeMB") or 0) * 1024 * 1024 or DEFAULT_MAX_CACHE_BYTES,
+    }
+
+
+def get_scryfall_client(base_url: Optional[str] = None) -> ScryfallClient:
+    """
+    Return the shared client for a base URL, creating it on first use.
+
+    Args:
+        base_url: API base URL; defaults to "ScryfallBaseUrl" in config.json or api.scryfall.com
+
+    Returns:
+        ScryfallClient shared by every caller using the same base URL
+    """
+    settings = load_client_settings()
+    if base_url:
+        settings["base_url"] = base_url
+    key = settings["base_url"].rstrip("/")
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = ScryfallClient(**settings)
+            _clients[key] = client
+        return client
@@ -1,7 +1,6 @@
 """ "Adapted from https://github.com/Bassiuz/MTGA-Arena-Set-Swapper, check his project out!"""
 
 # fmt: off
-import time
 import json
 import shutil
 import os
@@ -13,24 +12,20 @@ import UnityPy
 from PIL import Image
 import FreeSimpleGUI as sg
 from src.load_preset import save_grp_id_info
+from src.backup_store import MOD, get_backup_store
+from src.bundle_index import find_bundle_file
+from src.unity_bundle import find_main_texture, load_unity_bundle
+from src.scryfall_client import ScryfallClient, get_scryfall_client
 
 
-def fetch_scryfall_set_data(set_code: str) -> List[Dict]:
+def fetch_scryfall_set_data(set_code: str, client: Optional[ScryfallClient] = None) -> List[Dict]:
     """Fetches all card data for a given set from Scryfall."""
-    all_cards = []
-    next_page_url = f"https://api.scryfall.com/cards/search?q=set:{set_code}"
-    while next_page_url:
-        try:
-            response = requests.get(next_page_url)
-            response.raise_for_status()
-            data = response.json()
-            all_cards.extend(data.get("data", []))
-            next_page_url = data.get("next_page")
-            time.sleep(0.1)  # Be nice to the API
-        except requests.exceptions.RequestException:
-            return []
-
-    return all_cards
+    client = client or get_scryfall_client()
+    try:
+        # The client's rate limiter replaces the fixed sleep between pages
+        return client.get_pages(f"/cards/search?q=set:{set_code}")
+    except (requests.exceptions.RequestException, ValueError):
+        return []
 
 
 def generate_swap_file(
@@ -47,9 +42,10 @@ def generate_swap_file(
     Returns:
         True if successful, False otherwise
     """
-    # 1. Fetch data for both sets
-    source_cards = fetch_scryfall_set_data(source_set_code)
-    target_cards = fetch_scryfall_set_data(target_set_code)
+    # 1. Fetch data for both sets (in parallel)
+    source_cards, target_cards = get_scryfall_client().map(
+        fetch_scryfall_set_data, [source_set_code, target_set_code]
+    )
 
     if not source_cards or not target_cards:
         return False
@@ -104,7 +100,7 @@ def generate_swap_file(
         return False
 
 
-def get_card_data_from_url(url: str) -> Optional[Dict]:
+def get_card_data_from_url(url: str, client: Optional[ScryfallClient] = None) -> Optional[Dict]:
     """Fetches card data from a Scryfall URL."""
     api_url = url
     if "scryfall.com/card" in api_url:
@@ -113,25 +109,79 @@ def get_card_data_from_url(url: str) -> Optional[Dict]:
             api_url = "/".join(parts[:-1])
 
     try:
-        response = requests.get(api_url)
-        response.raise_for_status()
-        return response.json()
-    except (requests.exceptions.RequestException, json.JSONDecodeError):
+        return (client or get_scryfall_client()).get_json(api_url)
+    except (requests.exceptions.RequestException, OSError, ValueError):
         return None
 
 
-def download_image(url: str, dest_path: Path) -> bool:
+def download_image(url: str, dest_path: Path, client: Optional[ScryfallClient] = None) -> bool:
     """Downloads an image from a URL to a destination path."""
     try:
-        response = requests.get(url, stream=True)
-        response.raise_for_status()
-        with open(dest_path, "wb") as f:
-            shutil.copyfileobj(response.raw, f)
+        (client or get_scryfall_client()).download(url, dest_path)
         return True
-    except requests.exceptions.RequestException:
+    except (requests.exceptions.RequestException, OSError):
         return False
 
 
+def select_image_url(image_uris: Dict, target_type_line: str) -> Optional[str]:
+    """Picks the image to use for a card face (full card for Sagas, art crop otherwise)."""
+    if "Saga" in target_type_line:
+        return image_uris.get("png")
+    return image_uris.get("art_crop")
+
+
+def face_image_uris(card_data: Dict) -> List[Dict]:
+    """Returns the image_uris of a card, one entry per face for multi-faced cards."""
+    image_uris = card_data.get("image_uris", {})
+    if image_uris:
+        return [image_uris]
+    return [face.get("image_uris", {}) for face in card_data.get("card_faces", [])]
+
+
+def prefetch_swap_targets(swaps: List[Dict], client: Optional[ScryfallClient] = None) -> Dict[str, Dict]:
+    """
+    Fetch the card data and images of every swap target concurrently.
+
+    Images land in the client's response cache, so the swap loop's
+    download_image calls are local copies.
+
+    Args:
+        swaps: Swap entries from a swaps.json file
+        client: Scryfall client (defaults to the shared one)
+
+    Returns:
+        Dictionary mapping target URLs to their card data (failed fetches are left out)
+    """
+    client = client or get_scryfall_client()
+    urls = list(dict.fromkeys(
+        swap.get("target_api_url") or swap.get("target_scryfall_url")
+        for swap in swaps
+        if swap.get("target_api_url") or swap.get("target_scryfall_url")
+    ))
+    card_data = dict(zip(urls, client.map(lambda url: get_card_data_from_url(url, client), urls)))
+    card_data = {url: data for url, data in card_data.items() if data}
+
+    image_urls = list(dict.fromkeys(
+        image_url
+        for data in card_data.values()
+        for image_uris in face_image_uris(data)
+        for image_url in [select_image_url(image_uris, data.get("type_line", ""))]
+        if image_url
+    ))
+
+    def fetch_image(image_url: str) -> bool:
+        try:
+            client.fetch(image_url)
+            return True
+        except (requests.exceptions.RequestException, OSError):
+            # The swap loop downloads (and reports) it again
+            return False
+
+    fetched = sum(client.map(fetch_image, image_urls))
+    print(f"Prefetched {len(card_data)} cards and {fetched} of {len(image_urls)} images")
+    return card_data
+
+
 def get_card_and_art_ids_from_db(
     db_cursor, swaps: List[Dict]
 ) -> Dict[str, Tuple[int, int]]:
@@ -175,17 +225,12 @@ def find_asset_bundles(
     if not asset_bundle_dir.exists():
         return None
 
-    matching_files = [
-                filename
-                for filename in os.listdir(asset_bundle_dir)
-                if filename.startswith(str(art_id))
-                and filename.endswith(".mtga")
-            ]
+    matching_file = find_bundle_file(asset_bundle_dir, art_id)
 
-    if not matching_files:
+    if not matching_file:
         return None
 
-    card_art_bundle = asset_bundle_dir / matching_files[0]
+    card_art_bundle = asset_bundle_dir / matching_file
 
     return card_art_bundle
 
@@ -196,11 +241,7 @@ def perform_image_swap( image_uris, target_type_line, temp_dir,
         return None, None
 
     is_saga = "Saga" in target_type_line
-
-    if is_saga:
-        image_url = image_uris.get("png")
-    else:
-        image_url = image_uris.get("art_crop")
+    image_url = select_image_url(image_uris, target_type_line)
 
     if not image_url:
         return None, None
@@ -215,22 +256,11 @@ def perform_image_swap( image_uris, target_type_line, temp_dir,
     )
 
     # Replace art
-    env_art = UnityPy.load(str(art_bundle_path))
-    all_textures = [
-        obj for obj in env_art.objects if obj.type.name == "Texture2D"
-    ]
+    env_art = load_unity_bundle(str(art_bundle_path))
+    main_texture = find_main_texture(env_art)
 
-    if all_textures:
-        all_textures.sort(
-            key=lambda x: (
-                x.read().m_Width * x.read().m_Height
-                if hasattr(x.read(), "m_Width")
-                else 0
-            ),
-            reverse=True,
-        )
-        main_art_texture_obj = all_textures[0]
-        main_art_texture = main_art_texture_obj.read()
+    if main_texture:
+        main_art_texture = main_texture.texture
 
         img = Image.open(image_path)
 
@@ -300,6 +330,11 @@ def perform_set_swap(
     backup_dir.mkdir(exist_ok=True)
 
     try:
+        # Network work first, concurrently; the loop below only touches local files
+        target_card_data = prefetch_swap_targets(
+            [swap for swap in swaps_config if swap.get("source_card_name") in card_data_map]
+        )
+
         for swap in swaps_config:
             source_name = swap["source_card_name"]
             target_name = swap["target_card_name"]
@@ -312,20 +347,12 @@ def perform_set_swap(
             if not target_url:
                 continue
 
-            target_data = get_card_data_from_url(target_url)
+            target_data = target_card_data.get(target_url)
             if not target_data:
                 continue
 
             target_type_line = target_data.get("type_line", "")
-
-            image_uris = target_data.get("image_uris", {})
-            image_uris_list = []
-
-            if image_uris:
-                image_uris_list.append(image_uris)
-            else:
-                for face in target_data.get("card_faces", []):
-                    image_uris_list.append(face.get("image_uris", {}))
+            image_uris_list = face_image_uris(target_data)
 
 
             for idx, image_uris_entry in enumerate(image_uris_list):
@@ -355,7 +382,7 @@ def perform_set_swap(
                 f.write(env_art.file.save())
 
             # Backup the NEW asset file after changes
-            shutil.copy(art_bundle_path, backup_dir / f"MOD_{art_bundle_path.name}")
+            get_backup_store(backup_dir).put(MOD, art_bundle_path)
 
             # Update name in database localizations
             try:
@@ -389,6 +416,8 @@ def perform_set_swap(
     finally:
         id_list = [ids[0] for ids in card_data_map.values()]
         save_grp_id_info(id_list, save_path, db_cursor, db_connection, asset_bundle_dir)
+        # Drop the MOD backups superseded by the bundles written above
+        get_backup_store(backup_dir).prune()
         if temp_dir.exists():
             shutil.rmtree(temp_dir)
     return True
@@ -10,6 +10,7 @@ from src.load_preset import (
     json,
     find_mtga_db_path,
 )
+from src.tag_engine import register_tag_functions
 
 
 def get_tokens_by_artist(
@@ -34,6 +35,39 @@ def get_tokens_by_artist(
     return database_cursor.fetchall()
 
 
+def find_art_id_by_card_name(
+    card_name: str, database_cursor: sqlite3.Cursor
+) -> List[Tuple[str, str]]:
+    """
+    Search for cards by name and return their ArtIds.
+
+    Args:
+        card_name: Name (or partial name) to search for
+        database_cursor: SQLite cursor for the card database
+
+    Returns:
+        List of tuples (card_name, art_id)
+    """
+    try:
+        # Search in the Cards table with the TitleId linked to Localizations
+        query = """
+            SELECT DISTINCT c.ArtId, l.Loc
+            FROM Cards c
+            LEFT JOIN Localizations_enUS l ON c.TitleId = l.LocId
+            WHERE l.Loc LIKE ? OR c.Order_Title LIKE ?
+        """
+
+        search_pattern = f"%{card_name}%"
+        database_cursor.execute(query, (search_pattern, search_pattern))
+        results = database_cursor.fetchall()
+
+        return [(str(art_id), name) for art_id, name in results if art_id]
+
+    except Exception as e:
+        print(f"Error searching for card: {e}")
+        return []
+
+
 def swap_card_group_ids(
     first_grp_id: str,
     second_grp_id: str,
@@ -170,11 +204,8 @@ def unlock_parallax_style(
         database_cursor.executemany(
             """
         UPDATE Cards
-        SET tags = CASE
-            WHEN tags IS NULL OR TRIM(tags) = '' THEN '1696804317'
-            ELSE tags || ',1696804317'
-        END
-        WHERE GrpId = ? AND tags NOT LIKE '%1696804317%'
+        SET tags = tag_add(tags, '1696804317')
+        WHERE GrpId = ? AND NOT tag_has(tags, '1696804317')
         """,
             [(card_id,) for card_id in card_ids],
         )
@@ -210,17 +241,22 @@ def get_card_details_by_name(
 
 def create_database_connection(
     database_file_path: str,
+    check_same_thread: bool = True,
 ) -> Tuple[sqlite3.Cursor, sqlite3.Connection, str]:
     """
     Create a connection to the MTGA SQLite database.
 
     Args:
         database_file_path: Path to the .mtga database file
+        check_same_thread: Set to False when the connection is handed to a worker thread
 
     Returns:
         Tuple of (cursor, connection, file_path)
     """
-    database_connection = sqlite3.connect(database_file_path)
+    database_connection = sqlite3.connect(
+        database_file_path, check_same_thread=check_same_thread
+    )
+    register_tag_functions(database_connection)
     database_cursor = database_connection.cursor()
 
     return database_cursor, database_connection, database_file_path
@@ -0,0 +1,370 @@
+# Bulk card style engine for MTGA Swapper
+# Applies style (tag) changes to many cards as one set-based UPDATE inside a single
+# transaction, reporting progress from a SQLite progress handler. Tag lists are
+# edited with the tag_engine SQL functions, which must be registered on the connection.
+
+import sqlite3
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from src.load_preset import save_grp_id_info
+
+PARALLAX_TAG = "1696804317"
+
+# Progress callback: (current, total, message)
+ProgressCallback = Callable[[int, int, str], None]
+
+# VM instructions between progress handler calls
+PROGRESS_INSTRUCTIONS = 4000
+
+# save_grp_id_info binds one parameter per GrpId; stay below SQLITE_MAX_VARIABLE_NUMBER
+LOG_BATCH_SIZE = 30000
+
+TARGETS_TABLE = "temp.style_targets"
+
+# Called as listener(tag, changed_grp_ids, added) after every tag UPDATE, on the
+# writer thread and before the transaction commits
+TagListener = Callable[[str, List[int], bool], None]
+_tag_listeners: List[TagListener] = []
+
+
+def add_tag_listener(listener: TagListener) -> None:
+    """Register a callback told which cards gained or lost a tag (e.g. the tag index)."""
+    _tag_listeners.append(listener)
+
+
+def stage_targets(
+    cursor: sqlite3.Cursor,
+    grp_ids: Optional[Sequence] = None,
+    where_sql: Optional[str] = None,
+    params: Sequence = (),
+) -> int:
+    """
+    Fill the temporary target table used by the bulk operations.
+
+    Args:
+        cursor: Cursor of the writer connection
+        grp_ids: Explicit GrpIds to target
+        where_sql: Alternatively, a WHERE clause over Cards selecting the targets
+        params: Parameters of where_sql
+
+    Returns:
+        Number of staged targets
+    """
+    cursor.execute(f"CREATE TABLE IF NOT EXISTS {TARGETS_TABLE} (grp_id INTEGER PRIMARY KEY)")
+    cursor.execute(f"DELETE FROM {TARGETS_TABLE}")
+    if grp_ids is not None:
+        cursor.executemany(
+            f"INSERT OR IGNORE INTO {TARGETS_TABLE}(grp_id) VALUES (?)",
+            [(int(grp_id),) for grp_id in grp_ids],
+        )
+    if where_sql is not None:
+        cursor.execute(
+            f"INSERT OR IGNORE INTO {TARGETS_TABLE}(grp_id) SELECT GrpId FROM Cards WHERE {where_sql}",
+            params,
+        )
+    return cursor.execute(f"SELECT COUNT(*) FROM {TARGETS_TABLE}").fetchone()[0]
+
+
+def estimate_row_cost(connection: sqlite3.Connection, statement: str, params: Sequence = ()) -> int:
+    """
+    Estimate the VM instructions a statement spends per row.
+
+    Uses the widest backward jump of a Next/Prev opcode in the compiled program,
+    i.e. the body of the outermost row loop. Rows rejected early by the WHERE
+    clause cost less, so the resulting progress errs on the slow side.
+
+    Returns:
+        Instructions per row (at least 1)
+    """
+    program = connection.execute(f"EXPLAIN {statement}", params).fetchall()
+    loop_lengths = [
+        address - jump_target + 1
+        for address, opcode, _, jump_target, *_ in program
+        if opcode in ("Next", "Prev") and jump_target < address
+    ]
+    return max(loop_lengths) if loop_lengths else max(1, len(program))
+
+
+def execute_with_progress(
+    connection: sqlite3.Connection,
+    statement: str,
+    params: Sequence = (),
+    expected_rows: int = 0,
+    on_progress: Optional[ProgressCallback] = None,
+    message: str = "",
+) -> sqlite3.Cursor:
+    """
+    Execute one statement while reporting estimated progress.
+
+    SQLite calls the progress handler every PROGRESS_INSTRUCTIONS VM
+    instructions. Rows processed are estimated as instructions executed
+    divided by the length of the statement's main loop body (see
+    estimate_row_cost), capped at expected_rows.
+
+    Args:
+        connection: Connection to run the statement on
+        statement: SQL statement
+        params: Statement parameters
+        expected_rows: Number of rows the statement is expected to visit
+        on_progress: Callback receiving (current, total, message)
+        message: Text passed to the callback
+
+    Returns:
+        The executed cursor (rowcount and any RETURNING rows are read from it;
+        SQLite makes every change of a RETURNING statement in the first step,
+        which execute() performs while the handler is installed)
+    """
+    if on_progress is None or expected_rows <= 0:
+        return connection.execute(statement, params)
+
+    row_cost = estimate_row_cost(connection, statement, params)
+    state = {"instructions": 0, "reported": -1}
+    report_step = max(1, expected_rows // 100)
+
+    def handler() -> int:
+        state["instructions"] += PROGRESS_INSTRUCTIONS
+        current = min(expected_rows, state["instructions"] // row_cost)
+        if current - state["reported"] >= report_step:
+            state["reported"] = current
+            on_progress(current, expected_rows, message)
+        return 0
+
+    connection.set_progress_handler(handler, PROGRESS_INSTRUCTIONS)
+    try:
+        executed = connection.execute(statement, params)
+    finally:
+        connection.set_progress_handler(None, 0)
+    on_progress(expected_rows, expected_rows, message)
+    return executed
+
+
+def staged_grp_ids(cursor: sqlite3.Cursor) -> List[str]:
+    """Return the staged GrpIds as strings (the format save_grp_id_info expects)."""
+    return [str(row[0]) for row in cursor.execute(f"SELECT grp_id FROM {TARGETS_TABLE}")]
+
+
+def _update_tags(
+    cursor: sqlite3.Cursor,
+    connection: sqlite3.Connection,
+    function_name: str,
+    tag: str,
+    grp_ids: Optional[Sequence],
+    where_sql: Optional[str],
+    params: Sequence,
+    on_progress: Optional[ProgressCallback],
+    message: str,
+) -> Tuple[int, List[int]]:
+    target_count = stage_targets(cursor, grp_ids, where_sql, params)
+    if target_count == 0:
+        return 0, []
+    # Only rows the function would actually change are written
+    condition = "NOT tag_has(tags, ?)" if function_name == "tag_add" else "tag_has(tags, ?)"
+    changed_ids = [
+        row[0]
+        for row in execute_with_progress(
+            connection,
+            f"""
+            UPDATE Cards
+            SET tags = {function_name}(tags, ?)
+            WHERE GrpId IN (SELECT grp_id FROM {TARGETS_TABLE})
+            AND {condition}
+            RETURNING GrpId
+            """,
+            (tag, tag),
+            expected_rows=target_count,
+            on_progress=on_progress,
+            message=message,
+        ).fetchall()
+    ]
+    for listener in _tag_listeners:
+        listener(tag, changed_ids, function_name == "tag_add")
+    return target_count, changed_ids
+
+
+def add_tag(
+    cursor: sqlite3.Cursor,
+    connection: sqlite3.Connection,
+    tag: str,
+    grp_ids: Optional[Sequence] = None,
+    where_sql: Optional[str] = None,
+    params: Sequence = (),
+    on_progress: Optional[ProgressCallback] = None,
+) -> Tuple[int, int]:
+    """
+    Add a tag to every targeted card that does not have it yet. Leaves the
+    transaction open for the caller (the writer job commits it).
+
+    Args:
+        cursor: Cursor of the writer connection
+        connection: Writer connection
+        tag: Tag to add
+        grp_ids: Explicit GrpIds to target
+        where_sql: Alternatively, a WHERE clause over Cards selecting the cards
+        params: Parameters of where_sql
+        on_progress: Callback receiving (current, total, message)
+
+    Returns:
+        Tuple of (targeted cards, cards changed)
+    """
+    target_count, changed_ids = _update_tags(
+        cursor, connection, "tag_add", tag, grp_ids, where_sql, params, on_progress, "Adding style"
+    )
+    return target_count, len(changed_ids)
+
+
+def remove_tag(
+    cursor: sqlite3.Cursor,
+    connection: sqlite3.Connection,
+    tag: str,
+    grp_ids: Optional[Sequence] = None,
+    where_sql: Optional[str] = None,
+    params: Sequence = (),
+    on_progress: Optional[ProgressCallback] = None,
+) -> Tuple[int, int]:
+    """
+    Remove a tag from every targeted card that has it. Leaves the transaction
+    open for the caller (the writer job commits it).
+
+    Args:
+        cursor: Cursor of the writer connection
+        connection: Writer connection
+        tag: Tag to remove
+        grp_ids: Explicit GrpIds to target
+        where_sql: Alternatively, a WHERE clause over Cards selecting the cards
+        params: Parameters of where_sql
+        on_progress: Callback receiving (current, total, message)
+
+    Returns:
+        Tuple of (targeted cards, cards changed)
+    """
+    target_count, changed_ids = _update_tags(
+        cursor, connection, "tag_remove", tag, grp_ids, where_sql, params, on_progress, "Resetting style"
+    )
+    return target_count, len(changed_ids)
+
+
+def unlock_parallax(
+    cursor: sqlite3.Cursor,
+    connection: sqlite3.Connection,
+    save_path: str,
+    asset_bundle_path: str,
+    grp_ids: Optional[Sequence] = None,
+    where_sql: Optional[str] = None,
+    params: Sequence = (),
+    on_progress: Optional[ProgressCallback] = None,
+    tag: str = PARALLAX_TAG,
+) -> Tuple[int, int]:
+    """
+    Add the parallax tag (or `tag`) to every targeted card in one UPDATE and one
+    transaction, then record the targeted cards in the changes file once.
+
+    Args:
+        cursor: Cursor of the writer connection
+        connection: Writer connection
+        save_path: Path to changes.json
+        asset_bundle_path: Path to the MTGA AssetBundle directory
+        grp_ids: Explicit GrpIds to unlock
+        where_sql: Alternatively, a WHERE clause over Cards selecting the cards
+        params: Parameters of where_sql
+        on_progress: Callback receiving (current, total, message)
+        tag: Tag to add
+
+    Returns:
+        Tuple of (targeted cards, cards changed)
+    """
+    try:
+        target_count, changed_ids = _update_tags(
+            cursor,
+            connection,
+            "tag_add",
+            tag,
+            grp_ids,
+            where_sql,
+            params,
+            on_progress,
+            "Unlocking styles",
+        )
+        if target_count == 0:
+            return 0, 0
+
+        if on_progress:
+            on_progress(target_count, target_count, "Saving changes")
+        _record_rows(cursor, connection, staged_grp_ids(cursor), save_path, asset_bundle_path)
+        connection.commit()
+        return target_count, len(changed_ids)
+    except Exception:
+        connection.rollback()
+        raise
+
+
+def reset_parallax(
+    cursor: sqlite3.Cursor,
+    connection: sqlite3.Connection,
+    save_path: str,
+    asset_bundle_path: str,
+    grp_ids: Optional[Sequence] = None,
+    where_sql: Optional[str] = None,
+    params: Sequence = (),
+    on_progress: Optional[ProgressCallback] = None,
+    tag: str = PARALLAX_TAG,
+) -> Tuple[int, int]:
+    """
+    Remove the parallax tag (or `tag`) from every targeted card in one UPDATE and
+    one transaction, then record the reset cards in the changes file, so
+    re-applying the recorded changes does not add the tag back.
+
+    Args:
+        cursor: Cursor of the writer connection
+        connection: Writer connection
+        save_path: Path to changes.json
+        asset_bundle_path: Path to the MTGA AssetBundle directory
+        grp_ids: Explicit GrpIds to reset
+        where_sql: Alternatively, a WHERE clause over Cards selecting the cards
+        params: Parameters of where_sql
+        on_progress: Callback receiving (current, total, message)
+        tag: Tag to remove
+
+    Returns:
+        Tuple of (targeted cards, cards changed)
+    """
+    try:
+        target_count, changed_ids = _update_tags(
+            cursor,
+            connection,
+            "tag_remove",
+            tag,
+            grp_ids,
+            where_sql,
+            params,
+            on_progress,
+            "Resetting style",
+        )
+        if changed_ids:
+            if on_progress:
+                on_progress(target_count, target_count, "Saving changes")
+            _record_rows(
+                cursor, connection, [str(grp_id) for grp_id in changed_ids], save_path, asset_bundle_path
+            )
+        connection.commit()
+        return target_count, len(changed_ids)
+    except Exception:
+        connection.rollback()
+        raise
+
+
+def _record_rows(
+    cursor: sqlite3.Cursor,
+    connection: sqlite3.Connection,
+    grp_ids: List[str],
+    save_path: str,
+    asset_bundle_path: str,
+) -> None:
+    """Record the current rows of cards in the change journal, LOG_BATCH_SIZE at a time."""
+    for start in range(0, len(grp_ids), LOG_BATCH_SIZE):
+        save_grp_id_info(
+            grp_ids[start : start + LOG_BATCH_SIZE],
+            save_path,
+            cursor,
+            connection,
+            asset_bundle_path,
+        )
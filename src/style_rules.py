@@ -0,0 +1,181 @@
+# Declarative style rules for MTGA Swapper
+# A rule describes which cards to select and which tag to add or remove; it is resolved
+# with the tag index and one indexed card-index query, then applied as one UPDATE.
+
+import sqlite3
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src import style_engine
+from src.card_index import CardIndex
+from src.tag_index import TagIndex, intersect_sorted
+
+ACTIONS = ("add", "remove")
+
+
+class StyleRule:
+    """
+    One bulk style operation.
+
+    Attributes:
+        action: "add" or "remove"
+        tag: Tag to add or remove (defaults to the parallax tag)
+        is_token: Only tokens (True) or only non-tokens (False)
+        subtypes: SubType ids every selected card must list (e.g. ["331"] for vehicles)
+        mono_colored: Only cards with exactly one colour (True) or any other count (False)
+        name_prefix: Only cards whose name starts with this (case-insensitive)
+        set_code: Only cards of this set (case-insensitive)
+        search: Search text with /api/cards semantics
+        exclude_basic_lands: Skip basic lands (as the search-based bulk unlock does)
+    """
+
+    def __init__(
+        self,
+        action: str,
+        tag: str = style_engine.PARALLAX_TAG,
+        is_token: Optional[bool] = None,
+        subtypes: Sequence[str] = (),
+        mono_colored: Optional[bool] = None,
+        name_prefix: Optional[str] = None,
+        set_code: Optional[str] = None,
+        search: Optional[str] = None,
+        exclude_basic_lands: bool = False,
+    ) -> None:
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown style rule action: {action}")
+        if not str(tag).strip():
+            raise ValueError("A style rule needs a tag")
+        self.action = action
+        self.tag = str(tag).strip()
+        self.is_token = is_token
+        self.subtypes = [str(subtype).strip() for subtype in subtypes if str(subtype).strip()]
+        self.mono_colored = mono_colored
+        self.name_prefix = name_prefix or None
+        self.set_code = set_code or None
+        self.search = search or None
+        self.exclude_basic_lands = exclude_basic_lands
+
+    def index_criteria(self) -> Tuple[Dict[str, List[str]], Dict[str, List[str]]]:
+        """
+        Split the selection into tag index lookups.
+
+        Returns:
+            Tuple of (required field values, excluded field values); the action
+            itself requires the tag (remove) or excludes it (add), so only cards
+            the UPDATE would change are selected
+        """
+        required: Dict[str, List[str]] = {}
+        excluded: Dict[str, List[str]] = {}
+        if self.is_token is not None:
+            required["token"] = ["1" if self.is_token else "0"]
+        if self.subtypes:
+            required["subtype"] = list(self.subtypes)
+        if self.mono_colored is True:
+            required["color_count"] = ["1"]
+        elif self.mono_colored is False:
+            excluded["color_count"] = ["1"]
+        if self.action == "remove":
+            required.setdefault("tag", []).append(self.tag)
+        else:
+            excluded.setdefault("tag", []).append(self.tag)
+        return required, excluded
+
+    def uses_card_index(self) -> bool:
+        """Return True if the rule filters on the card listing (names, sets, search)."""
+        return bool(self.name_prefix or self.set_code or self.search or self.exclude_basic_lands)
+
+    def describe(self) -> dict:
+        """Return the rule as a plain dict (for logs and API responses)."""
+        return {
+            "action": self.action,
+            "tag": self.tag,
+            "is_token": self.is_token,
+            "subtypes": self.subtypes,
+            "mono_colored": self.mono_colored,
+            "name_prefix": self.name_prefix,
+            "set_code": self.set_code,
+            "search": self.search,
+            "exclude_basic_lands": self.exclude_basic_lands,
+        }
+
+
+def resolve_targets(rule: StyleRule, tag_index: TagIndex, card_index: CardIndex) -> List[int]:
+    """
+    Resolve a rule to the GrpIds it would change.
+
+    Tag, token, subtype and colour conditions are posting-list intersections;
+    name, set and search conditions are one query on the card index sidecar.
+
+    Args:
+        rule: Rule to resolve
+        tag_index: Tag index of the game database
+        card_index: Card index of the game database (must be built)
+
+    Returns:
+        Sorted GrpIds
+    """
+    required, excluded = rule.index_criteria()
+    candidates = tag_index.select(required) if required else tag_index.all_grp_ids()
+
+    arrays = [candidates]
+    if rule.uses_card_index():
+        listed = card_index.select_grp_ids(
+            rule.search,
+            exclude_basic_lands=rule.exclude_basic_lands,
+            name_prefix=rule.name_prefix,
+            set_code=rule.set_code,
+        )
+        arrays.append(sorted(listed))
+    targets = set(intersect_sorted(arrays))
+
+    for field, values in excluded.items():
+        for value in values:
+            targets.difference_update(tag_index.grp_ids(field, value))
+    return sorted(targets)
+
+
+def apply_rule(
+    cursor: sqlite3.Cursor,
+    connection: sqlite3.Connection,
+    rule: StyleRule,
+    grp_ids: Sequence[int],
+    save_path: str,
+    asset_bundle_path: str,
+    on_progress: Optional[style_engine.ProgressCallback] = None,
+) -> Tuple[int, int]:
+    """
+    Writer job: apply a resolved rule as one UPDATE in one transaction.
+
+    The changed cards are recorded in the changes file (like the single-card
+    unlock), so re-applying the recorded changes keeps both adds and removals.
+
+    Args:
+        cursor: Cursor of the writer connection
+        connection: Writer connection
+        rule: Rule being applied
+        grp_ids: Targets from resolve_targets
+        save_path: Path to changes.json
+        asset_bundle_path: Path to the MTGA AssetBundle directory
+        on_progress: Callback receiving (current, total, message)
+
+    Returns:
+        Tuple of (targeted cards, cards changed)
+    """
+    if rule.action == "add":
+        return style_engine.unlock_parallax(
+            cursor,
+            connection,
+            save_path,
+            asset_bundle_path,
+            grp_ids,
+            on_progress=on_progress,
+            tag=rule.tag,
+        )
+    return style_engine.reset_parallax(
+        cursor,
+        connection,
+        save_path,
+        asset_bundle_path,
+        grp_ids,
+        on_progress=on_progress,
+        tag=rule.tag,
+    )
@@ -0,0 +1,110 @@
+# Tag list SQL functions for MTGA Swapper
+# Registers tag_has / tag_add / tag_remove on SQLite connections so every style
+# operation edits the comma-separated Cards.tags lists the same way.
+
+import sqlite3
+from typing import List, Optional, Tuple
+
+TAG_SEPARATOR = ","
+
+
+def _split_tags(tags: str) -> Tuple[List[str], bool]:
+    """
+    Split a tag list into its non-empty entries.
+
+    Returns:
+        Tuple of (entries, framed); framed is True for lists written as ',a,b,'
+    """
+    framed = tags.startswith(TAG_SEPARATOR) and tags.endswith(TAG_SEPARATOR)
+    entries = [entry for entry in tags.split(TAG_SEPARATOR) if entry.strip()]
+    return entries, framed
+
+
+def _join_tags(entries: List[str], framed: bool) -> str:
+    if not entries:
+        return ""
+    joined = TAG_SEPARATOR.join(entries)
+    return f"{TAG_SEPARATOR}{joined}{TAG_SEPARATOR}" if framed else joined
+
+
+def tag_has(tags: Optional[str], tag) -> int:
+    """
+    Check whether a comma-separated list contains a tag as a whole entry.
+
+    Args:
+        tags: Tag list (NULL/None counts as empty)
+        tag: Tag to look for
+
+    Returns:
+        1 if present, 0 otherwise (SQLite has no boolean type)
+    """
+    if tags is None or tag is None:
+        return 0
+    tag = str(tag).strip()
+    return int(any(entry.strip() == tag for entry in str(tags).split(TAG_SEPARATOR)))
+
+
+def tag_add(tags: Optional[str], tag) -> Optional[str]:
+    """
+    Append a tag to a list unless it is already present.
+
+    Args:
+        tags: Tag list (NULL/None counts as empty)
+        tag: Tag to add
+
+    Returns:
+        The list with the tag, keeping ',a,b,' framing if the list used it;
+        unchanged if the tag was already there
+    """
+    if tag is None:
+        return tags
+    tag = str(tag).strip()
+    if tags is None:
+        return tag
+    tags = str(tags)
+    entries, framed = _split_tags(tags)
+    if any(entry.strip() == tag for entry in entries):
+        return tags
+    return _join_tags(entries + [tag], framed)
+
+
+def tag_remove(tags: Optional[str], tag) -> Optional[str]:
+    """
+    Remove every occurrence of a tag from a list.
+
+    Args:
+        tags: Tag list
+        tag: Tag to remove
+
+    Returns:
+        The list without the tag ('' if nothing is left); unchanged if the
+        tag was not there
+    """
+    if tags is None or tag is None:
+        return tags
+    tag = str(tag).strip()
+    tags = str(tags)
+    entries, framed = _split_tags(tags)
+    remaining = [entry for entry in entries if entry.strip() != tag]
+    if len(remaining) == len(entries):
+        return tags
+    return _join_tags(remaining, framed)
+
+
+def register_tag_functions(connection: sqlite3.Connection) -> sqlite3.Connection:
+    """
+    Register tag_has, tag_add and tag_remove on a connection.
+
+    The functions are deterministic, so SQLite may evaluate them once per
+    distinct argument pair within a statement.
+
+    Args:
+        connection: Connection to register the functions on
+
+    Returns:
+        The same connection
+    """
+    connection.create_function("tag_has", 2, tag_has, deterministic=True)
+    connection.create_function("tag_add", 2, tag_add, deterministic=True)
+    connection.create_function("tag_remove", 2, tag_remove, deterministic=True)
+    return connection
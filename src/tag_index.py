@@ -0,0 +1,274 @@
+# Inverted style index for MTGA Swapper
+# Maps tag / colour / subtype values of the Cards table to sorted GrpId arrays so style
+# selections are set intersections instead of LIKE scans. Kept in memory and patched
+# incrementally by the style write paths.
+
+import os
+import threading
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+from src.card_index import connect_read_only
+
+# Index field -> Cards column holding a comma-separated list
+LIST_FIELDS = {
+    "tag": "tags",
+    "color": "Colors",
+    "subtype": "SubTypes",
+}
+
+# Derived single-value fields
+DERIVED_FIELDS = ("color_count", "token")
+
+FIELDS = tuple(LIST_FIELDS) + DERIVED_FIELDS
+
+SOURCE_QUERY = "SELECT GrpId, tags, Colors, SubTypes, IsToken FROM Cards"
+
+# array typecode for GrpIds (32-bit signed is enough for MTGA ids)
+GRP_ID_TYPECODE = "i"
+
+
+def split_list(value: Optional[str]) -> List[str]:
+    """Split a comma-separated column value into its trimmed, non-empty entries."""
+    if value is None:
+        return []
+    return [entry.strip() for entry in str(value).split(",") if entry.strip()]
+
+
+def intersect_sorted(arrays: List[array]) -> array:
+    """
+    Intersect sorted GrpId arrays.
+
+    Args:
+        arrays: Sorted arrays; the smallest one drives the intersection
+
+    Returns:
+        Sorted array of GrpIds present in every input
+    """
+    if not arrays:
+        return array(GRP_ID_TYPECODE)
+    arrays = sorted(arrays, key=len)
+    result = set(arrays[0])
+    for other in arrays[1:]:
+        if not result:
+            break
+        result.intersection_update(other)
+    return array(GRP_ID_TYPECODE, sorted(result))
+
+
+class TagIndex:
+    """
+    In-memory inverted index of one Raw_CardDatabase file.
+
+    `postings[field][value]` is a sorted array of the GrpIds whose column
+    contains `value`. Fields are the list columns in LIST_FIELDS plus
+    `color_count` (number of colours, as a string) and `token` ("1" for
+    tokens).
+
+    The index is built lazily and rebuilt when the database file's size/mtime
+    no longer match what the index last saw. note_write() runs after every
+    writer job: a job that patched the postings itself (style engine writes,
+    through apply_tag_change()) keeps the index and accepts the new file
+    size/mtime; any other write marks the index stale.
+    """
+
+    def __init__(self, database_file_path: Union[str, Path]) -> None:
+        self.database_file_path = str(database_file_path)
+        self.postings: Dict[str, Dict[str, array]] = {field: {} for field in FIELDS}
+        self.builds = 0
+        self.incremental_updates = 0
+        self._stat_key: Optional[Tuple[int, int]] = None
+        self._stale = True
+        # Set by apply_tag_change(), consumed by the next note_write()
+        self._patched = False
+        self._lock = threading.RLock()
+
+    def _file_stat_key(self) -> Tuple[int, int]:
+        stat_result = os.stat(self.database_file_path)
+        return stat_result.st_size, stat_result.st_mtime_ns
+
+    def build(self) -> None:
+        """Rebuild every posting list from the Cards table."""
+        with self._lock:
+            stat_key = self._file_stat_key()
+            collected: Dict[str, Dict[str, List[int]]] = {field: {} for field in FIELDS}
+            connection = connect_read_only(self.database_file_path)
+            try:
+                for grp_id, tags, colors, subtypes, is_token in connection.execute(SOURCE_QUERY):
+                    color_entries = split_list(colors)
+                    values = {
+                        "tag": split_list(tags),
+                        "color": color_entries,
+                        "subtype": split_list(subtypes),
+                        "color_count": [str(len(color_entries))],
+                        "token": [str(int(is_token or 0))],
+                    }
+                    for field, field_values in values.items():
+                        postings = collected[field]
+                        for value in set(field_values):
+                            postings.setdefault(value, []).append(grp_id)
+            finally:
+                connection.close()
+
+            self.postings = {
+                field: {
+                    value: array(GRP_ID_TYPECODE, sorted(grp_ids))
+                    for value, grp_ids in values.items()
+                }
+                for field, values in collected.items()
+            }
+            self._stat_key = stat_key
+            self._stale = False
+            self.builds += 1
+            print(f"Built tag index: {sum(len(v) for v in self.postings.values())} posting lists")
+
+    def ensure_current(self) -> None:
+        """Build the index if it is missing, marked stale or the file changed on disk."""
+        with self._lock:
+            if self._stale or self._file_stat_key() != self._stat_key:
+                self.build()
+
+    def mark_stale(self) -> None:
+        """Force a rebuild on next use (e.g. after a write that was rolled back)."""
+        with self._lock:
+            self._stale = True
+
+    def note_write(self) -> None:
+        """
+        Writer job listener: accept the database file's current size/mtime if
+        the job patched the postings with apply_tag_change(), otherwise mark
+        the index stale (reapply, restore and raw writes may change any tag).
+        """
+        with self._lock:
+            patched, self._patched = self._patched, False
+            if not patched:
+                self._stale = True
+            elif not self._stale and self._stat_key is not None:
+                self._stat_key = self._file_stat_key()
+
+    def apply_tag_change(self, tag: str, grp_ids: Iterable[int], added: bool) -> None:
+        """
+        Patch the `tag` postings after a tag was added to or removed from cards.
+
+        Args:
+            tag: Tag value
+            grp_ids: GrpIds whose tags actually changed
+            added: True if the tag was added, False if removed
+        """
+        changed = {int(grp_id) for grp_id in grp_ids}
+        with self._lock:
+            self._patched = True
+            if self._stale or not changed:
+                return
+            postings = self.postings["tag"]
+            current = set(postings.get(tag, ()))
+            current = current | changed if added else current - changed
+            if current:
+                postings[tag] = array(GRP_ID_TYPECODE, sorted(current))
+            else:
+                postings.pop(tag, None)
+            self.incremental_updates += 1
+
+    def grp_ids(self, field: str, value: str) -> array:
+        """
+        Return the sorted GrpIds having `value` in `field`.
+
+        Raises:
+            ValueError: If the field is unknown
+        """
+        if field not in self.postings:
+            raise ValueError(f"Unknown tag index field: {field}")
+        self.ensure_current()
+        with self._lock:
+            return self.postings[field].get(str(value).strip(), array(GRP_ID_TYPECODE))
+
+    def select(self, criteria: Mapping[str, Iterable[str]]) -> array:
+        """
+        Intersect posting lists.
+
+        Args:
+            criteria: Field -> values that must all be present (e.g.
+                {"subtype": ["331"], "color_count": ["1"], "tag": ["1696804317"]})
+
+        Returns:
+            Sorted array of matching GrpIds
+
+        Raises:
+            ValueError: If criteria is empty or names an unknown field
+        """
+        arrays = [
+            self.grp_ids(field, value)
+            for field, values in criteria.items()
+            for value in values
+        ]
+        if not arrays:
+            raise ValueError("At least one criterion is required")
+        return intersect_sorted(arrays)
+
+    def all_grp_ids(self) -> array:
+        """Return every GrpId in the Cards table, sorted."""
+        self.ensure_current()
+        with self._lock:
+            return array(
+                GRP_ID_TYPECODE,
+                sorted(grp_id for grp_ids in self.postings["token"].values() for grp_id in grp_ids),
+            )
+
+    def values(self, field: str) -> Dict[str, int]:
+        """
+        Return every value of a field with its card count, most common first.
+
+        Raises:
+            ValueError: If the field is unknown
+        """
+        if field not in self.postings:
+            raise ValueError(f"Unknown tag index field: {field}")
+        self.ensure_current()
+        with self._lock:
+            counts = {value: len(grp_ids) for value, grp_ids in self.postings[field].items()}
+        return dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+
+    def stats(self) -> dict:
+        """Return posting list counts, memory use and build counters."""
+        with self._lock:
+            return {
+                "built": not self._stale,
+                "builds": self.builds,
+                "incremental_updates": self.incremental_updates,
+                "values": {field: len(values) for field, values in self.postings.items()},
+                "bytes": sum(
+                    grp_ids.itemsize * len(grp_ids)
+                    for values in self.postings.values()
+                    for grp_ids in values.values()
+                ),
+            }
+
+
+_indexes: Dict[str, TagIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_tag_index(database_file_path: Union[str, Path]) -> TagIndex:
+    """
+    Return the shared tag index for a game database, creating it on first use.
+
+    Args:
+        database_file_path: Path to the Raw_CardDatabase file
+
+    Returns:
+        TagIndex shared by every caller using the same database
+    """
+    key = str(database_file_path)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = TagIndex(database_file_path)
+            _indexes[key] = index
+        return index
+
+
+def reset_tag_index(database_file_path: Union[str, Path]) -> None:
+    """Forget the shared tag index of a database file, so the next get_tag_index() starts fresh."""
+    with _indexes_lock:
+        _indexes.pop(str(database_file_path), None)
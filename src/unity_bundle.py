@@ -4,13 +4,22 @@
 import UnityPy
 import UnityPy.classes
 import UnityPy.config
+from UnityPy.enums import TextureFormat
 from PIL import Image
 from pathlib import Path
 import os
-from typing import List, Tuple, Optional, Union
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Tuple, Optional, Union
 from tkinter.filedialog import askopenfilename, askdirectory
 
-from .image_utils import remove_alpha_channel
+from .bundle_index import asset_bundle_path_for_database, find_bundle_file
+from .image_utils import (
+    count_unique_colors,
+    remove_alpha_channel,
+    render_image_variant,
+)
 
 
 def configure_unity_version(database_path: str, fallback_version: str) -> None:
@@ -35,12 +44,13 @@ def configure_unity_version(database_path: str, fallback_version: str) -> None:
         UnityPy.config.FALLBACK_UNITY_VERSION = fallback_version
 
 
-def load_unity_bundle(bundle_file_path: str) -> UnityPy.Environment:
+def load_unity_bundle(bundle_file_path: Union[str, bytes]) -> UnityPy.Environment:
     """
     Load a Unity asset bundle file with error handling for version compatibility.
 
     Args:
-        bundle_file_path: Path to the Unity asset bundle file
+        bundle_file_path: Path to the Unity asset bundle file, or its contents
+            (an environment loaded from a path keeps the file open)
 
     Returns:
         Loaded Unity environment object
@@ -60,36 +70,188 @@ def extract_textures_from_bundle(
     unity_environment: UnityPy.Environment,
 ) -> List[UnityPy.classes.Texture2D]:
     """
-    Extract all Texture2D objects from a Unity asset bundle.
+    Extract all card-art Texture2D objects from a Unity asset bundle.
 
     Args:
         unity_environment: Loaded Unity environment
 
     Returns:
-        List of Texture2D objects sorted by size and complexity
+        List of Texture2D objects, the main art first (see rank_textures)
     """
-    texture_objects = [
-        obj.read() for obj in unity_environment.objects if obj.type.name == "Texture2D"
-    ]
-    texture_objects = list(
-        filter(
-            lambda tex: "atlas" not in tex.m_Name.lower().split()[-1]
-            and "font texture" != tex.m_Name.lower(),
-            texture_objects,
-        )
-    )
+    return [entry.texture for entry in rank_textures(unity_environment)]
+
+
+# Texture formats that carry an alpha channel; card art is stored without one,
+# so at equal size these are ranked below opaque textures (masks, frames, glows)
+ALPHA_TEXTURE_FORMATS = {
+    "Alpha8",
+    "ARGB4444",
+    "RGBA32",
+    "ARGB32",
+    "RGBA4444",
+    "BGRA32",
+    "DXT3",
+    "DXT5",
+    "DXT5Crunched",
+    "PVRTC_RGBA2",
+    "PVRTC_RGBA4",
+    "ATC_RGBA8",
+    "ETC2_RGBA1",
+    "ETC2_RGBA8",
+    "ETC2_RGBA8Crunched",
+    "ETC_RGBA8_3DS",
+    "ASTC_RGBA_4x4",
+    "ASTC_RGBA_5x5",
+    "ASTC_RGBA_6x6",
+    "ASTC_RGBA_8x8",
+    "ASTC_RGBA_10x10",
+    "ASTC_RGBA_12x12",
+}
+
+
+class TextureCatalogEntry:
+    """
+    Header-only view of a Texture2D inside a loaded bundle.
+
+    Width, height, format and name come from the object header; pixels are
+    only decoded when `image` is first accessed, and the result is kept.
 
-    # Sort by size (width + height) and color complexity (number of unique colors), largest first
-    return sorted(
-        texture_objects,
-        key=lambda texture: (
-            texture.image.size[0] + texture.image.size[1],
-            len(set(texture.image.getdata())),
-        ),
-        reverse=True,
+    Attributes:
+        name: Texture name (m_Name)
+        width: Texture width in pixels (m_Width)
+        height: Texture height in pixels (m_Height)
+        texture_format: Name of the UnityPy TextureFormat
+        texture: The parsed Texture2D object (raw, undecoded data)
+    """
+
+    def __init__(self, texture: UnityPy.classes.Texture2D) -> None:
+        self.texture = texture
+        self.name = texture.m_Name
+        self.width = texture.m_Width
+        self.height = texture.m_Height
+        try:
+            self.texture_format = TextureFormat(texture.m_TextureFormat).name
+        except ValueError:
+            self.texture_format = str(texture.m_TextureFormat)
+        self._image = None
+
+    @property
+    def has_alpha_format(self) -> bool:
+        return self.texture_format in ALPHA_TEXTURE_FORMATS
+
+    @property
+    def image(self) -> Image.Image:
+        """Decoded pixels of the texture (decoded once, on first access)."""
+        if self._image is None:
+            self._image = self.texture.image
+        return self._image
+
+    def rank_key(self) -> tuple:
+        # Largest first, then opaque formats, then a stable name order
+        return (self.width + self.height, not self.has_alpha_format, self.name)
+
+    def __repr__(self) -> str:
+        return f"<TextureCatalogEntry {self.name} {self.width}x{self.height} {self.texture_format}>"
+
+
+def is_card_art_candidate(texture_name: str) -> bool:
+    """Return False for atlas and font textures that never hold card art."""
+    lowered_name = texture_name.lower()
+    name_parts = lowered_name.split()
+    return (
+        not (name_parts and "atlas" in name_parts[-1])
+        and lowered_name != "font texture"
     )
 
 
+def list_texture_catalog(
+    unity_environment: UnityPy.Environment,
+) -> List[TextureCatalogEntry]:
+    """
+    List the Texture2D objects of a bundle, ranked as main-art candidates,
+    without decoding any pixel data.
+
+    Args:
+        unity_environment: Loaded Unity environment
+
+    Returns:
+        List of TextureCatalogEntry objects, best main-art candidate first
+    """
+    catalog = []
+    for unity_object in unity_environment.objects:
+        if unity_object.type.name != "Texture2D":
+            continue
+        entry = TextureCatalogEntry(unity_object.read())
+        if is_card_art_candidate(entry.name):
+            catalog.append(entry)
+
+    return sorted(catalog, key=TextureCatalogEntry.rank_key, reverse=True)
+
+
+def find_main_texture(
+    unity_environment: UnityPy.Environment,
+) -> Optional[TextureCatalogEntry]:
+    """
+    Return the main-art texture of a loaded bundle without decoding the others.
+
+    Args:
+        unity_environment: Loaded Unity environment
+
+    Returns:
+        Main texture entry, or None if the bundle has no card-art texture
+    """
+    catalog = list_texture_catalog(unity_environment)
+    if not catalog:
+        return None
+    return select_main_texture(catalog)
+
+
+def rank_textures(
+    unity_environment: UnityPy.Environment,
+) -> List[TextureCatalogEntry]:
+    """
+    List the card-art textures of a bundle with the main art first.
+
+    The main art is the one select_main_texture picks, so the web UI, the
+    asset viewer and the set swapper agree on it; the others follow in
+    catalog order.
+
+    Args:
+        unity_environment: Loaded Unity environment
+
+    Returns:
+        List of TextureCatalogEntry objects, empty if the bundle has no card art
+    """
+    catalog = list_texture_catalog(unity_environment)
+    if not catalog:
+        return catalog
+    main_texture = select_main_texture(catalog)
+    return [main_texture] + [entry for entry in catalog if entry is not main_texture]
+
+
+def select_main_texture(catalog: List[TextureCatalogEntry]) -> TextureCatalogEntry:
+    """
+    Pick the main art from a ranked catalog.
+
+    Only when several textures tie on size and format are they decoded, and the
+    tie is broken by colour complexity. This is the one main-art choice; every
+    caller goes through find_main_texture or rank_textures.
+
+    Args:
+        catalog: Entries as returned by list_texture_catalog
+
+    Returns:
+        The main-art entry
+    """
+    best_size_and_format = catalog[0].rank_key()[:2]
+    tied_entries = [
+        entry for entry in catalog if entry.rank_key()[:2] == best_size_and_format
+    ]
+    if len(tied_entries) == 1:
+        return tied_entries[0]
+    return max(tied_entries, key=lambda entry: count_unique_colors(entry.image))
+
+
 def export_3d_meshes(
     unity_environment: UnityPy.Environment, export_directory: str
 ) -> int:
@@ -158,22 +320,15 @@ def get_card_texture_data(
     if card_object and database_file_path:
         try:
             # Construct path to AssetBundle directory
-            database_parent_directory = Path(database_file_path).parent
-            game_root_directory = database_parent_directory.parent
-            asset_bundle_path = str(game_root_directory / "AssetBundle")
+            asset_bundle_path = asset_bundle_path_for_database(database_file_path)
 
             # Find the asset bundle file for this card
-            matching_files = [
-                filename
-                for filename in os.listdir(asset_bundle_path)
-                if filename.startswith(str(card_object.art_id))
-                and filename.endswith(".mtga")
-            ]
-
-            if not matching_files:
+            matching_file = find_bundle_file(asset_bundle_path, card_object.art_id)
+
+            if not matching_file:
                 return None
 
-            bundle_file_path = os.path.join(asset_bundle_path, matching_files[0])
+            bundle_file_path = os.path.join(asset_bundle_path, matching_file)
             unity_environment = load_unity_bundle(bundle_file_path)
             texture_data_list = extract_textures_from_bundle(unity_environment)
 
@@ -186,7 +341,7 @@ def get_card_texture_data(
                     remove_alpha_channel(texture.image) for texture in texture_data_list
                 ]
                 if ret_matching:
-                    return processed_images, texture_data_list, matching_files[0]
+                    return processed_images, texture_data_list, matching_file
                 return processed_images, texture_data_list
 
         except Exception as error:
@@ -194,6 +349,193 @@ def get_card_texture_data(
     return None
 
 
+DEFAULT_ENVIRONMENT_CACHE_BYTES = 256 * 1024 * 1024
+
+
+class EnvironmentCache:
+    """
+    Memory-budgeted LRU of loaded UnityPy environments keyed by path.
+
+    An entry is only reused while the file's mtime and size are unchanged, and
+    is dropped after the bundle is written through `checkout(..., writing=True)`.
+    Environments are loaded from the file's bytes, so a cached entry holds no
+    open file handle (which would block the MTGA updater and os.replace on
+    Windows). Each environment is used by one caller at a time (UnityPy
+    readers share a position), so `checkout` holds a per-path lock; a lock is
+    dropped once its path is neither cached nor checked out.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_ENVIRONMENT_CACHE_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # path -> [lock, callers holding or waiting for it]
+        self._path_locks: Dict[str, list] = {}
+        # path -> (mtime_ns, size, environment, estimated bytes)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._total_bytes = 0
+
+    @staticmethod
+    def _estimate_bytes(unity_environment: UnityPy.Environment, file_size: int) -> int:
+        # Raw file buffer plus the decompressed object data UnityPy keeps around
+        return file_size + sum(
+            unity_object.byte_size for unity_object in unity_environment.objects
+        )
+
+    @contextmanager
+    def _path_lock(self, bundle_file_path: str):
+        with self._lock:
+            path_lock = self._path_locks.setdefault(bundle_file_path, [threading.Lock(), 0])
+            path_lock[1] += 1
+        try:
+            with path_lock[0]:
+                yield
+        finally:
+            with self._lock:
+                path_lock[1] -= 1
+                self._drop_unused_lock(bundle_file_path)
+
+    def _drop_unused_lock(self, bundle_file_path: str) -> None:
+        # Caller holds self._lock
+        path_lock = self._path_locks.get(bundle_file_path)
+        if path_lock and path_lock[1] == 0 and bundle_file_path not in self._entries:
+            del self._path_locks[bundle_file_path]
+
+    def _load(self, bundle_file_path: str) -> UnityPy.Environment:
+        stat_result = os.stat(bundle_file_path)
+        with self._lock:
+            cached = self._entries.get(bundle_file_path)
+            if cached and cached[:2] == (stat_result.st_mtime_ns, stat_result.st_size):
+                self._entries.move_to_end(bundle_file_path)
+                self.hits += 1
+                return cached[2]
+            self.misses += 1
+
+        with open(bundle_file_path, "rb") as bundle_file:
+            unity_environment = load_unity_bundle(bundle_file.read())
+        estimated_bytes = self._estimate_bytes(unity_environment, stat_result.st_size)
+        with self._lock:
+            self._discard(bundle_file_path)
+            if estimated_bytes <= self.max_bytes:
+                self._entries[bundle_file_path] = (
+                    stat_result.st_mtime_ns,
+                    stat_result.st_size,
+                    unity_environment,
+                    estimated_bytes,
+                )
+                self._total_bytes += estimated_bytes
+                while self._total_bytes > self.max_bytes:
+                    evicted_path, evicted = self._entries.popitem(last=False)
+                    self._total_bytes -= evicted[3]
+                    self._drop_unused_lock(evicted_path)
+        return unity_environment
+
+    def _discard(self, bundle_file_path: str) -> None:
+        cached = self._entries.pop(bundle_file_path, None)
+        if cached:
+            self._total_bytes -= cached[3]
+
+    @contextmanager
+    def checkout(self, bundle_file_path: Union[str, Path], writing: bool = False):
+        """
+        Borrow the environment of a bundle, loading it if needed.
+
+        Args:
+            bundle_file_path: Path to the Unity asset bundle file
+            writing: The caller modifies the environment/file; the entry is
+                dropped afterwards so the next reader reloads from disk
+
+        Yields:
+            Loaded Unity environment
+        """
+        bundle_file_path = str(bundle_file_path)
+        with self._path_lock(bundle_file_path):
+            try:
+                yield self._load(bundle_file_path)
+            finally:
+                if writing:
+                    self.invalidate(bundle_file_path)
+
+    def invalidate(self, bundle_file_path: Union[str, Path]) -> None:
+        """Drop the cached environment of a bundle."""
+        with self._lock:
+            self._discard(str(bundle_file_path))
+            self._drop_unused_lock(str(bundle_file_path))
+
+    def stats(self) -> dict:
+        """Return entry count, estimated byte usage and hit/miss counters."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "path_locks": len(self._path_locks),
+            }
+
+
+# Shared by the view (render_main_image) and swap (replace_main_texture) paths
+environment_cache = EnvironmentCache()
+
+
+def configure_environment_cache(max_bytes: int) -> None:
+    """Set the memory budget of the shared environment cache (used as a worker initializer)."""
+    environment_cache.max_bytes = max_bytes
+
+
+def render_main_image(
+    bundle_file_path: str,
+    width: Optional[int] = None,
+    height: Optional[int] = None,
+    image_format: str = "png",
+) -> Optional[Tuple[bytes, str]]:
+    """
+    Decode a bundle's main art and encode it, optionally resized.
+
+    Takes and returns only plain values so it can run in a worker process.
+
+    Args:
+        bundle_file_path: Path to the Unity asset bundle file
+        width: Maximum width, or None for no bound
+        height: Maximum height, or None for no bound
+        image_format: Output format ("png", "jpeg" or "webp")
+
+    Returns:
+        Tuple of (encoded_bytes, media_type), or None if the bundle has no art
+    """
+    with environment_cache.checkout(bundle_file_path) as unity_environment:
+        main_texture = find_main_texture(unity_environment)
+        if main_texture is None:
+            return None
+        main_image = remove_alpha_channel(main_texture.image)
+    return render_image_variant(main_image, width, height, image_format)
+
+
+def replace_main_texture(bundle_file_path: str, new_image_path: str) -> bool:
+    """
+    Replace the main-art texture of a bundle with a new image and save the bundle.
+
+    Takes and returns only plain values so it can run in a worker process.
+
+    Args:
+        bundle_file_path: Path to the Unity asset bundle file
+        new_image_path: Path to the new image file
+
+    Returns:
+        True if a texture was replaced, False if the bundle has no art
+    """
+    with environment_cache.checkout(bundle_file_path, writing=True) as unity_environment:
+        main_texture = find_main_texture(unity_environment)
+        if main_texture is None:
+            return False
+        replace_texture_in_bundle(
+            main_texture.texture, new_image_path, bundle_file_path, unity_environment
+        )
+    return True
+
+
 def replace_texture_in_bundle(
     texture_data,
     new_image_path: str,
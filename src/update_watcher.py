@@ -0,0 +1,397 @@
+# MTGA client update watcher for MTGA Swapper
+# Watches the Raw and AssetBundle folders (inotify on Linux, polling elsewhere) and, once a
+# client update has settled, re-applies the recorded modifications to what it replaced:
+# a new card database gets the recorded rows again, replaced bundles their MOD copies.
+
+import ctypes
+import ctypes.util
+import os
+import platform
+import select
+import sqlite3
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple, Union
+
+from src.backup_store import MOD, get_backup_store
+from src.bundle_index import art_id_key, asset_bundle_path_for_database, get_bundle_index
+from src.change_journal import load_changes
+from src.load_preset import find_mtga_db_path
+from src.preset_restore import ProgressCallback, restore_changes
+
+DATABASE_PREFIX = "Raw_CardDatabase"
+BUNDLE_SUFFIX = ".mtga"
+
+# Seconds without further events before an update is considered finished
+SETTLE_SECONDS = 5.0
+# Upper bound on waiting for a busy update to settle
+MAX_SETTLE_SECONDS = 120.0
+POLL_INTERVAL_SECONDS = 30.0
+
+# inotify event masks (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")
+
+# Reported for a directory whose events were lost (queue overflow): rescan everything
+ALL_FILES = None
+
+DirectoryEvent = Tuple[Path, Optional[str]]
+
+
+class InotifyWatch:
+    """
+    inotify watch on a few directories, through libc via ctypes.
+
+    Raises:
+        OSError: If inotify is unavailable (not Linux, no libc, watch limit reached)
+    """
+
+    def __init__(self, directories: List[Path]) -> None:
+        library = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(library, use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._directories: Dict[int, Path] = {}
+        for directory in directories:
+            watch = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+            if watch < 0:
+                error = ctypes.get_errno()
+                self.close()
+                raise OSError(error, f"inotify_add_watch failed for {directory}")
+            self._directories[watch] = directory
+
+    def read_events(self, timeout: float, rescan: bool = False) -> List[DirectoryEvent]:
+        """
+        Wait up to `timeout` seconds and return (directory, file name) events.
+
+        `rescan` is accepted for parity with PollingWatch; inotify reports every event anyway.
+        """
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events: List[DirectoryEvent] = []
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            watch, mask, _, name_length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset : offset + name_length].rstrip(b"\0").decode("utf-8", "replace")
+            offset += name_length
+            if mask & IN_Q_OVERFLOW:
+                events.extend((directory, ALL_FILES) for directory in self._directories.values())
+            elif watch in self._directories and name:
+                events.append((self._directories[watch], name))
+        return events
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingWatch:
+    """Directory watch that compares (size, mtime) listings every `interval` seconds."""
+
+    def __init__(self, directories: List[Path], interval: float = POLL_INTERVAL_SECONDS) -> None:
+        self.interval = interval
+        self._listings = {directory: self._list(directory) for directory in directories}
+        self._next_poll = time.monotonic() + interval
+
+    @staticmethod
+    def _list(directory: Path) -> Dict[str, Tuple[int, int]]:
+        listing = {}
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        stat_result = entry.stat()
+                    except OSError:
+                        continue
+                    listing[entry.name] = (stat_result.st_size, stat_result.st_mtime_ns)
+        except OSError:
+            pass
+        return listing
+
+    def read_events(self, timeout: float, rescan: bool = False) -> List[DirectoryEvent]:
+        """
+        Wait up to `timeout` seconds and return the files changed since the last poll.
+
+        Args:
+            timeout: Seconds to wait at most
+            rescan: Compare the listings after `timeout` even if the next regular
+                poll is further away (used while an update settles)
+
+        Returns:
+            (directory, file name) events; empty if no poll was due yet
+        """
+        wait = self._next_poll - time.monotonic()
+        if wait > timeout:
+            time.sleep(timeout)
+            if not rescan:
+                return []
+        else:
+            time.sleep(max(wait, 0))
+        self._next_poll = time.monotonic() + self.interval
+
+        events: List[DirectoryEvent] = []
+        for directory, previous in self._listings.items():
+            current = self._list(directory)
+            for name in previous.keys() | current.keys():
+                if previous.get(name) != current.get(name):
+                    events.append((directory, name))
+            self._listings[directory] = current
+        return events
+
+    def close(self) -> None:
+        self._listings = {}
+
+
+def open_directory_watch(directories: List[Path], poll_interval: float = POLL_INTERVAL_SECONDS):
+    """Return an inotify watch on Linux, or a polling watch where inotify is unavailable."""
+    if platform.system() == "Linux":
+        try:
+            return InotifyWatch(directories)
+        except (OSError, AttributeError) as error:
+            print(f"inotify unavailable ({error}), polling for MTGA updates instead")
+    return PollingWatch(directories, poll_interval)
+
+
+class ClientUpdate:
+    """
+    What a settled MTGA update changed.
+
+    Attributes:
+        database_file_path: New card database file, or None if the database file was not replaced
+        bundle_names: Changed bundle file names, or None if every bundle must be checked
+    """
+
+    def __init__(self, database_file_path: Optional[str], bundle_names: Optional[Set[str]]) -> None:
+        self.database_file_path = database_file_path
+        self.bundle_names = bundle_names
+
+    def art_keys(self) -> Optional[Set[str]]:
+        """ArtId keys of the changed bundles (None = all)."""
+        if self.bundle_names is None:
+            return None
+        return {key for key in map(art_id_key, self.bundle_names) if key is not None}
+
+    def describe(self) -> dict:
+        return {
+            "database_file_path": self.database_file_path,
+            "bundles": None if self.bundle_names is None else sorted(self.bundle_names),
+        }
+
+
+def latest_database_file(raw_directory: Union[str, Path]) -> Optional[str]:
+    """
+    Return the newest Raw_CardDatabase file in a Raw folder, or the one
+    find_mtga_db_path() detects if the folder is gone.
+    """
+    try:
+        candidates = [
+            entry
+            for entry in os.scandir(raw_directory)
+            if entry.name.startswith(DATABASE_PREFIX) and entry.name.endswith(BUNDLE_SUFFIX)
+        ]
+    except OSError:
+        return find_mtga_db_path()
+    if not candidates:
+        return None
+    return max(candidates, key=lambda entry: entry.stat().st_mtime_ns).path
+
+
+def reapply_update(
+    cursor: sqlite3.Cursor,
+    connection: sqlite3.Connection,
+    update: ClientUpdate,
+    changes_path: str,
+    asset_bundle_path: str,
+    on_progress: Optional[ProgressCallback] = None,
+    before_write: Optional[Callable[[sqlite3.Connection], None]] = None,
+) -> dict:
+    """
+    Writer job: re-apply the recorded changes an update may have undone.
+
+    A new database gets every recorded row (the diff stage writes only the
+    rows that differ); a bundle-only update re-applies the rows whose ArtId
+    lives in a changed bundle. Only MOD copies of changed bundles are restored.
+
+    Args:
+        cursor: Cursor of the writer connection
+        connection: Writer connection
+        update: Settled update from the watcher
+        changes_path: Path to changes.json
+        asset_bundle_path: Path to the MTGA AssetBundle directory
+        on_progress: Callback receiving (current, total, message)
+        before_write: Passed to restore_changes (called only if rows will be written)
+
+    Returns:
+        restore_changes report plus the bundle counts of the targeted restore
+    """
+    changes_data = load_changes(changes_path)
+    art_keys = update.art_keys()
+    if update.database_file_path is None and art_keys is not None:
+        changes_data = {
+            grp_id: row
+            for grp_id, row in changes_data.items()
+            if art_id_key(row.get("ArtId")) in art_keys
+        }
+
+    bundle_index = get_bundle_index(asset_bundle_path)
+    bundle_index.refresh()
+    restored, unchanged = get_backup_store().restore_all(
+        MOD,
+        bundle_index.find_path,
+        on_progress,
+        include=None if art_keys is None else (lambda file_name: art_id_key(file_name) in art_keys),
+    )
+    report = restore_changes(cursor, connection, changes_data, None, on_progress, before_write=before_write)
+    report["bundles_restored"] = restored
+    report["bundles_unchanged"] = unchanged
+    return report
+
+
+class UpdateWatcher:
+    """
+    Background thread turning file events under an MTGA install into ClientUpdates.
+
+    Events are collected until the folders have been quiet for SETTLE_SECONDS
+    (an update writes many files), then `on_update` is called on the watcher
+    thread. Writes of the configured database file itself are ignored, since
+    the swapper writes it too; only a different Raw_CardDatabase file counts
+    as a new database. Bundles the swapper wrote itself (art swaps, MOD
+    restores) are dropped from the update as long as they still hold the
+    content it wrote (see BackupStore.note_own_write).
+    """
+
+    def __init__(
+        self,
+        database_file_path: Union[str, Path],
+        on_update: Callable[[ClientUpdate], None],
+        settle_seconds: float = SETTLE_SECONDS,
+        poll_interval: float = POLL_INTERVAL_SECONDS,
+    ) -> None:
+        self.database_file_path = Path(database_file_path)
+        self.raw_directory = self.database_file_path.parent
+        self.asset_bundle_path = asset_bundle_path_for_database(str(self.database_file_path))
+        self.on_update = on_update
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.updates_handled = 0
+        self.last_update: Optional[dict] = None
+        self.last_error: Optional[str] = None
+        self.mode: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="mtga-update-watcher", daemon=True)
+            self._thread.start()
+
+    def stop_requested(self) -> bool:
+        """True once stop() has been called (callbacks waiting on other threads should give up)."""
+        return self._stop.is_set()
+
+    def stop(self, timeout: Optional[float] = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _collect(self, events: List[DirectoryEvent], pending: dict) -> None:
+        for directory, name in events:
+            if directory == self.raw_directory:
+                if name is ALL_FILES or (
+                    name.startswith(DATABASE_PREFIX)
+                    and name.endswith(BUNDLE_SUFFIX)
+                    and name != self.database_file_path.name
+                ):
+                    pending["database"] = True
+            elif name is ALL_FILES:
+                pending["bundles"] = ALL_FILES
+            elif name.endswith(BUNDLE_SUFFIX) and pending["bundles"] is not ALL_FILES:
+                pending["bundles"].add(name)
+
+    @staticmethod
+    def _has_events(pending: dict) -> bool:
+        return pending["database"] or pending["bundles"] is ALL_FILES or bool(pending["bundles"])
+
+    def _settled_update(self, pending: dict) -> Optional[ClientUpdate]:
+        database_file_path = None
+        if pending["database"] or not self.database_file_path.exists():
+            latest = latest_database_file(self.raw_directory)
+            if latest and Path(latest) != self.database_file_path:
+                database_file_path = latest
+        bundle_names = pending["bundles"]
+        if bundle_names is not ALL_FILES:
+            backup_store = get_backup_store()
+            bundle_names = {
+                name for name in bundle_names if not backup_store.is_own_write(self.asset_bundle_path / name)
+            }
+        if database_file_path is None and bundle_names is not ALL_FILES and not bundle_names:
+            return None
+        return ClientUpdate(database_file_path, bundle_names)
+
+    def _run(self) -> None:
+        directories = [self.raw_directory]
+        if self.asset_bundle_path.is_dir():
+            directories.append(self.asset_bundle_path)
+        watch = open_directory_watch(directories, self.poll_interval)
+        self.mode = "inotify" if isinstance(watch, InotifyWatch) else "polling"
+        print(f"Watching {', '.join(map(str, directories))} for MTGA updates ({self.mode})")
+        try:
+            while not self._stop.is_set():
+                pending = {"database": False, "bundles": set()}
+                self._collect(watch.read_events(1.0), pending)
+                if not self._has_events(pending):
+                    continue
+
+                # Wait for the update to finish writing before acting on it; a polling watch
+                # rescans every settle_seconds here instead of waiting for its next poll
+                started = time.monotonic()
+                while not self._stop.is_set() and time.monotonic() - started < MAX_SETTLE_SECONDS:
+                    events = watch.read_events(self.settle_seconds, rescan=True)
+                    if not events:
+                        break
+                    self._collect(events, pending)
+
+                update = self._settled_update(pending)
+                if update is None or self._stop.is_set():
+                    continue
+                print(f"MTGA update detected: {update.describe()}")
+                try:
+                    self.on_update(update)
+                    self.last_error = None
+                except Exception as e:
+                    self.last_error = str(e)
+                    print(f"Error re-applying modifications after MTGA update: {e}")
+                if update.database_file_path:
+                    self.database_file_path = Path(update.database_file_path)
+                self.updates_handled += 1
+                self.last_update = {"time": time.time(), **update.describe()}
+        finally:
+            watch.close()
+
+    def stats(self) -> dict:
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "mode": self.mode,
+            "database_file_path": str(self.database_file_path),
+            "updates_handled": self.updates_handled,
+            "last_update": self.last_update,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,2 @@
+# Tests for MTGA Swapper
+# Run from the repository root with: python -m pytest -q
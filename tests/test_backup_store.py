@@ -0,0 +1,130 @@
+# Tests for the content-addressed bundle backup store
+
+import os
+
+import pytest
+
+from src.backup_store import MOD, ORIGINAL, BackupStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BackupStore(tmp_path / "backups")
+
+
+@pytest.fixture
+def bundle_directory(tmp_path):
+    directory = tmp_path / "AssetBundle"
+    directory.mkdir()
+    return directory
+
+
+def write_bundle(directory, name, data):
+    path = directory / name
+    path.write_bytes(data)
+    return path
+
+
+def test_identical_content_is_stored_once(store, bundle_directory):
+    first = write_bundle(bundle_directory, "1_CardArt_a.mtga", b"same" * 1000)
+    second = write_bundle(bundle_directory, "2_CardArt_b.mtga", b"same" * 1000)
+
+    assert store.put(MOD, first) == store.put(MOD, second) == store.put(ORIGINAL, first)
+
+    stats = store.stats()
+    assert stats["objects"] == 1
+    assert stats["entries"] == {MOD: 2, ORIGINAL: 1}
+    assert stats["objects_written"] == 1
+    assert stats["copies_skipped"] == 2
+
+
+def test_compressible_bundles_are_deflated_and_others_kept_raw(store, bundle_directory):
+    compressible = write_bundle(bundle_directory, "1_CardArt_a.mtga", b"a" * 100_000)
+    incompressible = write_bundle(bundle_directory, "2_CardArt_b.mtga", os.urandom(100_000))
+
+    store.put(MOD, compressible)
+    store.put(MOD, incompressible)
+
+    rows = store._get_connection().execute("SELECT codec, stored_size FROM objects ORDER BY codec").fetchall()
+    assert [codec for codec, _ in rows] == ["raw", "zlib"]
+    assert dict(rows)["zlib"] < 1000
+
+
+@pytest.mark.parametrize("data", [b"a" * 100_000, os.urandom(50_000)])
+def test_restore_all_round_trips_and_skips_matching_files(store, bundle_directory, data):
+    bundle = write_bundle(bundle_directory, "1_CardArt_a.mtga", data)
+    store.put(MOD, bundle)
+    bundle.write_bytes(b"replaced by an update")
+
+    assert store.restore_all(MOD, lambda name: bundle_directory / name) == (1, 0)
+    assert bundle.read_bytes() == data
+    assert store.restore_all(MOD, lambda name: bundle_directory / name) == (0, 1)
+
+
+def test_dry_run_and_include_do_not_write(store, bundle_directory):
+    bundle = write_bundle(bundle_directory, "1_CardArt_a.mtga", b"mod")
+    store.put(MOD, bundle)
+    bundle.write_bytes(b"update")
+
+    assert store.restore_all(MOD, lambda name: bundle_directory / name, dry_run=True) == (1, 0)
+    assert store.restore_all(MOD, lambda name: bundle_directory / name, include=lambda name: False) == (0, 0)
+    assert bundle.read_bytes() == b"update"
+
+
+def test_prune_removes_superseded_objects(store, bundle_directory):
+    bundle = write_bundle(bundle_directory, "1_CardArt_a.mtga", b"first swap")
+    store.put(MOD, bundle)
+    bundle.write_bytes(b"second swap")
+    store.put(MOD, bundle)
+    assert store.stats()["orphaned_objects"] == 1
+
+    assert store.prune() == 1
+
+    stats = store.stats()
+    assert stats["objects"] == 1
+    assert stats["orphaned_objects"] == 0
+    assert stats["objects_pruned"] == 1
+    assert len(list(store.objects_directory.glob("*/*"))) == 1
+    assert store.prune() == 0
+
+
+def test_own_writes_are_recognised_until_the_file_changes(store, bundle_directory):
+    bundle = write_bundle(bundle_directory, "1_CardArt_a.mtga", b"swapped art")
+    assert not store.is_own_write(bundle)
+
+    store.put(MOD, bundle)
+    assert store.is_own_write(bundle)
+
+    bundle.write_bytes(b"new client version")
+    assert not store.is_own_write(bundle)
+
+    store.restore_all(MOD, lambda name: bundle_directory / name)
+    assert store.is_own_write(bundle)
+
+
+def test_legacy_copies_are_imported_and_removed(tmp_path, bundle_directory):
+    backup_directory = tmp_path / "backups"
+    backup_directory.mkdir()
+    (backup_directory / "MOD_1_CardArt_a.mtga").write_bytes(b"legacy mod" * 1000)
+    (backup_directory / "BACKUP_1_CardArt_a.mtga").write_bytes(os.urandom(1000))
+
+    store = BackupStore(backup_directory)
+
+    assert [name for name, _ in store.entries(MOD)] == ["1_CardArt_a.mtga"]
+    assert [name for name, _ in store.entries(ORIGINAL)] == ["1_CardArt_a.mtga"]
+    assert list(backup_directory.glob("*.mtga")) == []
+    assert store.restore_all(MOD, lambda name: bundle_directory / name) == (1, 0)
+    assert (bundle_directory / "1_CardArt_a.mtga").read_bytes() == b"legacy mod" * 1000
+
+
+def test_legacy_copy_is_kept_if_its_object_does_not_verify(tmp_path, monkeypatch):
+    backup_directory = tmp_path / "backups"
+    backup_directory.mkdir()
+    legacy = backup_directory / "MOD_1_CardArt_a.mtga"
+    legacy.write_bytes(b"legacy mod")
+    monkeypatch.setattr(BackupStore, "_verify_object", lambda self, sha256: False)
+
+    store = BackupStore(backup_directory)
+
+    assert [name for name, _ in store.entries(MOD)] == ["1_CardArt_a.mtga"]
+    assert legacy.read_bytes() == b"legacy mod"
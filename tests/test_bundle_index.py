@@ -0,0 +1,87 @@
+# Tests for the ArtId -> AssetBundle file index
+
+import os
+
+import pytest
+
+from src.bundle_index import BundleIndex, art_id_key
+
+
+@pytest.fixture
+def bundle_directory(tmp_path):
+    directory = tmp_path / "AssetBundle"
+    directory.mkdir()
+    for name in ("001155_CardArt_a.mtga", "400002_CardArt_b.mtga", "catalog.json", "Fonts_x.mtga"):
+        (directory / name).write_bytes(b"x")
+    return directory
+
+
+@pytest.fixture
+def index_file(tmp_path):
+    return tmp_path / "cache" / "bundle_index.json"
+
+
+def touch_directory(directory, seconds=10):
+    # Directory mtimes can have coarse resolution; make every change visible
+    stat_result = directory.stat()
+    os.utime(directory, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns + seconds * 1_000_000_000))
+
+
+def test_art_id_key_drops_leading_zeros():
+    assert art_id_key("001155_CardArt_a.mtga") == art_id_key(1155) == "1155"
+    assert art_id_key("Fonts_x.mtga") is None
+    assert art_id_key(None) is None
+
+
+def test_find_resolves_art_ids_to_bundle_files(bundle_directory, index_file):
+    index = BundleIndex(bundle_directory, index_file)
+
+    assert index.find(1155) == "001155_CardArt_a.mtga"
+    assert index.find_path("400002") == bundle_directory / "400002_CardArt_b.mtga"
+    assert index.find(9) is None
+
+
+def test_refresh_picks_up_added_and_removed_files(bundle_directory, index_file):
+    index = BundleIndex(bundle_directory, index_file)
+    index.refresh()
+
+    (bundle_directory / "400002_CardArt_b.mtga").unlink()
+    (bundle_directory / "400003_CardArt_c.mtga").write_bytes(b"x")
+    touch_directory(bundle_directory)
+
+    assert index.find(400003) == "400003_CardArt_c.mtga"
+    assert index.find(400002) is None
+    assert index.refresh() is False
+
+
+def test_refresh_skips_the_scan_while_the_directory_is_unchanged(bundle_directory, index_file, monkeypatch):
+    index = BundleIndex(bundle_directory, index_file)
+    index.refresh()
+
+    def no_scan(path):
+        raise AssertionError("directory rescanned although its mtime did not change")
+
+    monkeypatch.setattr(os, "scandir", no_scan)
+    assert index.refresh() is False
+    assert index.find(1155) == "001155_CardArt_a.mtga"
+
+
+def test_persisted_index_is_reused_and_updated_incrementally(bundle_directory, index_file):
+    BundleIndex(bundle_directory, index_file).refresh()
+    assert index_file.exists()
+
+    reloaded = BundleIndex(bundle_directory, index_file)
+    assert reloaded.refresh() is False
+
+    (bundle_directory / "001155_CardArt_a2.mtga").write_bytes(b"x")
+    touch_directory(bundle_directory)
+    assert reloaded.refresh() is True
+    assert reloaded.find(1155) == "001155_CardArt_a.mtga"
+
+
+def test_index_of_another_directory_is_ignored(bundle_directory, index_file, tmp_path):
+    BundleIndex(bundle_directory, index_file).refresh()
+    other = tmp_path / "OtherBundles"
+    other.mkdir()
+
+    assert BundleIndex(other, index_file).find(1155) is None
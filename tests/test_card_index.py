@@ -0,0 +1,223 @@
+# Tests for keyset pagination over the sidecar card index
+
+import sqlite3
+
+import pytest
+
+from src.card_index import LISTING_COLUMNS, CardIndex, decode_cursor, encode_cursor
+
+CARD_COUNT = 25
+
+
+@pytest.fixture
+def card_index(tmp_path):
+    database_file_path = tmp_path / "Raw_CardDatabase_test.mtga"
+    connection = sqlite3.connect(database_file_path)
+    connection.executescript(
+        """
+        CREATE TABLE Cards (
+            GrpId INTEGER PRIMARY KEY, ArtId INTEGER, Order_Title TEXT, ExpansionCode TEXT,
+            ArtSize INTEGER, TitleId INTEGER, LinkedFaceGrpIds TEXT,
+            IsDigitalOnly INTEGER, IsRebalanced INTEGER
+        );
+        CREATE TABLE Localizations_koKR (LocId INTEGER, Loc TEXT);
+        """
+    )
+    # Few distinct names and sets, so most sort values tie and grp_id decides the order
+    connection.executemany(
+        "INSERT INTO Cards VALUES (?, ?, ?, ?, 0, ?, '', 0, 0)",
+        [
+            (1000 + index, 500 - index, f"card {index % 4}", f"S{index % 3}", index)
+            for index in range(CARD_COUNT)
+        ],
+    )
+    connection.commit()
+    connection.close()
+    return CardIndex(database_file_path, tmp_path / "index")
+
+
+def walk_pages(card_index, sort_by, limit, search=None):
+    rows, cursor = card_index.list_cards(search, sort_by, limit)
+    pages = [rows]
+    while cursor:
+        rows, cursor = card_index.list_cards(search, sort_by, limit, cursor=cursor)
+        pages.append(rows)
+    return pages
+
+
+@pytest.mark.parametrize("sort_by", ["Name", "Set", "GrpID", "ArtID"])
+@pytest.mark.parametrize("limit", [1, 7, 25, 40])
+def test_keyset_pages_match_the_full_listing(card_index, sort_by, limit):
+    full_listing, _ = card_index.list_cards(None, sort_by, CARD_COUNT + 1)
+
+    pages = walk_pages(card_index, sort_by, limit)
+
+    assert [row for page in pages for row in page] == full_listing
+    assert all(len(page) == limit for page in pages[:-1])
+    assert len(full_listing) == CARD_COUNT
+
+
+def test_keyset_pages_match_offset_pages(card_index):
+    keyset_pages = walk_pages(card_index, "Name", 6)
+
+    for number, page in enumerate(keyset_pages):
+        by_offset, _ = card_index.list_cards(None, "Name", 6, number * 6)
+        assert by_offset == page
+
+
+def test_search_narrows_the_pages(card_index):
+    pages = walk_pages(card_index, "Name", 2, search="card 1")
+
+    names = {row[0] for page in pages for row in page}
+    assert names == {"card 1"}
+    assert card_index.count_cards("card 1") == sum(len(page) for page in pages)
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor("name", "card 1", 1005)
+
+    assert decode_cursor(cursor) == ("name", "card 1", 1005)
+    assert "=" not in cursor
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor", "e30", ""])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_cursor_of_another_sort_order_is_rejected(card_index):
+    _, cursor = card_index.list_cards(None, "Name", 5)
+
+    with pytest.raises(ValueError):
+        card_index.list_cards(None, "Set", 5, cursor=cursor)
+
+
+@pytest.fixture
+def database_file_path(tmp_path):
+    database_file_path = tmp_path / "Raw_CardDatabase_search.mtga"
+    connection = sqlite3.connect(database_file_path)
+    connection.executescript(
+        """
+        CREATE TABLE Cards (
+            GrpId INTEGER PRIMARY KEY, ArtId INTEGER, Order_Title TEXT, ExpansionCode TEXT,
+            ArtSize INTEGER, TitleId INTEGER, LinkedFaceGrpIds TEXT,
+            IsDigitalOnly INTEGER, IsRebalanced INTEGER, tags TEXT
+        );
+        CREATE TABLE Localizations_koKR (LocId INTEGER, Loc TEXT);
+        INSERT INTO Cards VALUES
+            (1, 101, 'Grizzly Bears', 'M21', 0, 11, '', 0, 0, ''),
+            (2, 102, '', 'NEO', 0, 12, '3', 0, 0, ''),
+            (3, 103, 'Front Face', 'NEO', 0, 13, '', 1, 0, ''),
+            (4, 104, 'Forest', 'M21', 0, 14, '', 0, 0, ''),
+            (5, 105, 'Llanowar Elves', 'DMU', 0, 15, '', 0, 1, ''),
+            (6, 106, '', 'M21', 0, 16, '', 0, 0, '');
+        INSERT INTO Localizations_koKR VALUES (11, '회색곰'), (15, '라노워 엘프');
+        """
+    )
+    connection.commit()
+    connection.close()
+    return database_file_path
+
+
+@pytest.fixture
+def search_index(database_file_path, tmp_path):
+    return CardIndex(database_file_path, tmp_path / "index")
+
+
+def found(card_index, search):
+    rows, _ = card_index.list_cards(search, "GrpID", 100)
+    return [row[3] for row in rows]
+
+
+@pytest.mark.parametrize(
+    "search, grp_ids",
+    [
+        ("izzly", [1]),
+        ("GRIZZ", [1]),
+        ("회색곰", [1]),
+        ("Front Face", [2, 3]),
+        ("neo", [2, 3]),
+        ("105", [5]),
+        ("no such card", []),
+    ],
+)
+def test_trigram_search_matches_every_searched_column(search_index, search, grp_ids):
+    assert found(search_index, search) == grp_ids
+    assert search_index.count_cards(search) == len(grp_ids)
+
+
+@pytest.mark.parametrize("search", ["izzly", "회색곰", "Front Face", "neo", "105", "ll", "곰", "5"])
+def test_trigram_and_like_searches_agree(search_index, search):
+    with_fts = found(search_index, search)
+
+    search_index._has_fts = False
+
+    assert found(search_index, search) == with_fts
+
+
+def test_short_searches_fall_back_to_like(search_index):
+    search_index.ensure_built()
+
+    assert "MATCH" in search_index.search_filter_sql("elves")[0]
+    assert "LIKE" in search_index.search_filter_sql("el")[0]
+    assert found(search_index, "곰") == [1]
+
+
+def test_quotes_in_a_search_are_matched_literally(search_index):
+    assert found(search_index, 'Bears"') == []
+    assert found(search_index, '"Grizzly"') == []
+
+
+def test_listing_resolves_flip_sides_korean_names_and_alchemy(search_index):
+    rows, _ = search_index.list_cards(None, "GrpID", 100)
+
+    listing = {row[3]: dict(zip(LISTING_COLUMNS, row)) for row in rows}
+    assert sorted(listing) == [1, 2, 3, 4, 5]
+    assert listing[2]["name"] == "Front Face-flip-side"
+    assert listing[1]["korean_name"] == "회색곰"
+    assert [grp_id for grp_id, row in listing.items() if row["is_alchemy"]] == [3, 5]
+
+
+def test_select_grp_ids_filters_for_bulk_operations(search_index):
+    assert sorted(search_index.select_grp_ids()) == [1, 2, 3, 5]
+    assert sorted(search_index.select_grp_ids(exclude_basic_lands=False)) == [1, 2, 3, 4, 5]
+    assert search_index.select_grp_ids(name_prefix="grizz") == [1]
+    assert search_index.select_grp_ids(name_prefix="%") == []
+    assert sorted(search_index.select_grp_ids(set_code="neo")) == [2, 3]
+
+
+def edit_cards(database_file_path, sql):
+    connection = sqlite3.connect(database_file_path)
+    connection.execute(sql)
+    connection.commit()
+    connection.close()
+
+
+def test_style_edits_do_not_rebuild_the_index(search_index, database_file_path):
+    first_path = search_index.ensure_built()
+
+    edit_cards(database_file_path, "UPDATE Cards SET tags = '1696804317'")
+
+    assert search_index.ensure_built() == first_path
+    assert search_index.builds == 1
+
+
+def test_card_changes_rebuild_and_replace_the_index(search_index, database_file_path, tmp_path):
+    first_path = search_index.ensure_built()
+
+    edit_cards(database_file_path, "UPDATE Cards SET Order_Title = 'Black Bear' WHERE GrpId = 1")
+
+    assert found(search_index, "Black Bear") == [1]
+    assert search_index.builds == 2
+    assert list((tmp_path / "index").glob("card_index_*.db")) == [search_index.ensure_built()]
+    assert not first_path.exists()
+
+
+def test_a_built_index_is_reused_by_a_new_process(search_index, database_file_path, tmp_path):
+    index_file_path = search_index.ensure_built()
+
+    reopened = CardIndex(database_file_path, tmp_path / "index")
+
+    assert reopened.ensure_built() == index_file_path
+    assert reopened.builds == 0
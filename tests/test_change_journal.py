@@ -0,0 +1,92 @@
+# Tests for the SQLite change journal behind changes.json
+
+import json
+
+import pytest
+
+from src.change_journal import ChangeJournal, journal_path_for, load_changes
+from src.load_preset import save_loc_id_info
+
+
+@pytest.fixture
+def changes_path(tmp_path):
+    return tmp_path / "changes.json"
+
+
+def write_json(path, data):
+    path.write_text(json.dumps(data, indent=4))
+
+
+def test_existing_changes_json_is_imported_in_order(changes_path):
+    write_json(
+        changes_path,
+        {
+            "2": {"tags": "a", "Localizations_enUS": {"10": "Two"}},
+            "1": {"tags": "b"},
+        },
+    )
+
+    journal = ChangeJournal(changes_path)
+
+    assert journal.changes() == {
+        "2": {"tags": "a", "Localizations_enUS": {"10": "Two"}},
+        "1": {"tags": "b"},
+    }
+    assert journal.count() == 2
+    assert journal_path_for(changes_path).exists()
+
+
+def test_recording_a_card_again_keeps_its_position_and_drops_its_overrides(changes_path):
+    journal = ChangeJournal(changes_path)
+    journal.record_cards([("1", {"tags": "a"}), ("2", {"tags": "b"})])
+    journal.record_localization("1", "10", "One")
+
+    journal.record_cards([("1", {"tags": "c"})])
+
+    assert journal.changes() == {"1": {"tags": "c"}, "2": {"tags": "b"}}
+
+
+def test_localizations_need_a_recorded_card(changes_path):
+    journal = ChangeJournal(changes_path)
+
+    with pytest.raises(KeyError):
+        journal.record_localization("9", "10", "Nine")
+
+
+def test_export_round_trips_and_is_not_reimported(changes_path):
+    journal = ChangeJournal(changes_path)
+    journal.record_cards([("3", {"tags": "a"}), ("1", {"ArtId": 5})])
+    journal.record_localization("3", "30", "Three")
+
+    assert journal.export_json() == 2
+    exported = json.loads(changes_path.read_text())
+    journal.close()
+
+    reopened = ChangeJournal(changes_path)
+    assert reopened.changes() == exported
+    assert list(exported) == ["3", "1"]
+    assert load_changes(changes_path) == exported
+
+
+def test_external_edit_is_merged_without_losing_unexported_records(changes_path):
+    journal = ChangeJournal(changes_path)
+    journal.record_cards([("1", {"tags": "a"})])
+    journal.export_json()
+    journal.record_cards([("2", {"tags": "only in the journal"})])
+
+    write_json(changes_path, {"1": {"tags": "edited", "Localizations_enUS": {"10": "One"}}, "3": {"tags": "c"}})
+
+    assert journal.changes() == {
+        "1": {"tags": "edited", "Localizations_enUS": {"10": "One"}},
+        "2": {"tags": "only in the journal"},
+        "3": {"tags": "c"},
+    }
+
+
+def test_save_loc_id_info_returns_only_the_recorded_change(changes_path):
+    journal = ChangeJournal(changes_path)
+    journal.record_cards([("1", {"tags": "a"}), ("2", {"tags": "b"})])
+    journal.close()
+
+    assert save_loc_id_info(str(changes_path), "10", "One", "1") == {"1": {"Localizations_enUS": {"10": "One"}}}
+    assert load_changes(changes_path)["1"]["Localizations_enUS"] == {"10": "One"}
@@ -0,0 +1,174 @@
+# Tests for the API's SQLite connection manager
+
+import asyncio
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from backend.database import DatabaseManager
+
+
+@pytest.fixture
+def database_path(tmp_path):
+    path = tmp_path / "Raw_CardDatabase_test.mtga"
+    connection = sqlite3.connect(path)
+    connection.executescript(
+        """
+        CREATE TABLE Cards (GrpId INTEGER PRIMARY KEY, ArtId INTEGER, TitleId INTEGER,
+                            Order_Title TEXT, ArtistCredit TEXT, Rarity INTEGER, tags TEXT);
+        CREATE TABLE Localizations_enUS (LocId INTEGER, Formatted INTEGER, Loc TEXT);
+        CREATE TABLE Abilities (Id INTEGER PRIMARY KEY, Text TEXT);
+        INSERT INTO Cards VALUES (1, 400001, 10, 'goblin guide', 'Jane Doe', 1, '');
+        INSERT INTO Cards VALUES (2, 400002, 20, 'goblin token', 'Jane Doe', 0, '');
+        INSERT INTO Localizations_enUS VALUES (10, 1, 'Goblin Guide'), (20, 1, 'Goblin');
+        """
+    )
+    connection.commit()
+    connection.close()
+    return path
+
+
+@pytest.fixture
+def snapshot_manager(database_path):
+    manager = DatabaseManager(database_path, readers=2, memory_snapshot=True)
+    yield manager
+    manager.close()
+
+
+def titles(connection):
+    return [row[0] for row in connection.execute("SELECT Order_Title FROM Cards ORDER BY GrpId")]
+
+
+def test_memory_snapshot_keeps_only_the_card_tables(snapshot_manager):
+    tables = asyncio.run(
+        snapshot_manager.read(
+            lambda connection: [row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+        )
+    )
+
+    assert sorted(tables) == ["Cards", "Localizations_enUS"]
+    assert asyncio.run(snapshot_manager.read(titles)) == ["goblin guide", "goblin token"]
+
+
+def test_memory_snapshot_readers_cannot_write(snapshot_manager):
+    with pytest.raises(sqlite3.OperationalError):
+        asyncio.run(snapshot_manager.read(lambda connection: connection.execute("DELETE FROM Cards")))
+
+
+def test_memory_snapshot_refreshes_after_a_write_job(snapshot_manager):
+    asyncio.run(snapshot_manager.read(titles))
+
+    def rename(cursor, connection):
+        cursor.execute("UPDATE Cards SET Order_Title = 'renamed' WHERE GrpId = 1")
+
+    asyncio.run(snapshot_manager.write(rename))
+
+    assert asyncio.run(snapshot_manager.read(titles)) == ["renamed", "goblin token"]
+    assert snapshot_manager.stats()["snapshot_refreshes"] == 2
+
+
+def test_memory_snapshot_refreshes_after_an_external_change(snapshot_manager, database_path):
+    asyncio.run(snapshot_manager.read(titles))
+    connection = sqlite3.connect(database_path)
+    connection.execute("DELETE FROM Cards WHERE GrpId = 2")
+    connection.commit()
+    connection.close()
+
+    assert asyncio.run(snapshot_manager.read(titles)) == ["goblin guide"]
+
+
+def test_memory_snapshot_is_reused_between_reads(snapshot_manager):
+    for _ in range(3):
+        asyncio.run(snapshot_manager.read(titles))
+
+    assert snapshot_manager.stats()["snapshot_refreshes"] == 1
+
+
+def test_art_and_token_searches_run_on_the_snapshot(snapshot_manager):
+    from src.sql_editor import find_art_id_by_card_name, get_tokens_by_artist
+
+    arts = asyncio.run(snapshot_manager.read(lambda connection: find_art_id_by_card_name("guide", connection.cursor())))
+    tokens = asyncio.run(snapshot_manager.read(lambda connection: get_tokens_by_artist("Doe", connection.cursor())))
+
+    assert arts == [("400001", "Goblin Guide")]
+    assert tokens == [("Jane Doe", 400002)]
+
+
+@pytest.fixture
+def manager(database_path):
+    manager = DatabaseManager(database_path, readers=2)
+    yield manager
+    manager.close()
+
+
+def test_readers_see_the_last_commit_while_a_write_is_open(manager):
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_rename(cursor, connection):
+        cursor.execute("UPDATE Cards SET Order_Title = 'renamed' WHERE GrpId = 1")
+        started.set()
+        release.wait(5)
+
+    async def scenario():
+        job = asyncio.ensure_future(manager.write(slow_rename))
+        await asyncio.to_thread(started.wait, 5)
+        during = await manager.read(titles)
+        release.set()
+        await job
+        return during, await manager.read(titles)
+
+    during, after = asyncio.run(scenario())
+
+    assert during == ["goblin guide", "goblin token"]
+    assert after == ["renamed", "goblin token"]
+
+
+def test_pooled_readers_are_read_only(manager):
+    with pytest.raises(sqlite3.OperationalError):
+        asyncio.run(manager.read(lambda connection: connection.execute("DELETE FROM Cards")))
+    assert manager.stats()["readers_open"] == 1
+
+
+def test_failed_write_rolls_back_and_notifies_listeners(manager):
+    calls = []
+    manager.add_write_listener(lambda: calls.append("write"))
+    manager.add_rollback_listener(lambda: calls.append("rollback"))
+
+    def failing(cursor, connection):
+        cursor.execute("DELETE FROM Cards")
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        asyncio.run(manager.write(failing))
+    asyncio.run(manager.write(lambda cursor, connection: None))
+
+    assert calls == ["rollback", "write", "write"]
+    assert asyncio.run(manager.read(titles)) == ["goblin guide", "goblin token"]
+    assert manager.stats()["writes"] == 2
+
+
+def test_uncommitted_writes_are_committed_after_the_job(manager, database_path):
+    asyncio.run(manager.write(lambda cursor, connection: cursor.execute("DELETE FROM Cards WHERE GrpId = 2")))
+
+    connection = sqlite3.connect(database_path)
+    assert connection.execute("SELECT COUNT(*) FROM Cards").fetchone() == (1,)
+    connection.close()
+
+
+def test_close_when_idle_waits_for_queued_writes(manager):
+    def rename(cursor, connection):
+        time.sleep(0.1)
+        cursor.execute("UPDATE Cards SET Order_Title = 'renamed' WHERE GrpId = 1")
+
+    async def scenario():
+        job = asyncio.ensure_future(manager.write(rename))
+        await asyncio.sleep(0)
+        await manager.close_when_idle()
+        return job.done()
+
+    assert asyncio.run(scenario())
+    with pytest.raises(sqlite3.ProgrammingError):
+        asyncio.run(manager.read(titles))
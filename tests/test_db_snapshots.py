@@ -0,0 +1,79 @@
+# Tests for card database snapshots and their retention
+
+import sqlite3
+
+import pytest
+
+from src.db_snapshots import SnapshotStore, snapshot_before, snapshot_hook
+
+
+@pytest.fixture
+def database(tmp_path):
+    connection = sqlite3.connect(tmp_path / "Raw_CardDatabase_test.mtga")
+    connection.execute("CREATE TABLE Cards (GrpId INTEGER PRIMARY KEY, tags TEXT)")
+    connection.executemany("INSERT INTO Cards VALUES (?, ?)", [(grp_id, "") for grp_id in range(200)])
+    connection.commit()
+    yield connection
+    connection.close()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SnapshotStore(tmp_path / "snapshots", max_snapshots=3)
+
+
+def test_restore_brings_back_the_snapshot_contents(store, database):
+    snapshot = store.take(database, "before edit", "Raw_CardDatabase_test.mtga")
+    database.execute("UPDATE Cards SET tags = ',1,'")
+    database.execute("DELETE FROM Cards WHERE GrpId >= 100")
+    database.commit()
+
+    store.restore(snapshot["id"], database)
+
+    assert database.execute("SELECT COUNT(*), MAX(tags) FROM Cards").fetchone() == (200, "")
+    assert snapshot["database"] == "Raw_CardDatabase_test.mtga"
+    assert snapshot["compressed_size"] < snapshot["size"]
+
+
+def test_retention_keeps_the_newest_snapshots(store, database):
+    taken = [store.take(database, f"job {index}")["id"] for index in range(5)]
+
+    kept = [snapshot["id"] for snapshot in store.list()]
+
+    assert kept == list(reversed(taken[2:]))
+    files = sorted(path.name for path in store.directory.glob("*.sqlite.gz"))
+    assert files == sorted(snapshot["file"] for snapshot in store.list())
+
+
+def test_size_limit_prunes_but_keeps_the_newest(store, database):
+    first = store.take(database, "first")
+    store.max_total_bytes = first["compressed_size"]
+
+    second = store.take(database, "second")
+
+    assert [snapshot["id"] for snapshot in store.list()] == [second["id"]]
+
+
+def test_delete_and_unknown_snapshots(store, database):
+    snapshot = store.take(database, "manual")
+
+    store.delete(snapshot["id"])
+
+    assert store.list() == []
+    with pytest.raises(KeyError):
+        store.get(snapshot["id"])
+    with pytest.raises(KeyError):
+        store.restore(snapshot["id"], database)
+
+
+def test_snapshot_before_and_hook_snapshot_through_the_writer_connection(tmp_path, database, monkeypatch):
+    store = SnapshotStore(tmp_path / "snapshots")
+    monkeypatch.setattr("src.db_snapshots.get_snapshot_store", lambda: store)
+    database.execute("UPDATE Cards SET tags = 'pending' WHERE GrpId = 0")
+
+    job = snapshot_before(lambda cursor, connection, value: value, "bulk")
+    assert job(database.cursor(), database, 42) == 42
+    snapshot_hook("reapply")(database)
+
+    assert [snapshot["label"] for snapshot in store.list()] == ["reapply", "bulk"]
+    assert not database.in_transaction
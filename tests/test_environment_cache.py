@@ -0,0 +1,106 @@
+# Tests for the UnityPy environment cache
+# UnityPy loading is replaced by a stub, so no real asset bundle is needed.
+
+import threading
+
+import pytest
+
+from src import unity_bundle
+from src.unity_bundle import EnvironmentCache
+
+
+class StubEnvironment:
+    objects = ()
+
+    def __init__(self, data):
+        self.data = data
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    loaded = []
+
+    def load(source):
+        loaded.append(source)
+        return StubEnvironment(source)
+
+    monkeypatch.setattr(unity_bundle, "load_unity_bundle", load)
+    return loaded
+
+
+@pytest.fixture
+def bundles(tmp_path):
+    paths = []
+    for index in range(3):
+        path = tmp_path / f"40000{index}_CardArt_x.mtga"
+        path.write_bytes(b"x" * 100)
+        paths.append(str(path))
+    return paths
+
+
+def test_environments_are_loaded_from_bytes(loads, bundles):
+    cache = EnvironmentCache()
+
+    with cache.checkout(bundles[0]) as environment:
+        assert environment.data == b"x" * 100
+
+    assert loads == [b"x" * 100]
+
+
+def test_unchanged_bundle_is_reused_and_rewritten_bundle_reloaded(loads, bundles):
+    cache = EnvironmentCache()
+    with cache.checkout(bundles[0]):
+        pass
+    with cache.checkout(bundles[0]):
+        pass
+    assert cache.stats()["hits"] == 1
+
+    with open(bundles[0], "wb") as bundle_file:
+        bundle_file.write(b"y" * 50)
+    with cache.checkout(bundles[0]) as environment:
+        assert environment.data == b"y" * 50
+
+
+def test_written_bundle_is_dropped_with_its_lock(loads, bundles):
+    cache = EnvironmentCache()
+
+    with cache.checkout(bundles[0], writing=True):
+        pass
+
+    stats = cache.stats()
+    assert stats["entries"] == 0
+    assert stats["path_locks"] == 0
+
+
+def test_path_locks_are_dropped_with_evicted_entries(loads, bundles):
+    cache = EnvironmentCache(max_bytes=250)
+
+    for path in bundles:
+        with cache.checkout(path):
+            pass
+
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["path_locks"] == 2
+
+
+def test_lock_of_a_checked_out_path_survives_eviction(loads, bundles):
+    cache = EnvironmentCache(max_bytes=150)
+    entered = threading.Event()
+    release = threading.Event()
+
+    def hold_first_bundle():
+        with cache.checkout(bundles[0]):
+            entered.set()
+            release.wait(5)
+
+    holder = threading.Thread(target=hold_first_bundle)
+    holder.start()
+    entered.wait(5)
+    with cache.checkout(bundles[1]):
+        pass
+    assert bundles[0] in cache._path_locks
+
+    release.set()
+    holder.join(5)
+    assert cache.stats()["path_locks"] == 1
@@ -0,0 +1,87 @@
+# Tests for the worker pools behind the API
+
+import asyncio
+import os
+import time
+import zlib
+
+import pytest
+
+from backend import executors
+from backend.executors import ShardedProcessPool
+
+
+def pid_after(seconds):
+    time.sleep(seconds)
+    return os.getpid()
+
+
+@pytest.fixture
+def pool():
+    pool = ShardedProcessPool(2)
+    yield pool
+    pool.shutdown()
+
+
+def shard_of(key):
+    return zlib.crc32(str(key).encode("utf-8")) % 2
+
+
+def test_keyed_jobs_always_run_in_the_same_worker(pool):
+    keys = [f"/bundles/{number}_CardArt.mtga" for number in range(8)]
+    assert {shard_of(key) for key in keys} == {0, 1}
+
+    first = {key: pool.submit_keyed(key, os.getpid).result() for key in keys}
+    second = {key: pool.submit_keyed(key, os.getpid).result() for key in reversed(keys)}
+
+    assert first == second
+    assert len(set(first.values())) == 2
+    for key in keys:
+        same_shard = [other for other in keys if shard_of(other) == shard_of(key)]
+        assert {first[other] for other in same_shard} == {first[key]}
+
+
+def test_unkeyed_jobs_go_to_the_least_busy_worker(pool):
+    busy = pool.submit(pid_after, 1.0)
+    time.sleep(0.2)
+
+    idle_pid = pool.submit(pid_after, 0).result(timeout=5)
+
+    assert idle_pid != busy.result(timeout=5)
+    assert pool._pending == [0, 0]
+
+
+def test_run_bundle_job_for_uses_the_keyed_shard(monkeypatch):
+    monkeypatch.setitem(executors._settings, "bundle_worker_mode", "process")
+    monkeypatch.setitem(executors._settings, "bundle_workers", 2)
+    executors.shutdown()
+
+    async def pids():
+        return [await executors.run_bundle_job_for("1_CardArt.mtga", os.getpid) for _ in range(3)]
+
+    try:
+        assert len(set(asyncio.run(pids()))) == 1
+        assert isinstance(executors._get_pool("bundle"), ShardedProcessPool)
+    finally:
+        executors.shutdown()
+
+
+def test_run_bundle_job_for_falls_back_to_threads(monkeypatch):
+    monkeypatch.setitem(executors._settings, "bundle_worker_mode", "thread")
+    executors.shutdown()
+
+    try:
+        assert asyncio.run(executors.run_bundle_job_for("key", os.getpid)) == os.getpid()
+    finally:
+        executors.shutdown()
+
+
+def test_writes_run_in_submission_order():
+    order = []
+
+    async def submit():
+        await asyncio.gather(*(executors.run_db_write(order.append, index) for index in range(20)))
+
+    asyncio.run(submit())
+
+    assert order == list(range(20))
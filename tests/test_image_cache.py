@@ -0,0 +1,92 @@
+# Tests for the on-disk cache of encoded card images
+
+import os
+
+import pytest
+
+from src.image_cache import ImageCache
+
+
+@pytest.fixture
+def bundle(tmp_path):
+    path = tmp_path / "400001_CardArt_a.mtga"
+    path.write_bytes(b"bundle")
+    return path
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ImageCache(tmp_path / "image_cache", max_bytes=250)
+
+
+def test_round_trip_and_counters(cache, bundle):
+    key = ImageCache.make_key(bundle)
+
+    assert cache.get(key) is None
+    cache.put(key, b"png bytes")
+
+    assert cache.get(key) == b"png bytes"
+    assert cache.stats() == {"entries": 1, "bytes": 9, "max_bytes": 250, "hits": 1, "misses": 1}
+
+
+def test_keys_change_with_the_variant_and_the_bundle(bundle, tmp_path):
+    full = ImageCache.make_key(bundle)
+
+    assert ImageCache.make_key(bundle, "w256-webp") != full
+    assert full.startswith(bundle.name + ".")
+
+    stat_result = bundle.stat()
+    os.utime(bundle, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns + 1_000_000_000))
+    assert ImageCache.make_key(bundle) != full
+    assert ImageCache.make_key(tmp_path / "missing.mtga") is None
+
+
+def test_least_recently_used_entries_are_evicted_over_budget(cache, tmp_path):
+    cache.put("a.img", b"a" * 100)
+    cache.put("b.img", b"b" * 100)
+    cache.get("a.img")
+
+    cache.put("c.img", b"c" * 100)
+
+    assert cache.get("b.img") is None
+    assert cache.get("a.img") == b"a" * 100
+    assert cache.get("c.img") == b"c" * 100
+    assert sorted(os.listdir(tmp_path / "image_cache")) == ["a.img", "c.img"]
+    assert cache.stats()["bytes"] == 200
+
+
+def test_entries_larger_than_the_budget_are_not_stored(cache):
+    cache.put("huge.img", b"x" * 251)
+
+    assert cache.stats()["entries"] == 0
+
+
+def test_invalidate_bundle_drops_every_variant(cache, bundle):
+    cache.put(ImageCache.make_key(bundle), b"full")
+    cache.put(ImageCache.make_key(bundle, "w128-jpeg"), b"thumb")
+    cache.put("other.mtga.0123.img", b"other")
+
+    assert cache.invalidate_bundle(bundle.name) == 2
+    assert cache.stats()["entries"] == 1
+
+
+def test_lru_order_survives_a_restart(tmp_path):
+    directory = tmp_path / "image_cache"
+    first = ImageCache(directory, max_bytes=250)
+    first.put("old.img", b"o" * 100)
+    os.utime(directory / "old.img", ns=(0, 0))
+    first.put("new.img", b"n" * 100)
+
+    second = ImageCache(directory, max_bytes=250)
+    second.put("newest.img", b"x" * 100)
+
+    assert second.get("old.img") is None
+    assert second.get("new.img") == b"n" * 100
+
+
+def test_a_deleted_cache_file_counts_as_a_miss(cache):
+    cache.put("a.img", b"a")
+    os.remove(cache.cache_directory / "a.img")
+
+    assert cache.get("a.img") is None
+    assert cache.stats()["bytes"] == 0
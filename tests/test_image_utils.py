@@ -0,0 +1,88 @@
+# Tests for the image helpers used by the card image endpoints
+
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.image_utils import count_unique_colors, render_image_variant
+
+
+def open_encoded(data):
+    return Image.open(io.BytesIO(data))
+
+
+def test_variant_fits_the_bounds_and_keeps_the_aspect_ratio():
+    data, media_type = render_image_variant(Image.new("RGB", (400, 200), "red"), width=100)
+
+    assert media_type == "image/png"
+    assert open_encoded(data).size == (100, 50)
+
+
+def test_variant_fits_whichever_bound_is_tighter():
+    data, _ = render_image_variant(Image.new("RGB", (400, 200)), width=300, height=50)
+
+    assert open_encoded(data).size == (100, 50)
+
+
+def test_variant_is_never_upscaled():
+    data, _ = render_image_variant(Image.new("RGB", (40, 20)), width=400, height=400)
+
+    assert open_encoded(data).size == (40, 20)
+
+
+def test_variant_accepts_encoded_bytes():
+    source = io.BytesIO()
+    Image.new("RGB", (64, 64)).save(source, format="PNG")
+
+    data, _ = render_image_variant(source.getvalue(), height=32)
+
+    assert open_encoded(data).size == (32, 32)
+
+
+@pytest.mark.parametrize(
+    "image_format, pil_format, media_type",
+    [("png", "PNG", "image/png"), ("jpg", "JPEG", "image/jpeg"), ("WEBP", "WEBP", "image/webp")],
+)
+def test_variant_is_encoded_in_the_requested_format(image_format, pil_format, media_type):
+    image = Image.new("RGBA", (16, 16), (10, 20, 30, 128))
+
+    data, returned_media_type = render_image_variant(image, image_format=image_format)
+
+    assert returned_media_type == media_type
+    assert open_encoded(data).format == pil_format
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(KeyError):
+        render_image_variant(Image.new("RGB", (4, 4)), image_format="gif")
+
+
+def random_image(mode, size=(64, 48), levels=6, seed=0):
+    # Few levels per channel, so colours repeat and the count is neither 1 nor every pixel
+    generator = np.random.default_rng(seed)
+    pixels = generator.integers(0, levels, size=(size[1], size[0], 4), dtype=np.uint8) * 40
+    return Image.fromarray(pixels, "RGBA").convert(mode)
+
+
+# Newer Pillow deprecates getdata(); it stays the reference the count must match
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")
+@pytest.mark.parametrize("mode", ["1", "L", "LA", "P", "RGB", "RGBA"])
+def test_count_unique_colors_matches_the_pixel_set(mode):
+    image = random_image(mode)
+
+    assert count_unique_colors(image) == len(set(image.getdata()))
+
+
+def test_count_unique_colors_tells_alpha_apart():
+    image = Image.new("RGBA", (2, 1))
+    image.putdata([(1, 2, 3, 0), (1, 2, 3, 255)])
+
+    assert count_unique_colors(image) == 2
+    assert count_unique_colors(image.convert("RGB")) == 1
+
+
+@pytest.mark.parametrize("mode", ["L", "RGB", "RGBA"])
+def test_count_unique_colors_of_a_flat_image(mode):
+    assert count_unique_colors(Image.new(mode, (10, 10))) == 1
@@ -0,0 +1,37 @@
+# Tests for recording modified rows from the game database
+
+import sqlite3
+
+import pytest
+
+from src.backup_store import BackupStore
+from src.change_journal import get_change_journal
+from src.load_preset import save_grp_id_info
+
+
+@pytest.fixture
+def database():
+    connection = sqlite3.connect(":memory:")
+    connection.execute("CREATE TABLE Cards (GrpId INTEGER PRIMARY KEY, ArtId INTEGER, tags TEXT)")
+    connection.executemany("INSERT INTO Cards VALUES (?, ?, ?)", [(1, 400001, ""), (2, 400002, "")])
+    connection.commit()
+    yield connection
+    connection.close()
+
+
+def test_row_only_changes_take_no_bundle_backup(tmp_path, database, monkeypatch):
+    bundles = tmp_path / "AssetBundle"
+    bundles.mkdir()
+    (bundles / "400001_CardArt_a.mtga").write_bytes(b"unmodified bundle")
+
+    def put(*args, **kwargs):
+        raise AssertionError("a row-only change must not back up bundles")
+
+    monkeypatch.setattr(BackupStore, "put", put)
+    changes_path = tmp_path / "changes.json"
+    database.execute("UPDATE Cards SET tags = '1696804317' WHERE GrpId = 1")
+
+    save_grp_id_info(["1"], str(changes_path), database.cursor(), database, str(bundles))
+
+    assert get_change_journal(changes_path).changes() == {"1": {"ArtId": 400001, "tags": "1696804317"}}
+    assert not database.in_transaction
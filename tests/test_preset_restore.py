@@ -0,0 +1,183 @@
+# Tests for the preset restore engine (grouping, diffing and the batched write)
+
+import sqlite3
+
+import pytest
+
+from src import preset_restore
+from src.preset_restore import diff_updates, fingerprint, group_updates, restore_changes
+
+
+@pytest.fixture
+def connection():
+    connection = sqlite3.connect(":memory:")
+    connection.executescript(
+        """
+        CREATE TABLE Cards (GrpId INTEGER PRIMARY KEY, ArtId INTEGER, tags TEXT, Rarity INTEGER);
+        CREATE TABLE Localizations_enUS (LocId INTEGER, Formatted INTEGER, Loc TEXT);
+        INSERT INTO Cards VALUES (1, 100, ',5,', 1), (2, 200, NULL, 2), (3, 300, '', 3);
+        INSERT INTO Localizations_enUS VALUES (10, 0, 'Bear'), (10, 1, 'Bear'), (11, 0, 'Elf');
+        """
+    )
+    return connection
+
+
+def test_group_updates_groups_rows_by_column_set():
+    changes = {
+        "1": {"ArtId": 1, "tags": "a"},
+        "2": {"ArtId": 2, "tags": "b", "GrpId": 2},
+        "3": {"tags": "c"},
+    }
+
+    groups, localizations, dropped = group_updates(changes)
+
+    assert groups == {("ArtId", "tags"): [(1, "a", "1"), (2, "b", "2")], ("tags",): [("c", "3")]}
+    assert localizations == []
+    assert dropped == []
+
+
+def test_group_updates_splits_out_localizations_and_unknown_columns():
+    changes = {
+        "1": {"ArtId": 1, "Removed": 9, "Localizations_enUS": {"10": "Grizzly"}},
+        "2": {"Removed": 9, "Localizations_enUS": None},
+    }
+
+    groups, localizations, dropped = group_updates(changes, ["GrpId", "ArtId", "tags"])
+
+    assert groups == {("ArtId",): [(1, "1")]}
+    assert localizations == [("Grizzly", "10")]
+    assert dropped == ["Removed"]
+
+
+def test_diff_updates_keeps_only_rows_that_differ(connection):
+    groups, localizations, _ = group_updates(
+        {
+            "1": {"ArtId": "100", "tags": ",5,"},
+            "2": {"ArtId": 200, "tags": None},
+            "3": {"ArtId": 301, "tags": ""},
+            "4": {"ArtId": 400, "tags": ""},
+        }
+    )
+
+    changed, _, counts = diff_updates(connection.cursor(), groups, localizations)
+
+    assert changed == {("ArtId", "tags"): [(301, "", "3")]}
+    assert counts["cards_changed"] == 1
+    assert counts["cards_unchanged"] == 2
+    assert counts["cards_missing"] == 1
+
+
+def test_diff_updates_compares_localizations_with_every_live_row(connection):
+    _, localizations, _ = group_updates(
+        {"1": {"Localizations_enUS": {"10": "Bear", "11": "Goblin", "12": "Missing"}}}
+    )
+
+    _, changed, counts = diff_updates(connection.cursor(), {}, localizations)
+
+    assert changed == [("Goblin", "11")]
+    assert counts["localizations_changed"] == 1
+    assert counts["localizations_unchanged"] == 1
+    assert counts["localizations_missing"] == 1
+    assert counts["missing_loc_ids"] == ["12"]
+
+
+@pytest.mark.parametrize(
+    "live, recorded",
+    [(1.0, 1), (1, "1"), (2.5, "2.5"), (1.0, "1.0"), (1000, "1e3"), ("abc", "abc"), (None, None)],
+)
+def test_fingerprint_matches_values_sqlite_considers_equal(live, recorded):
+    assert fingerprint([live]) == fingerprint([recorded])
+
+
+@pytest.mark.parametrize("live, recorded", [(1, 2), (None, ""), (1, "one"), (1.5, 1), ("a", "A")])
+def test_fingerprint_tells_different_values_apart(live, recorded):
+    assert fingerprint([live]) != fingerprint([recorded])
+
+
+def test_real_column_matching_an_integer_preset_value_is_not_rewritten():
+    connection = sqlite3.connect(":memory:")
+    connection.executescript(
+        "CREATE TABLE Cards (GrpId INTEGER PRIMARY KEY, Power REAL); INSERT INTO Cards VALUES (1, 1.0);"
+    )
+    groups, localizations, _ = group_updates({"1": {"Power": 1}})
+
+    changed, _, counts = diff_updates(connection.cursor(), groups, localizations)
+
+    assert changed == {}
+    assert counts["cards_unchanged"] == 1
+
+
+def test_restore_changes_writes_the_diff_in_one_transaction(connection):
+    changes = {
+        "1": {"ArtId": 100, "tags": ",5,"},
+        "2": {"ArtId": 201, "tags": "7", "Localizations_enUS": {"11": "Goblin"}},
+    }
+    snapshots = []
+
+    report = restore_changes(connection.cursor(), connection, changes, before_write=snapshots.append)
+
+    assert connection.execute("SELECT ArtId, tags FROM Cards WHERE GrpId = 2").fetchone() == (201, "7")
+    assert connection.execute("SELECT Loc FROM Localizations_enUS WHERE LocId = 11").fetchone() == ("Goblin",)
+    assert report["cards_changed"] == 1
+    assert report["cards_unchanged"] == 1
+    assert report["localizations_changed"] == 1
+    assert snapshots == [connection]
+    assert not connection.in_transaction
+
+
+def test_restore_changes_without_differences_writes_nothing(connection):
+    snapshots = []
+
+    report = restore_changes(
+        connection.cursor(), connection, {"1": {"ArtId": 100}}, before_write=snapshots.append
+    )
+
+    assert report["cards_unchanged"] == 1
+    assert report["statements"] == 0
+    assert snapshots == []
+
+
+def test_dry_run_reports_without_writing(connection):
+    report = restore_changes(connection.cursor(), connection, {"2": {"Rarity": 5}}, dry_run=True)
+
+    assert report["cards_changed"] == 1
+    assert connection.execute("SELECT Rarity FROM Cards WHERE GrpId = 2").fetchone() == (2,)
+
+
+def test_failed_batch_rolls_back_every_row(connection):
+    connection.execute(
+        "CREATE TRIGGER reject BEFORE UPDATE ON Cards WHEN NEW.GrpId = 3 BEGIN SELECT RAISE(ABORT, 'rejected'); END"
+    )
+    changes = {"1": {"Rarity": 9}, "2": {"Rarity": 9}, "3": {"Rarity": 9}}
+
+    with pytest.raises(sqlite3.IntegrityError):
+        restore_changes(connection.cursor(), connection, changes)
+
+    assert connection.execute("SELECT Rarity FROM Cards ORDER BY GrpId").fetchall() == [(1,), (2,), (3,)]
+
+
+def test_rows_are_written_in_batches_with_progress(connection, monkeypatch):
+    monkeypatch.setattr(preset_restore, "BATCH_SIZE", 2)
+    connection.executemany(
+        "INSERT INTO Cards VALUES (?, 0, '', 0)", [(grp_id,) for grp_id in range(4, 9)]
+    )
+    changes = {str(grp_id): {"Rarity": 7} for grp_id in range(1, 9)}
+    changes["1"]["Localizations_enUS"] = {"10": "Grizzly", "11": "Goblin"}
+    reports = []
+
+    report = restore_changes(
+        connection.cursor(), connection, changes, on_progress=lambda *args: reports.append(args)
+    )
+
+    assert reports == [
+        (2, 10, "Applying cards"),
+        (4, 10, "Applying cards"),
+        (6, 10, "Applying cards"),
+        (8, 10, "Applying cards"),
+        (10, 10, "Applying localizations"),
+    ]
+    assert report["cards_changed"] == 8
+    assert connection.execute("SELECT COUNT(*) FROM Cards WHERE Rarity = 7").fetchone() == (8,)
+    assert connection.execute(
+        "SELECT COUNT(*) FROM Localizations_enUS WHERE Loc IN ('Grizzly', 'Goblin')"
+    ).fetchone() == (3,)
@@ -0,0 +1,49 @@
+# Tests for the /api/cards result cache
+
+from backend.query_cache import QueryCache
+
+
+def test_hits_and_misses_are_counted():
+    cache = QueryCache()
+
+    assert cache.get(("page", 1)) is None
+    cache.put(("page", 1), ["card"], cache.generation)
+
+    assert cache.get(("page", 1)) == ["card"]
+    assert cache.stats() == {"entries": 1, "max_entries": 256, "hits": 1, "misses": 1, "generation": 0}
+
+
+def test_least_recently_used_result_is_dropped():
+    cache = QueryCache(max_entries=2)
+    cache.put("a", 1, cache.generation)
+    cache.put("b", 2, cache.generation)
+    cache.get("a")
+
+    cache.put("c", 3, cache.generation)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_invalidate_clears_every_result():
+    cache = QueryCache()
+    cache.put("a", 1, cache.generation)
+
+    cache.invalidate()
+
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+    assert cache.generation == 1
+
+
+def test_result_of_a_query_that_raced_a_write_is_not_stored():
+    cache = QueryCache()
+    generation = cache.generation
+    cache.invalidate()
+
+    cache.put("a", "stale rows", generation)
+
+    assert cache.get("a") is None
+    cache.put("a", "fresh rows", cache.generation)
+    assert cache.get("a") == "fresh rows"
@@ -0,0 +1,153 @@
+# Tests for the Scryfall HTTP client
+# Runs the client against a local stub server standing in for api.scryfall.com.
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from src.scryfall_client import ScryfallClient
+
+PAGE_COUNT = 3
+IMAGE_BYTES = b"IMG" * 1000
+IMAGE_ETAG = '"v1"'
+
+
+class StubScryfall(BaseHTTPRequestHandler):
+    """Paginated search, card JSON (one card answers 429 first) and ETag'd images."""
+
+    def log_message(self, *args):
+        pass
+
+    def send_body(self, data: bytes, content_type: str, headers=()):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append((self.path, dict(self.headers)))
+        if self.path.startswith("/cards/search"):
+            page = int(self.path.split("page=")[1]) if "page=" in self.path else 1
+            body = {
+                "data": [{"name": f"card {page}-{i}"} for i in range(2)],
+                "has_more": page < PAGE_COUNT,
+                "next_page": f"https://api.scryfall.com/cards/search?q=set:tst&page={page + 1}",
+            }
+            self.send_body(json.dumps(body).encode(), "application/json")
+        elif self.path == "/cards/busy" and server.busy_responses:
+            server.busy_responses -= 1
+            self.send_response(429)
+            self.send_header("Retry-After", "0")
+            self.end_headers()
+        elif self.path.startswith("/cards/"):
+            self.send_body(json.dumps({"id": self.path.rsplit("/", 1)[1]}).encode(), "application/json")
+        elif self.path.startswith("/img/"):
+            if self.headers.get("If-None-Match") == IMAGE_ETAG:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_body(IMAGE_BYTES, "image/jpeg", [("ETag", IMAGE_ETAG)])
+        else:
+            self.send_response(404)
+            self.end_headers()
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubScryfall)
+    server.requests = []
+    server.busy_responses = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(stub_server, tmp_path):
+    client = ScryfallClient(
+        base_url=f"http://127.0.0.1:{stub_server.server_address[1]}",
+        cache_directory=tmp_path / "cache",
+        requests_per_second=0,
+    )
+    yield client
+    client.close()
+
+
+def test_get_pages_follows_rewritten_next_page_links(client, stub_server):
+    items = client.get_pages("https://api.scryfall.com/cards/search?q=set:tst")
+
+    assert [item["name"] for item in items] == [f"card {page}-{i}" for page in (1, 2, 3) for i in range(2)]
+    assert len(stub_server.requests) == PAGE_COUNT
+
+
+def test_fresh_cache_entry_is_served_without_a_request(client, stub_server):
+    first = client.get_json("/cards/abc")
+    second = client.get_json("/cards/abc")
+
+    assert first == second == {"id": "abc"}
+    assert len(stub_server.requests) == 1
+    assert client.stats()["cache_fresh"] == 1
+
+
+def test_stale_cache_entry_is_revalidated_with_etag(client, stub_server, tmp_path):
+    client.fetch("/img/a.jpg")
+    client.fresh_seconds = 0
+
+    body_path = client.fetch("/img/a.jpg")
+
+    assert body_path.read_bytes() == IMAGE_BYTES
+    assert stub_server.requests[-1][1].get("If-None-Match") == IMAGE_ETAG
+    stats = client.stats()
+    assert stats["downloads"] == 1
+    assert stats["cache_revalidated"] == 1
+
+    destination = tmp_path / "a.jpg"
+    client.download("/img/a.jpg", destination)
+    assert destination.read_bytes() == IMAGE_BYTES
+
+
+def test_429_is_retried_after_retry_after(client, stub_server):
+    stub_server.busy_responses = 2
+
+    assert client.get_json("/cards/busy") == {"id": "busy"}
+    assert len(stub_server.requests) == 3
+    assert client.stats()["retries"] == 2
+
+
+def test_429_beyond_retry_limit_raises(client, stub_server):
+    stub_server.busy_responses = client.retries + 1
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.get_json("/cards/busy")
+
+
+def test_cache_evicts_least_recently_used_bodies(client):
+    client.max_cache_bytes = 3 * len(IMAGE_BYTES)
+    paths = [client.fetch(f"/img/{i}.jpg") for i in range(3)]
+    client.fetch("/img/0.jpg")
+
+    client.fetch("/img/3.jpg")
+
+    assert paths[0].exists()
+    assert not paths[1].exists()
+    stats = client.stats()
+    assert stats["cache_entries"] == 3
+    assert stats["cache_bytes"] == 3 * len(IMAGE_BYTES)
+    assert stats["cache_evictions"] == 1
+
+
+def test_map_keeps_input_order(client):
+    ids = [f"card{i}" for i in range(12)]
+
+    results = client.map(lambda card_id: client.get_json(f"/cards/{card_id}"), ids)
+
+    assert [result["id"] for result in results] == ids
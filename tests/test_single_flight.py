@@ -0,0 +1,77 @@
+# Tests for request coalescing of concurrent image jobs
+
+import asyncio
+
+import pytest
+
+from backend.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_job():
+    flights = SingleFlight()
+    started = []
+
+    async def job():
+        started.append(1)
+        await asyncio.sleep(0.05)
+        return "image"
+
+    async def main():
+        return await asyncio.gather(*(flights.run("card", job) for _ in range(5)))
+
+    assert asyncio.run(main()) == ["image"] * 5
+    assert len(started) == 1
+    assert flights.stats() == {"executed": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_different_keys_and_later_calls_run_their_own_job():
+    flights = SingleFlight()
+
+    async def main():
+        first = await asyncio.gather(
+            flights.run("a", lambda: asyncio.sleep(0, "a")),
+            flights.run("b", lambda: asyncio.sleep(0, "b")),
+        )
+        second = await flights.run("a", lambda: asyncio.sleep(0, "again"))
+        return first, second
+
+    assert asyncio.run(main()) == (["a", "b"], "again")
+    assert flights.executed == 3
+    assert flights.coalesced == 0
+
+
+def test_an_exception_reaches_every_caller():
+    flights = SingleFlight()
+
+    async def job():
+        await asyncio.sleep(0.01)
+        raise ValueError("bad bundle")
+
+    async def main():
+        callers = (flights.run("card", job) for _ in range(3))
+        return await asyncio.gather(*callers, return_exceptions=True)
+
+    results = asyncio.run(main())
+
+    assert [type(result) for result in results] == [ValueError] * 3
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_cancelling_one_caller_does_not_cancel_the_job():
+    flights = SingleFlight()
+
+    async def job():
+        await asyncio.sleep(0.05)
+        return "image"
+
+    async def main():
+        first = asyncio.ensure_future(flights.run("card", job))
+        second = asyncio.ensure_future(flights.run("card", job))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == "image"
+    assert flights.executed == 1
@@ -0,0 +1,120 @@
+# Tests for the set-based bulk style engine
+# save_grp_id_info is replaced by a recorder, so no changes file is written.
+
+import sqlite3
+
+import pytest
+
+from src import style_engine
+from src.tag_engine import register_tag_functions
+
+
+@pytest.fixture
+def connection():
+    connection = register_tag_functions(sqlite3.connect(":memory:"))
+    connection.executescript(
+        """
+        CREATE TABLE Cards (GrpId INTEGER PRIMARY KEY, tags TEXT, IsToken INTEGER);
+        INSERT INTO Cards VALUES
+            (1, NULL, 0), (2, '7', 0), (3, '7,1696804317', 0), (4, '', 1), (5, '1696804317', 1);
+        """
+    )
+    return connection
+
+
+@pytest.fixture
+def listened(monkeypatch):
+    calls = []
+    monkeypatch.setattr(style_engine, "_tag_listeners", [])
+    style_engine.add_tag_listener(
+        lambda tag, grp_ids, added: calls.append((tag, sorted(grp_ids), added))
+    )
+    return calls
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    batches = []
+    monkeypatch.setattr(
+        style_engine,
+        "save_grp_id_info",
+        lambda grp_ids, save_path, cursor, connection, bundle_path: batches.append(list(grp_ids)),
+    )
+    return batches
+
+
+def tags_of(connection):
+    return dict(connection.execute("SELECT GrpId, tags FROM Cards"))
+
+
+def test_add_tag_changes_only_cards_without_the_tag(connection, listened):
+    cursor = connection.cursor()
+    assert style_engine.add_tag(cursor, connection, "9", where_sql="IsToken = 0") == (3, 3)
+    assert style_engine.add_tag(cursor, connection, "7", grp_ids=[1, 2, 3]) == (3, 1)
+
+    assert tags_of(connection)[1] == "9,7"
+    assert listened == [("9", [1, 2, 3], True), ("7", [1], True)]
+
+
+def test_remove_tag_reports_the_returned_ids(connection, listened):
+    target_count, changed = style_engine.remove_tag(
+        connection.cursor(), connection, style_engine.PARALLAX_TAG, where_sql="1"
+    )
+
+    assert (target_count, changed) == (5, 2)
+    assert listened == [(style_engine.PARALLAX_TAG, [3, 5], False)]
+    assert tags_of(connection)[3] == "7"
+
+
+def test_no_targets_skip_the_update(connection, listened):
+    assert style_engine.add_tag(connection.cursor(), connection, "9", grp_ids=[]) == (0, 0)
+    assert listened == []
+
+
+def test_progress_ends_at_the_target_count(connection):
+    reports = []
+
+    def report(*args):
+        reports.append(args)
+
+    style_engine.add_tag(connection.cursor(), connection, "9", where_sql="1", on_progress=report)
+
+    assert reports[-1] == (5, 5, "Adding style")
+
+
+def test_unlock_records_every_target_in_batches(connection, recorded, monkeypatch):
+    monkeypatch.setattr(style_engine, "LOG_BATCH_SIZE", 2)
+
+    result = style_engine.unlock_parallax(
+        connection.cursor(), connection, "changes.json", "bundles", where_sql="1"
+    )
+
+    assert result == (5, 3)
+    assert recorded == [["1", "2"], ["3", "4"], ["5"]]
+    assert not connection.in_transaction
+    assert all(style_engine.PARALLAX_TAG in tags for tags in tags_of(connection).values())
+
+
+def test_reset_records_only_the_changed_cards(connection, recorded, monkeypatch):
+    monkeypatch.setattr(style_engine, "LOG_BATCH_SIZE", 1)
+
+    result = style_engine.reset_parallax(
+        connection.cursor(), connection, "changes.json", "bundles", where_sql="1"
+    )
+
+    assert result == (5, 2)
+    assert recorded == [["3"], ["5"]]
+
+
+def test_failed_recording_rolls_back_the_update(connection, monkeypatch):
+    def fail(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(style_engine, "save_grp_id_info", fail)
+
+    with pytest.raises(OSError):
+        style_engine.unlock_parallax(
+            connection.cursor(), connection, "changes.json", "bundles", grp_ids=[1]
+        )
+
+    assert tags_of(connection)[1] is None
@@ -0,0 +1,111 @@
+# Tests for resolving and applying declarative style rules
+# save_grp_id_info is replaced by a recorder, so no changes file is written.
+
+import sqlite3
+
+import pytest
+
+from src import style_engine
+from src.card_index import CardIndex
+from src.style_rules import StyleRule, apply_rule, resolve_targets
+from src.tag_engine import register_tag_functions
+from src.tag_index import TagIndex
+
+PARALLAX = style_engine.PARALLAX_TAG
+
+CARDS = [
+    # GrpId, Order_Title, ExpansionCode, tags, Colors, SubTypes, IsToken
+    (1, "Smuggler's Copter", "KLD", "", "", "331", 0),
+    (2, "Goblin Token", "M21", PARALLAX, "3", "", 1),
+    (3, "Grizzly Bears", "M21", "", "5", "12", 0),
+    (4, "Forest", "M21", "", "", "", 0),
+    (5, "Golos", "M21", "", "1,2,3", "331", 0),
+]
+
+
+@pytest.fixture
+def database_file_path(tmp_path):
+    database_file_path = tmp_path / "Raw_CardDatabase_rules.mtga"
+    connection = sqlite3.connect(database_file_path)
+    connection.executescript(
+        """
+        CREATE TABLE Cards (
+            GrpId INTEGER PRIMARY KEY, ArtId INTEGER, Order_Title TEXT, ExpansionCode TEXT,
+            ArtSize INTEGER, TitleId INTEGER, LinkedFaceGrpIds TEXT,
+            IsDigitalOnly INTEGER, IsRebalanced INTEGER,
+            tags TEXT, Colors TEXT, SubTypes TEXT, IsToken INTEGER
+        );
+        CREATE TABLE Localizations_koKR (LocId INTEGER, Loc TEXT);
+        """
+    )
+    connection.executemany(
+        "INSERT INTO Cards VALUES (?, 0, ?, ?, 0, 0, '', 0, 0, ?, ?, ?, ?)", CARDS
+    )
+    connection.commit()
+    connection.close()
+    return database_file_path
+
+
+@pytest.fixture
+def indexes(database_file_path, tmp_path):
+    tag_index = TagIndex(database_file_path)
+    tag_index.build()
+    return tag_index, CardIndex(database_file_path, tmp_path / "index")
+
+
+@pytest.mark.parametrize(
+    "rule, grp_ids",
+    [
+        (StyleRule("add"), [1, 3, 4, 5]),
+        (StyleRule("remove"), [2]),
+        (StyleRule("add", is_token=False, subtypes=["331"]), [1, 5]),
+        (StyleRule("add", mono_colored=True), [3]),
+        (StyleRule("add", mono_colored=False, subtypes=["331"]), [1, 5]),
+        (StyleRule("add", set_code="m21", exclude_basic_lands=True), [3, 5]),
+        (StyleRule("add", name_prefix="g"), [3, 5]),
+        (StyleRule("add", search="Bears"), [3]),
+        (StyleRule("add", tag="7", name_prefix="go"), [2, 5]),
+    ],
+)
+def test_resolve_targets_selects_only_cards_the_rule_changes(indexes, rule, grp_ids):
+    assert resolve_targets(rule, *indexes) == grp_ids
+
+
+@pytest.mark.parametrize("arguments", [{"action": "toggle"}, {"action": "add", "tag": " "}])
+def test_invalid_rules_are_rejected(arguments):
+    with pytest.raises(ValueError):
+        StyleRule(**arguments)
+
+
+def test_index_criteria_turn_the_action_into_a_tag_condition():
+    rule = StyleRule("remove", tag="7", is_token=True, mono_colored=False)
+
+    required, excluded = rule.index_criteria()
+
+    assert required == {"token": ["1"], "tag": ["7"]}
+    assert excluded == {"color_count": ["1"]}
+
+
+@pytest.mark.parametrize(
+    "action, tags, expected_tags", [("add", "331", "331,7"), ("remove", "331,7", "331")]
+)
+def test_apply_rule_updates_and_records_the_targets(
+    database_file_path, monkeypatch, action, tags, expected_tags
+):
+    recorded = []
+    monkeypatch.setattr(
+        style_engine,
+        "save_grp_id_info",
+        lambda grp_ids, save_path, cursor, connection, bundle_path: recorded.extend(grp_ids),
+    )
+    connection = register_tag_functions(sqlite3.connect(database_file_path))
+    connection.execute("UPDATE Cards SET tags = ? WHERE GrpId = 1", (tags,))
+    connection.commit()
+
+    result = apply_rule(
+        connection.cursor(), connection, StyleRule(action, tag="7"), [1], "changes.json", "bundles"
+    )
+
+    assert result == (1, 1)
+    assert recorded == ["1"]
+    assert connection.execute("SELECT tags FROM Cards WHERE GrpId = 1").fetchone()[0] == expected_tags
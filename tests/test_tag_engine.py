@@ -0,0 +1,81 @@
+# Tests for the tag list SQL functions
+
+import sqlite3
+
+import pytest
+
+from src.tag_engine import register_tag_functions, tag_add, tag_has, tag_remove
+
+
+@pytest.mark.parametrize(
+    "tags, tag, expected",
+    [
+        ("1,2,3", "2", 1),
+        (",1,2,3,", "3", 1),
+        ("1, 2 ,3", "2", 1),
+        ("12,23", "2", 0),
+        ("", "1", 0),
+        (None, "1", 0),
+        ("1,2", None, 0),
+        ("1696804317", 1696804317, 1),
+    ],
+)
+def test_tag_has_matches_whole_entries(tags, tag, expected):
+    assert tag_has(tags, tag) == expected
+
+
+@pytest.mark.parametrize(
+    "tags, tag, expected",
+    [
+        ("1,2", "3", "1,2,3"),
+        (",1,2,", "3", ",1,2,3,"),
+        (",1,", "2", ",1,2,"),
+        ("1,,2", "3", "1,2,3"),
+        ("", "3", "3"),
+        (None, "3", "3"),
+        ("1,2", 3, "1,2,3"),
+    ],
+)
+def test_tag_add_appends_and_keeps_framing(tags, tag, expected):
+    assert tag_add(tags, tag) == expected
+
+
+@pytest.mark.parametrize("tags", ["1,2,3", ",1,2,3,", "1, 2 ,3"])
+def test_tag_add_leaves_lists_with_the_tag_untouched(tags):
+    assert tag_add(tags, "2") is tags
+
+
+@pytest.mark.parametrize(
+    "tags, tag, expected",
+    [
+        ("1,2,3", "2", "1,3"),
+        (",1,2,3,", "2", ",1,3,"),
+        (",2,", "2", ""),
+        ("2,1,2", "2", "1"),
+        ("2", "2", ""),
+    ],
+)
+def test_tag_remove_drops_every_occurrence_and_keeps_framing(tags, tag, expected):
+    assert tag_remove(tags, tag) == expected
+
+
+@pytest.mark.parametrize("tags", ["1,3", ",1,3,", "12,23", None])
+def test_tag_remove_leaves_lists_without_the_tag_untouched(tags):
+    assert tag_remove(tags, "2") is tags
+
+
+def test_functions_edit_rows_in_sql():
+    connection = register_tag_functions(sqlite3.connect(":memory:"))
+    connection.execute("CREATE TABLE Cards (GrpId INTEGER PRIMARY KEY, tags TEXT)")
+    connection.executemany(
+        "INSERT INTO Cards VALUES (?, ?)", [(1, ",5,"), (2, "5,7"), (3, None), (4, "")]
+    )
+
+    changed = connection.execute(
+        "UPDATE Cards SET tags = tag_add(tags, ?) WHERE NOT tag_has(tags, ?) RETURNING GrpId", ("7", "7")
+    ).fetchall()
+    assert sorted(row[0] for row in changed) == [1, 3, 4]
+    connection.execute("UPDATE Cards SET tags = tag_remove(tags, ?) WHERE tag_has(tags, ?)", ("5", "5"))
+
+    rows = dict(connection.execute("SELECT GrpId, tags FROM Cards").fetchall())
+    assert rows == {1: ",7,", 2: "7", 3: "7", 4: "7"}
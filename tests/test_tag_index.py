@@ -0,0 +1,108 @@
+# Tests for the in-memory tag / colour / subtype index
+
+import sqlite3
+
+import pytest
+
+from src.tag_index import TagIndex, intersect_sorted, split_list
+
+CARDS = [
+    # GrpId, tags, Colors, SubTypes, IsToken
+    (1, "1696804317", "1", "331", 0),
+    (2, "", "1,2", "331", 0),
+    (3, "1696804317,7", "2", "331,12", 1),
+    (4, None, None, None, 0),
+]
+
+
+@pytest.fixture
+def database_path(tmp_path):
+    path = tmp_path / "Raw_CardDatabase_test.mtga"
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE Cards (GrpId INTEGER PRIMARY KEY, tags TEXT, Colors TEXT, SubTypes TEXT, IsToken INTEGER)")
+    connection.executemany("INSERT INTO Cards VALUES (?, ?, ?, ?, ?)", CARDS)
+    connection.commit()
+    connection.close()
+    return path
+
+
+@pytest.fixture
+def index(database_path):
+    index = TagIndex(database_path)
+    index.build()
+    return index
+
+
+def write(database_path, sql, params=()):
+    connection = sqlite3.connect(database_path)
+    connection.execute(sql, params)
+    connection.commit()
+    connection.close()
+
+
+def test_split_list_and_intersection():
+    assert split_list(" 1, 2,,3 ") == ["1", "2", "3"]
+    assert split_list(None) == []
+    assert list(intersect_sorted([])) == []
+    assert list(intersect_sorted([[1, 2, 3, 5], [2, 3], [3, 5, 2]])) == [2, 3]
+
+
+def test_select_intersects_fields(index):
+    assert list(index.grp_ids("tag", "1696804317")) == [1, 3]
+    assert list(index.select({"subtype": ["331"], "color_count": ["1"]})) == [1, 3]
+    assert list(index.select({"subtype": ["331"], "tag": ["1696804317"], "token": ["0"]})) == [1]
+    assert list(index.select({"color": ["3"]})) == []
+    assert list(index.all_grp_ids()) == [1, 2, 3, 4]
+    assert index.values("color_count") == {"1": 2, "0": 1, "2": 1}
+
+
+def test_select_rejects_bad_criteria(index):
+    with pytest.raises(ValueError):
+        index.select({})
+    with pytest.raises(ValueError):
+        index.select({"rarity": ["1"]})
+
+
+def test_apply_tag_change_patches_postings(index):
+    index.apply_tag_change("1696804317", [2, 4], added=True)
+    assert list(index.grp_ids("tag", "1696804317")) == [1, 2, 3, 4]
+
+    index.apply_tag_change("7", [3], added=False)
+    assert "7" not in index.values("tag")
+    assert index.stats()["incremental_updates"] == 2
+
+
+def test_patched_write_keeps_the_index(index, database_path):
+    write(database_path, "UPDATE Cards SET tags = '1696804317' WHERE GrpId = 2")
+    index.apply_tag_change("1696804317", [2], added=True)
+    index.note_write()
+
+    assert list(index.grp_ids("tag", "1696804317")) == [1, 2, 3]
+    assert index.builds == 1
+
+
+def test_unpatched_write_marks_the_index_stale(index, database_path):
+    # e.g. a re-apply or snapshot restore, which never calls apply_tag_change
+    write(database_path, "UPDATE Cards SET tags = '1696804317' WHERE GrpId = 4")
+    index.note_write()
+
+    assert not index.stats()["built"]
+    assert list(index.grp_ids("tag", "1696804317")) == [1, 3, 4]
+    assert index.builds == 2
+
+
+def test_patch_is_consumed_by_one_write(index, database_path):
+    index.apply_tag_change("1696804317", [], added=True)
+    index.note_write()
+    assert index.stats()["built"]
+
+    write(database_path, "UPDATE Cards SET tags = '' WHERE GrpId = 1")
+    index.note_write()
+    assert list(index.grp_ids("tag", "1696804317")) == [3]
+
+
+def test_external_edit_triggers_a_rebuild(index, database_path):
+    write(database_path, "INSERT INTO Cards VALUES (5, '7', '3', '', 0)")
+
+    assert list(index.grp_ids("tag", "7")) == [3, 5]
+    assert index.builds == 2
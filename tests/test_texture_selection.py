@@ -0,0 +1,70 @@
+# Tests for picking a bundle's main-art texture
+# Bundles are replaced by stub environments, so no real asset bundle is needed.
+
+from types import SimpleNamespace
+
+from PIL import Image
+from UnityPy.enums import TextureFormat
+
+from src.unity_bundle import extract_textures_from_bundle, find_main_texture, rank_textures
+
+
+class StubTexture:
+    def __init__(self, name, width, height, texture_format=TextureFormat.DXT1, colors=1):
+        self.m_Name = name
+        self.m_Width = width
+        self.m_Height = height
+        self.m_TextureFormat = texture_format
+        self.colors = colors
+        self.decodes = 0
+
+    @property
+    def image(self):
+        self.decodes += 1
+        image = Image.new("RGB", (self.m_Width, self.m_Height))
+        image.putdata([(index, 0, 0) for index in range(self.colors)] * (self.m_Width * self.m_Height // self.colors))
+        return image
+
+
+def environment(*textures):
+    objects = [SimpleNamespace(type=SimpleNamespace(name="Texture2D"), read=lambda texture=texture: texture) for texture in textures]
+    objects.append(SimpleNamespace(type=SimpleNamespace(name="Mesh"), read=lambda: None))
+    return SimpleNamespace(objects=objects)
+
+
+def test_largest_opaque_texture_wins_without_decoding():
+    art = StubTexture("art", 16, 8)
+    glow = StubTexture("glow", 16, 8, TextureFormat.DXT5)
+    small = StubTexture("small", 4, 4)
+    atlas = StubTexture("frame atlas", 64, 64)
+
+    assert find_main_texture(environment(small, glow, atlas, art)).texture is art
+    assert art.decodes == glow.decodes == small.decodes == 0
+
+
+def test_ties_are_broken_by_colour_complexity():
+    flat = StubTexture("a", 8, 8, colors=1)
+    detailed = StubTexture("b", 8, 8, colors=16)
+
+    assert find_main_texture(environment(flat, detailed)).texture is detailed
+
+
+def test_every_path_ranks_the_same_main_texture_first():
+    flat = StubTexture("b", 8, 8, colors=1)
+    detailed = StubTexture("a", 8, 8, colors=16)
+    small = StubTexture("c", 4, 4)
+    bundle = environment(small, flat, detailed)
+
+    ranked = [entry.texture for entry in rank_textures(bundle)]
+
+    assert ranked == [detailed, flat, small]
+    assert extract_textures_from_bundle(bundle) == ranked
+    assert find_main_texture(bundle).texture is ranked[0]
+
+
+def test_bundle_without_card_art():
+    bundle = environment(StubTexture("Font Texture", 64, 64))
+
+    assert find_main_texture(bundle) is None
+    assert rank_textures(bundle) == []
+    assert extract_textures_from_bundle(bundle) == []
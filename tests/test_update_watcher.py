@@ -0,0 +1,177 @@
+# Tests for the MTGA client update watcher
+# Uses the polling watch on temporary Raw / AssetBundle folders; no MTGA install is needed.
+
+import os
+import threading
+import time
+
+import pytest
+
+from src import update_watcher
+from src.backup_store import BackupStore
+from src.update_watcher import ALL_FILES, PollingWatch, UpdateWatcher
+
+
+@pytest.fixture
+def install(tmp_path):
+    raw = tmp_path / "Downloads" / "Raw"
+    bundles = tmp_path / "Downloads" / "AssetBundle"
+    raw.mkdir(parents=True)
+    bundles.mkdir()
+    database = raw / "Raw_CardDatabase_old.mtga"
+    database.write_bytes(b"old database")
+    return database, bundles
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = BackupStore(tmp_path / "backups")
+    monkeypatch.setattr(update_watcher, "get_backup_store", lambda: store)
+    return store
+
+
+@pytest.fixture
+def watcher(install, store):
+    database, _ = install
+    return UpdateWatcher(database, on_update=lambda update: None, settle_seconds=0.05, poll_interval=60)
+
+
+def pending_events():
+    return {"database": False, "bundles": set()}
+
+
+def bump_mtime(path, seconds=10):
+    stat_result = path.stat()
+    os.utime(path, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns + seconds * 1_000_000_000))
+
+
+def test_polling_watch_reports_changes_only_when_a_poll_is_due(tmp_path):
+    bundle = tmp_path / "1_CardArt_a.mtga"
+    bundle.write_bytes(b"a")
+    watch = PollingWatch([tmp_path], interval=60)
+
+    bundle.write_bytes(b"ab")
+    (tmp_path / "2_CardArt_b.mtga").write_bytes(b"b")
+
+    assert watch.read_events(0.01) == []
+    events = watch.read_events(0.01, rescan=True)
+    assert sorted(events) == [(tmp_path, "1_CardArt_a.mtga"), (tmp_path, "2_CardArt_b.mtga")]
+    assert watch.read_events(0.01, rescan=True) == []
+
+
+def test_polling_watch_sees_a_file_that_is_still_growing(tmp_path):
+    bundle = tmp_path / "1_CardArt_a.mtga"
+    bundle.write_bytes(b"a")
+    watch = PollingWatch([tmp_path], interval=60)
+
+    for size in range(2, 5):
+        bundle.write_bytes(b"a" * size)
+        assert watch.read_events(0.01, rescan=True) == [(tmp_path, "1_CardArt_a.mtga")]
+
+
+def test_polling_watch_reports_deleted_files(tmp_path):
+    bundle = tmp_path / "1_CardArt_a.mtga"
+    bundle.write_bytes(b"a")
+    watch = PollingWatch([tmp_path], interval=0)
+
+    bundle.unlink()
+
+    assert watch.read_events(0.01) == [(tmp_path, "1_CardArt_a.mtga")]
+
+
+def test_collect_ignores_the_configured_database_and_other_files(watcher, install):
+    database, bundles = install
+    pending = pending_events()
+
+    watcher._collect(
+        [
+            (database.parent, database.name),
+            (database.parent, "Raw_ClientLocalization_x.mtga"),
+            (bundles, "1_CardArt_a.mtga"),
+            (bundles, "catalog.json"),
+        ],
+        pending,
+    )
+
+    assert pending == {"database": False, "bundles": {"1_CardArt_a.mtga"}}
+
+
+def test_collect_flags_a_new_database_and_overflows(watcher, install):
+    database, bundles = install
+    pending = pending_events()
+
+    watcher._collect([(database.parent, "Raw_CardDatabase_new.mtga"), (bundles, ALL_FILES)], pending)
+    watcher._collect([(bundles, "1_CardArt_a.mtga")], pending)
+
+    assert pending == {"database": True, "bundles": ALL_FILES}
+    assert watcher._has_events(pending)
+
+
+def test_settled_update_picks_the_newest_database(watcher, install):
+    database, _ = install
+    new_database = database.with_name("Raw_CardDatabase_new.mtga")
+    new_database.write_bytes(b"new database")
+    bump_mtime(new_database)
+    pending = pending_events()
+    pending["database"] = True
+
+    update = watcher._settled_update(pending)
+
+    assert update.database_file_path == str(new_database)
+    assert update.bundle_names == set()
+
+
+def test_settled_update_drops_the_swappers_own_bundle_writes(watcher, install, store):
+    _, bundles = install
+    own = bundles / "1_CardArt_a.mtga"
+    foreign = bundles / "2_CardArt_b.mtga"
+    own.write_bytes(b"swapped art")
+    foreign.write_bytes(b"patched by the client")
+    store.note_own_write(own)
+    pending = pending_events()
+    pending["bundles"] = {own.name, foreign.name}
+
+    assert watcher._settled_update(pending).bundle_names == {foreign.name}
+
+    own.write_bytes(b"patched by the client")
+    pending["bundles"] = {own.name}
+    assert watcher._settled_update(pending).bundle_names == {own.name}
+
+
+def test_settled_update_is_none_when_nothing_foreign_changed(watcher, install, store):
+    database, bundles = install
+    own = bundles / "1_CardArt_a.mtga"
+    own.write_bytes(b"swapped art")
+    store.note_own_write(own)
+    pending = pending_events()
+    pending["database"] = True
+    pending["bundles"] = {own.name}
+
+    assert watcher._settled_update(pending) is None
+
+
+def test_polling_watcher_waits_for_a_growing_bundle_to_settle(install, store, monkeypatch):
+    database, bundles = install
+    bundle = bundles / "1_CardArt_a.mtga"
+    bundle.write_bytes(b"a")
+    monkeypatch.setattr(update_watcher, "open_directory_watch", PollingWatch)
+    seen = []
+    done = threading.Event()
+
+    def on_update(update):
+        seen.append((update.bundle_names, bundle.stat().st_size))
+        done.set()
+
+    watcher = UpdateWatcher(database, on_update, settle_seconds=0.3, poll_interval=0.5)
+    watcher.start()
+    try:
+        time.sleep(0.1)
+        for size in range(2, 22):
+            bundle.write_bytes(b"a" * size)
+            time.sleep(0.05)
+        assert done.wait(5)
+    finally:
+        watcher.stop()
+
+    assert seen == [({bundle.name}, 21)]
+    assert watcher.stats()["mode"] == "polling"